@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Assemble frame sequences (name_frame-0.png, name_frame-1.png, ...) and
+existing GIFs into animated WebP files.
+
+Only files named with an explicit frame marker (see parse_frame_name) are
+frames: numbered stills such as bg01.jpg ... bg10.jpg are separate images.
+Frames are ordered by their number, not lexically (frame-10 after frame-9).
+Sequence frames are decoded in parallel threads; each frame is compared with
+the previous one and identical frames are merged into the previous frame's
+duration.  The remaining frames go to libwebp's animation encoder with
+minimize_size, which encodes only the changed rectangle of each frame.
+The GIFs themselves are kept as the fallback for browsers without WebP.
+"""
+
+import argparse
+import os
+import re
+import sys
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+try:
+    from PIL import Image, ImageChops, ImageSequence
+except ImportError:
+    print("Error: Pillow library not found.")
+    print("Please install it with: pip install Pillow")
+    sys.exit(1)
+
+from build_utils import load_manifest, save_manifest, sha256_file
+import site_index
+
+MANIFEST_NAME = '.animated-webp-manifest.json'
+MANIFEST_VERSION = 1
+
+FRAME_PATTERN = re.compile(r'^(?P<name>.+?)[-_]frame[-_]?(?P<index>\d+)$', re.IGNORECASE)
+FRAME_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+MIN_FRAMES = 3
+DEFAULT_FRAME_DURATION = 50  # ms, same as the existing blog GIF
+
+
+def parse_frame_name(stem):
+    """
+    (sequence name, frame number) for a frame file's stem, or None.
+
+    A frame is named <name>-frame-<N> or <name>_frame<N> (any mix of - and
+    _); a number alone does not make a file a frame:
+
+    >>> parse_frame_name('masses_springs_frame-12')
+    ('masses_springs', 12)
+    >>> [parse_frame_name(stem) for stem in ('bg01', 'img03', 'images_002', 'frame-1')]
+    [None, None, None, None]
+
+    (Run with `python -m doctest animated_webp.py`.)
+    """
+    match = FRAME_PATTERN.match(stem)
+    if match is None:
+        return None
+    return match.group('name'), int(match.group('index'))
+
+
+def find_frame_sequences(root_dir, index, min_frames=MIN_FRAMES):
+    """
+    Group frame files (see parse_frame_name) into sequences.
+
+    Returns {output_path: [frame paths in numeric order]}; the output is
+    named after the sequence, e.g. masses_springs_frame-N.png ->
+    masses_springs.webp.
+    """
+    groups = defaultdict(list)
+    for path in site_index.files_of_kind(root_dir, index, 'png', 'jpeg', 'other'):
+        if path.suffix.lower() not in FRAME_EXTENSIONS:
+            continue
+        parsed = parse_frame_name(path.stem)
+        if parsed:
+            name, number = parsed
+            groups[(path.parent, name, path.suffix.lower())].append((number, path))
+
+    sequences = {}
+    for (parent, name, _), frames in groups.items():
+        if len(frames) < min_frames:
+            continue
+        frames.sort()
+        sequences[parent / (name + '.webp')] = [path for _, path in frames]
+    return dict(sorted(sequences.items()))
+
+
+def find_gif_files(root_dir, index):
+    """Animated GIFs (more than one frame) in the tree, as {path: (n_frames, size)}."""
+    gifs = {}
+    for path in site_index.files_of_kind(root_dir, index, 'gif'):
+        try:
+            with Image.open(path) as img:
+                if getattr(img, 'n_frames', 1) > 1:
+                    gifs[path] = (img.n_frames, img.size)
+        except Exception:
+            continue
+    return gifs
+
+
+def _extracted_from_gif(paths, gifs):
+    """True if a GIF next to the frames has the same frame count and size."""
+    signatures = {(gif.parent, n_frames, size) for gif, (n_frames, size) in gifs.items()}
+    try:
+        with Image.open(paths[0]) as first:
+            size = first.size
+    except Exception:
+        return False
+    return (paths[0].parent, len(paths), size) in signatures
+
+
+def _load_frame(path):
+    with Image.open(path) as img:
+        return img.convert('RGBA')
+
+
+def load_sequence(paths, workers):
+    """Decode frame files in parallel (decoders release the GIL)."""
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_load_frame, paths))
+
+
+def load_gif(path):
+    """Decode a GIF into full RGBA frames and per-frame durations (sequential by nature)."""
+    frames, durations = [], []
+    with Image.open(path) as img:
+        for frame in ImageSequence.Iterator(img):
+            frames.append(frame.convert('RGBA'))
+            durations.append(frame.info.get('duration', img.info.get('duration', DEFAULT_FRAME_DURATION)))
+    return frames, durations
+
+
+def _delta_box(pair):
+    previous, current = pair
+    # alpha_only=False: RGBA getbbox would otherwise only look at the alpha band
+    return ImageChops.difference(previous, current).getbbox(alpha_only=False)
+
+
+def collapse_frames(frames, durations, workers):
+    """
+    Drop frames identical to their predecessor, adding their time to it.
+
+    Returns (frames, durations).
+    """
+    if len(frames) < 2:
+        return frames, durations
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        boxes = list(executor.map(_delta_box, zip(frames, frames[1:])))
+
+    kept_frames, kept_durations = [frames[0]], [durations[0]]
+    for frame, duration, box in zip(frames[1:], durations[1:], boxes):
+        if box is None:
+            kept_durations[-1] += duration
+            continue
+        kept_frames.append(frame)
+        kept_durations.append(duration)
+    return kept_frames, kept_durations
+
+
+def encode_animation(frames, durations, output, quality=80, method=6, lossless=False):
+    """Write frames as a looping animated WebP."""
+    frames[0].save(
+        output, 'WebP', save_all=True, append_images=frames[1:], duration=durations, loop=0,
+        quality=quality, method=method, lossless=lossless, minimize_size=True, allow_mixed=not lossless,
+    )
+
+
+def _inputs_hash(paths):
+    return ':'.join(sha256_file(path)[:16] for path in paths)
+
+
+def convert_animations(root_dir, workers=1, quality=80, method=6, lossless=False,
+                       frame_duration=DEFAULT_FRAME_DURATION):
+    """
+    Convert every frame sequence and animated GIF under root_dir.
+
+    Outputs whose inputs and settings are unchanged (per the manifest) are
+    skipped, as are frame sequences that were extracted from a GIF next to
+    them (the GIF is converted instead).  Returns a list of (source_rel, output_rel, source_bytes,
+    output_bytes, frames_in, frames_out, error) rows for reporting.
+    """
+    root = Path(root_dir)
+    manifest_path = root / MANIFEST_NAME
+    manifest = load_manifest(manifest_path, MANIFEST_VERSION)
+    settings = f"q{quality}:m{method}:{'lossless' if lossless else 'lossy'}:d{frame_duration}"
+
+    index = site_index.scan(root)
+    gifs = find_gif_files(root, index)
+    jobs = [(paths[0].parent / (paths[0].stem + '..' + paths[-1].stem), output, paths)
+            for output, paths in find_frame_sequences(root, index).items()
+            if not _extracted_from_gif(paths, gifs)]
+    jobs += [(gif, gif.with_suffix('.webp'), [gif]) for gif in gifs]
+
+    rows = []
+    entries = {}
+    for label, output, inputs in jobs:
+        output_rel = output.relative_to(root).as_posix()
+        source_rel = label.relative_to(root).as_posix()
+        source_bytes = sum(p.stat().st_size for p in inputs)
+        try:
+            digest = _inputs_hash(inputs)
+            entry = manifest['entries'].get(output_rel)
+            if (entry and entry.get('inputs') == digest and entry.get('settings') == settings
+                    and output.exists() and output.stat().st_size == entry.get('output_size')):
+                entries[output_rel] = entry
+                rows.append((source_rel, output_rel, source_bytes, 0, entry['frames_in'], entry['frames_out'], None))
+                continue
+
+            if len(inputs) == 1:
+                frames, durations = load_gif(inputs[0])
+            else:
+                frames = load_sequence(inputs, workers)
+                durations = [frame_duration] * len(frames)
+            frames_in = len(frames)
+            frames, durations = collapse_frames(frames, durations, workers)
+            encode_animation(frames, durations, output, quality, method, lossless)
+
+            entries[output_rel] = {
+                'inputs': digest, 'settings': settings, 'output_size': output.stat().st_size,
+                'frames_in': frames_in, 'frames_out': len(frames),
+                'source': inputs[0].relative_to(root).as_posix() if len(inputs) == 1 else None,
+                'width': frames[0].width,
+            }
+            rows.append((source_rel, output_rel, source_bytes, output.stat().st_size, frames_in, len(frames), None))
+        except Exception as e:
+            rows.append((source_rel, output_rel, source_bytes, 0, 0, 0, str(e)))
+
+    manifest['entries'] = entries
+    save_manifest(manifest_path, manifest)
+    return rows
+
+
+def gif_fallback_table(root_dir):
+    """
+    Lookup for convert_to_webp.rewrite_references: GIF path -> (GIF path,
+    [(animated WebP path, width)]), so <img src="x.gif"> becomes a <picture>
+    with the WebP source and the GIF as fallback.
+    """
+    manifest = load_manifest(Path(root_dir) / MANIFEST_NAME, MANIFEST_VERSION)
+    table = {}
+    for output_rel, entry in manifest['entries'].items():
+        if entry.get('source'):
+            table[entry['source']] = (entry['source'], [(output_rel, entry['width'])])
+    return table
+
+
+def print_report(rows):
+    for source_rel, output_rel, source_bytes, output_bytes, frames_in, frames_out, error in rows:
+        if error:
+            print(f"  {source_rel} ... FAILED ({error})")
+        elif output_bytes == 0:
+            print(f"  {source_rel} ... SKIPPED (unchanged)")
+        else:
+            reduction = (source_bytes - output_bytes) / source_bytes * 100
+            print(f"  {source_rel} → {output_rel}: {frames_in} → {frames_out} frames, "
+                  f"{source_bytes/1024:.1f}KB → {output_bytes/1024:.1f}KB ({reduction:.1f}% smaller)")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Convert frame sequences and GIFs to animated WebP.")
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1,
+                        help="decoder threads (default: CPU count)")
+    parser.add_argument('--quality', type=int, default=80, help="WebP quality (default: 80)")
+    parser.add_argument('--method', type=int, default=6, choices=range(7), help="WebP effort (default: 6)")
+    parser.add_argument('--lossless', action='store_true', help="encode frames losslessly")
+    parser.add_argument('--frame-duration', type=int, default=DEFAULT_FRAME_DURATION,
+                        help="milliseconds per frame for numbered sequences (default: %(default)s)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    print("Converting animations to WebP...")
+    print("-" * 70)
+    rows = convert_animations(Path.cwd(), max(1, args.workers), args.quality, args.method,
+                              args.lossless, args.frame_duration)
+    print_report(rows)
+    if not rows:
+        print("  No frame sequences or animated GIFs found")
+
+
+if __name__ == '__main__':
+    main()
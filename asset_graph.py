@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Build a site-wide asset reference graph and plan which assets can be pruned.
+
+Every HTML, CSS and JS file is read once and the asset references in it
+(src/href/srcset attributes, CSS url(), quoted paths in scripts) are resolved
+to files in the tree.  Assets are then grouped into byte-identical duplicates
+(size, then SHA-256) and near-identical images (256-bit difference hash, so a
+.jpg, .png and .webp of the same picture land together).  The prune plan
+lists unreferenced duplicates and orphans with the bytes they would reclaim.
+Nothing is deleted.
+"""
+
+import argparse
+import json
+import os
+import posixpath
+import re
+import sys
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+try:
+    from PIL import Image
+except ImportError:
+    print("Error: Pillow library not found.")
+    print("Please install it with: pip install Pillow")
+    sys.exit(1)
+
+import site_index
+from build_utils import sha256_file
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp')
+ASSET_EXTENSIONS = IMAGE_EXTENSIONS + (
+    '.svg', '.ico', '.pdf', '.zip', '.mp4', '.docx', '.doc', '.mw', '.csv', '.ods', '.css', '.js',
+)
+
+# One pattern, one scan per file.  Alternatives: a link-bearing attribute,
+# a CSS url(...), or any quoted string ending in an asset extension (paths
+# built in scripts such as js/nav-loader.js).
+_EXT = '|'.join(re.escape(ext[1:]) for ext in ASSET_EXTENSIONS)
+REFERENCE_PATTERN = re.compile(
+    r'''\b(?:src|href|srcset|poster|data-src)\s*=\s*(?P<q1>["'])(?P<attr>.*?)(?P=q1)'''
+    r'''|url\(\s*(?P<q2>["']?)(?P<url>[^"')]*?)(?P=q2)\s*\)'''
+    r'''|(?P<q3>["'])(?P<lit>[^"'\n<>]*?\.(?:''' + _EXT + r'''))(?P=q3)''',
+    re.IGNORECASE
+)
+
+# Near-identical: at most this many of the 256 dHash bits may differ
+DHASH_SIZE = 16
+DHASH_DISTANCE = 6
+DHASH_BANDS = DHASH_SIZE * DHASH_SIZE // 16
+
+
+def find_text_files(root_dir, index):
+    """HTML, CSS and JS files that may reference assets."""
+    return site_index.files_of_kind(root_dir, index, 'html', 'css', 'js')
+
+
+def find_asset_files(root_dir, index):
+    """All files with an asset extension."""
+    root = Path(root_dir)
+    return [root / rel for rel in index if posixpath.splitext(rel)[1].lower() in ASSET_EXTENSIONS]
+
+
+def extract_references(content):
+    """Yield the raw reference strings found in one file's content."""
+    for match in REFERENCE_PATTERN.finditer(content):
+        if match.group('attr') is not None:
+            value = match.group('attr')
+            if match.group(0).lower().startswith('srcset'):
+                # "a.webp 480w, b.webp 960w" -> each candidate URL
+                for candidate in value.split(','):
+                    if candidate.strip():
+                        yield candidate.split()[0]
+                continue
+            yield value
+        elif match.group('url') is not None:
+            yield match.group('url')
+        else:
+            yield match.group('lit')
+
+
+def resolve_reference(reference, referrer_dir, known):
+    """
+    Resolve a reference to a root-relative posix path in known, or None.
+
+    Paths are tried relative to the referring file first and then to the site
+    root (scripts build page-relative paths that are not relative to the .js).
+    """
+    reference = reference.strip()
+    if not reference or reference.startswith(('data:', 'mailto:', 'javascript:', '#')):
+        return None
+    parts = urlsplit(reference)
+    if parts.scheme or parts.netloc:
+        return None  # external URL
+    path = unquote(parts.path).replace('\\', '/')
+    if not path:
+        return None
+
+    candidates = []
+    if path.startswith('/'):
+        candidates.append(path.lstrip('/'))
+    else:
+        candidates.append(posixpath.join(referrer_dir, path))
+        candidates.append(path)
+    for candidate in candidates:
+        candidate = posixpath.normpath(candidate)
+        if candidate in known:
+            return candidate
+    return None
+
+
+def build_reference_graph(root_dir, text_files, assets):
+    """Map each asset (root-relative posix path) to the set of files referencing it."""
+    root = Path(root_dir)
+    known = {p.relative_to(root).as_posix() for p in assets}
+    referenced_by = defaultdict(set)
+
+    for path in text_files:
+        rel = path.relative_to(root).as_posix()
+        referrer_dir = posixpath.dirname(rel)
+        try:
+            content = path.read_text(encoding='utf-8', errors='ignore')
+        except OSError as e:
+            print(f"Error reading {rel}: {e}")
+            continue
+        for reference in extract_references(content):
+            target = resolve_reference(reference, referrer_dir, known)
+            if target is not None and target != rel:
+                referenced_by[target].add(rel)
+
+    return referenced_by
+
+
+def dhash(path, size=DHASH_SIZE):
+    """size*size-bit difference hash of an image, or None if it cannot be decoded."""
+    try:
+        with Image.open(path) as img:
+            img.draft('L', (size * 4, size * 4))  # cheap DCT-scaled decode for JPEGs
+            img = img.convert('L').resize((size + 1, size), Image.BILINEAR)
+            pixels = img.tobytes()
+    except Exception:
+        return None
+    value = 0
+    for row in range(size):
+        for col in range(size):
+            left = pixels[row * (size + 1) + col]
+            right = pixels[row * (size + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+def find_identical(root_dir, assets, sizes):
+    """Groups of byte-identical assets; only same-size files are hashed."""
+    root = Path(root_dir)
+    by_size = defaultdict(list)
+    for path in assets:
+        by_size[sizes[path]].append(path)
+
+    by_hash = defaultdict(list)
+    for size, paths in by_size.items():
+        if len(paths) < 2 or size == 0:
+            continue
+        for path in paths:
+            by_hash[sha256_file(path)].append(path.relative_to(root).as_posix())
+    return [sorted(group) for group in by_hash.values() if len(group) > 1]
+
+
+def find_near_identical(root_dir, images, workers):
+    """
+    Groups of perceptually near-identical images.
+
+    Hashes are split into 16-bit bands; two hashes within DHASH_DISTANCE
+    bits (fewer than DHASH_BANDS) must agree exactly on at least one band,
+    so only images sharing a band are compared.
+    """
+    root = Path(root_dir)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        hashes = list(executor.map(dhash, images, chunksize=16))
+
+    rels = [p.relative_to(root).as_posix() for p in images]
+    valid = [(rel, h) for rel, h in zip(rels, hashes) if h is not None]
+
+    bands = defaultdict(list)
+    for index, (_, h) in enumerate(valid):
+        for band in range(DHASH_BANDS):
+            bands[(band, (h >> (16 * band)) & 0xFFFF)].append(index)
+
+    # Leader clustering rather than transitive closure, so a slowly changing
+    # frame sequence does not chain into one giant "duplicate" group.
+    group_of = {}
+    groups = []
+    for index, (rel, h) in enumerate(valid):
+        if index in group_of:
+            continue
+        group = [rel]
+        group_of[index] = group
+        for band in range(DHASH_BANDS):
+            for other in bands[(band, (h >> (16 * band)) & 0xFFFF)]:
+                if other not in group_of and bin(h ^ valid[other][1]).count('1') <= DHASH_DISTANCE:
+                    group_of[other] = group
+                    group.append(valid[other][0])
+        if len(group) > 1:
+            groups.append(sorted(group))
+    return groups
+
+
+def _keeper(group, referenced_by):
+    """Pick the member of a duplicate group to keep when none is referenced."""
+    preference = {'.webp': 0, '.jpg': 1, '.jpeg': 1, '.png': 2, '.gif': 3}
+    return min(group, key=lambda rel: (preference.get(posixpath.splitext(rel)[1].lower(), 9), len(rel), rel))
+
+
+def build_prune_plan(assets_rel, sizes_rel, referenced_by, identical, near_identical):
+    """
+    Decide what can go.  Referenced assets are always kept; in a duplicate
+    group with no referenced member, one copy (preferring WebP) is kept.
+    """
+    plan = {}
+
+    def add(rel, reason):
+        if rel not in plan and rel not in referenced_by:
+            plan[rel] = reason
+
+    for kind, groups in (('identical', identical), ('near-identical', near_identical)):
+        for group in groups:
+            keep = [rel for rel in group if rel in referenced_by] or [_keeper(group, referenced_by)]
+            for rel in group:
+                if rel not in keep:
+                    add(rel, f"{kind} copy of {keep[0]}")
+
+    for rel in assets_rel:
+        add(rel, 'unreferenced')
+
+    return [{'path': rel, 'bytes': sizes_rel[rel], 'reason': reason}
+            for rel, reason in sorted(plan.items())]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Report asset references, duplicates and a prune plan.")
+    parser.add_argument('--output', default='asset-prune-plan.json',
+                        help="where to write the JSON report (default: %(default)s)")
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1,
+                        help="processes used for perceptual hashing (default: CPU count)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    root_dir = Path.cwd()
+
+    print("=" * 70)
+    print("Asset Reference Graph")
+    print("=" * 70)
+
+    index = site_index.scan(root_dir)
+    text_files = find_text_files(root_dir, index)
+    assets = find_asset_files(root_dir, index)
+    print(f"Scanning {len(text_files)} HTML/CSS/JS files for references to {len(assets)} assets...")
+
+    referenced_by = build_reference_graph(root_dir, text_files, assets)
+    sizes = {p: index[p.relative_to(root_dir).as_posix()][1] for p in assets}
+    sizes_rel = {p.relative_to(root_dir).as_posix(): size for p, size in sizes.items()}
+    assets_rel = sorted(sizes_rel)
+
+    print("Finding duplicates...")
+    identical = find_identical(root_dir, assets, sizes)
+    images = [p for p in assets if p.suffix.lower() in IMAGE_EXTENSIONS]
+    near_identical = find_near_identical(root_dir, images, max(1, args.workers))
+
+    plan = build_prune_plan(assets_rel, sizes_rel, referenced_by, identical, near_identical)
+    reclaimable = sum(item['bytes'] for item in plan)
+
+    report = {
+        'referenced': {rel: sorted(referrers) for rel, referrers in sorted(referenced_by.items())},
+        'identical': identical,
+        'near_identical': near_identical,
+        'prune_plan': plan,
+        'reclaimable_bytes': reclaimable,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=1)
+
+    total = sum(sizes_rel.values())
+    print()
+    print("=" * 70)
+    print("Summary:")
+    print(f"  Assets: {len(assets_rel)} ({total/1024/1024:.2f} MB)")
+    print(f"  Referenced: {len(referenced_by)}")
+    print(f"  Byte-identical groups: {len(identical)}")
+    print(f"  Near-identical groups: {len(near_identical)}")
+    print(f"  Prune candidates: {len(plan)} ({reclaimable/1024/1024:.2f} MB reclaimable)")
+    print(f"  Report written to {args.output}")
+    print("=" * 70)
+
+
+if __name__ == '__main__':
+    main()
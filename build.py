@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Incremental build driver for the site scripts.
+
+Every stage declares the files it reads and writes.  After a stage runs,
+the content hashes of its inputs and outputs are recorded in
+.build-state.json; on the next build a stage only runs if one of its
+inputs (or its command) changed, or one of its outputs was changed or
+removed behind its back.  Pages a stage only edits in place (migration,
+partials, image references) are declared as rewrites: they order the
+stages but are not hashed, so editing a page by hand reruns only the
+stages that read it; adding or removing a page reruns the stages that
+rewrite it.  Stages that touch disjoint files run concurrently; a stage
+that reads or writes another stage's outputs or rewrites waits for it
+and sees its results.
+
+Usage:
+    python build.py              # run whatever is out of date
+    python build.py --dry-run    # print the stage plan only
+    python build.py blog-index   # consider only the named stages
+    python build.py --force webp # run a stage regardless
+    python build.py --all        # include opt-in stages (animations)
+
+A stage with no record yet whose outputs all exist (built by hand before
+this driver existed) is adopted: its current hashes are recorded and it
+is not run.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+import site_index
+from build_utils import load_manifest, save_manifest, sha256_bytes, sha256_file
+
+STATE_NAME = '.build-state.json'
+STATE_VERSION = 2
+
+PLAN_PAGE = 'blog/2025_11_12_16_week_olympic_triathlon_training_plan.html'
+PAGE_DIRECTORIES = ('', 'courses', 'blog')
+# update_pages_structure.py leaves courses/ alone (see its PAGE_DIRECTORIES)
+MIGRATED_DIRECTORIES = ('', 'blog')
+
+
+# File selectors: each takes the site index and returns root-relative paths.
+
+def files(*names):
+    return lambda index: list(names)
+
+
+def kind(*kinds):
+    return lambda index: [rel for rel, (k, _, _) in index.items() if k in kinds]
+
+
+def pages(index, directories=PAGE_DIRECTORIES):
+    """HTML pages in the root, courses/ and blog/ (what the page stages process)."""
+    return [rel for rel, (k, _, _) in index.items()
+            if k == 'html' and rel.endswith('.html') and os.path.dirname(rel) in directories]
+
+
+def migrated_pages(index):
+    """The pages update_pages_structure.py migrates."""
+    return pages(index, MIGRATED_DIRECTORIES)
+
+
+def published(index):
+    """What publish_site.py copies: everything but dot files and Python scripts."""
+    return [rel for rel, (k, _, _) in index.items()
+            if k != 'python' and not any(part.startswith('.') for part in rel.split('/'))]
+
+
+def webp_siblings(*kinds):
+    def select(index):
+        return [os.path.splitext(rel)[0] + '.webp' for rel, (k, _, _) in index.items() if k in kinds]
+    return select
+
+
+def union(*selectors):
+    return lambda index: sorted({rel for select in selectors for rel in select(index)})
+
+
+class Stage:
+    """
+    A named step: commands (script argv lists, run with this interpreter)
+    run in order, reading inputs, writing outputs and editing rewrites in
+    place.  An opt-in stage only runs when named or with --all.
+    """
+
+    def __init__(self, name, commands, inputs, outputs, description='', rewrites=None, opt_in=False):
+        self.name = name
+        self.commands = commands
+        self.inputs = inputs
+        self.outputs = outputs
+        self.rewrites = rewrites or files()
+        self.description = description
+        self.opt_in = opt_in
+
+    def writes(self, index):
+        return set(self.outputs(index)) | set(self.rewrites(index))
+
+    def command_key(self):
+        return sha256_bytes(repr(self.commands).encode('utf-8'))
+
+
+STAGES = [
+    Stage('triathlon-plan',
+          [['update_triathlon_schedule.py']],
+          files('blog/tri.txt', 'triathlon_plan.py', 'plan_text.py', 'plan_labels.py', 'plan_render.py',
+                'update_triathlon_schedule.py'),
+          files(PLAN_PAGE),
+          "tri.txt -> training plan page"),
+    Stage('blog-index',
+          [['generate_blog_index.py']],
+          files('blog/posts.json', 'generate_blog_index.py'),
+          union(files('blog.html', 'js/nav-loader.js', 'blog/atom.xml'),
+                lambda index: [rel for rel in index if rel.startswith('blog-') and rel.endswith('.html')]),
+          "posts.json -> blog.html, nav post list, Atom feed"),
+    Stage('page-migration',
+          [['update_pages_structure.py']],
+          files('update_pages_structure.py', 'html_transform.py'),
+          files(),
+          "old page layout -> current structure",
+          rewrites=migrated_pages),
+    Stage('partials',
+          [['prerender_partials.py']],
+          files('nav.html', 'footer.html', 'prerender_partials.py'),
+          files(),
+          "nav.html/footer.html -> inlined into pages",
+          rewrites=kind('html')),
+    Stage('webp',
+          [['convert_to_webp.py', '--no-references']],
+          union(files('convert_to_webp.py', 'image_quality.py'), kind('jpeg')),
+          union(files('.webp-manifest.json'), webp_siblings('jpeg')),
+          "*.jpg -> *.webp"),
+    Stage('webp-references',
+          [['convert_to_webp.py', '--references-only']],
+          files('convert_to_webp.py', '.webp-manifest.json'),
+          files(),
+          "page references to converted JPEGs -> their WebPs",
+          rewrites=kind('html')),
+    Stage('animations',
+          [['animated_webp.py']],
+          union(files('animated_webp.py'), kind('gif', 'png')),
+          union(files('.animated-webp-manifest.json'), webp_siblings('gif')),
+          "frame sequences and GIFs -> animated WebP",
+          opt_in=True),
+    Stage('search-index',
+          [['build_search_index.py']],
+          union(files('build_search_index.py', 'blog/posts.json'), pages,
+                lambda index: [rel for rel, (k, _, _) in index.items() if k == 'pdf' and rel.startswith('research/')]),
+          union(files('search/index.json'), lambda index: [rel for rel in index if rel.startswith('search/shards/')]),
+          "pages, posts.json, research/*.pdf -> sharded search index"),
+    Stage('publish',
+          [['publish_site.py']],
+          union(files('publish_site.py', 'minify.py', 'critical_css.py', 'html_transform.py'), published,
+                webp_siblings('jpeg', 'gif')),
+          files('.publish-manifest.json'),
+          "site -> _site/ with minified, content-hashed bundles"),
+    Stage('precompress',
+          [['precompress.py']],
+          files('precompress.py', '.publish-manifest.json'),
+          files('.precompress-manifest.json'),
+          "_site/ text assets -> .gz/.br siblings"),
+]
+
+
+class FileHasher:
+    """Content hashes with a stat-keyed cache, so unchanged files are not re-read."""
+
+    def __init__(self, root, cache):
+        self.root = root
+        self.cache = cache
+
+    def __call__(self, rel):
+        try:
+            stat = os.stat(self.root / rel)
+        except OSError:
+            return None
+        cached = self.cache.get(rel)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+        digest = sha256_file(self.root / rel)
+        self.cache[rel] = [stat.st_size, stat.st_mtime_ns, digest]
+        return digest
+
+
+def dependencies(stages, index):
+    """
+    Map each stage to the earlier stages it must wait for: those whose
+    outputs or rewrites it reads or writes, or which read what it writes.
+    """
+    sets = {stage.name: (set(stage.inputs(index)), stage.writes(index)) for stage in stages}
+    deps = {}
+    for i, stage in enumerate(stages):
+        reads, writes = sets[stage.name]
+        deps[stage.name] = [
+            earlier.name for earlier in stages[:i]
+            if sets[earlier.name][1] & (reads | writes) or sets[earlier.name][0] & writes
+        ]
+    return deps
+
+
+def fingerprint(stage, index, hasher):
+    """
+    (inputs key, {output: hash}) for a stage in the current tree.  The key
+    covers the inputs' contents and the rewrites' names only.
+    """
+    inputs = {rel: hasher(rel) for rel in sorted(stage.inputs(index))}
+    rewrites = sorted(stage.rewrites(index))
+    key = sha256_bytes(repr((stage.command_key(), sorted(inputs.items()), rewrites)).encode('utf-8'))
+    outputs = {rel: hasher(rel) for rel in sorted(stage.outputs(index))}
+    return key, outputs
+
+
+def decide(stage, record, key, outputs, force):
+    """Return (action, reason): action is 'run', 'skip' or 'adopt'."""
+    if force:
+        return 'run', 'forced'
+    if record is None:
+        if outputs and all(digest is not None for digest in outputs.values()):
+            return 'adopt', 'no record, outputs present'
+        return 'run', 'never built'
+    if record['inputs'] != key:
+        return 'run', 'inputs changed'
+    changed = [rel for rel, digest in outputs.items() if record['outputs'].get(rel) != digest]
+    if changed:
+        return 'run', f"{len(changed)} output(s) changed or missing"
+    return 'skip', 'up to date'
+
+
+def run_stage(stage, root):
+    """Run a stage's commands in order; returns (ok, combined output, seconds)."""
+    started = time.perf_counter()
+    log = []
+    for command in stage.commands:
+        result = subprocess.run([sys.executable, *command], cwd=root, capture_output=True, text=True)
+        log.append(result.stdout + result.stderr)
+        if result.returncode != 0:
+            log.append(f"{' '.join(command)} exited with {result.returncode}")
+            return False, ''.join(log), time.perf_counter() - started
+    return True, ''.join(log), time.perf_counter() - started
+
+
+def print_plan(stages, deps, state, index, hasher, force):
+    print("Stage plan:")
+    for stage in stages:
+        key, outputs = fingerprint(stage, index, hasher)
+        action, reason = decide(stage, state['entries'].get(stage.name), key, outputs, force)
+        after = f" (after {', '.join(deps[stage.name])})" if deps[stage.name] else ""
+        print(f"  {stage.name:16s} {action.upper():5s} {reason}{after}")
+        rewrites = len(stage.rewrites(index))
+        print(f"  {'':16s} {stage.description}; {len(stage.inputs(index))} inputs, "
+              f"{len(stage.outputs(index))} outputs" + (f", {rewrites} rewritten" if rewrites else ""))
+    if any(deps.values()):
+        print("  (a waiting stage also runs if an earlier stage changes its inputs)")
+
+
+def build(root, stages, workers, force=False, dry_run=False):
+    """Run the out-of-date stages; returns the names of failed stages."""
+    state_path = root / STATE_NAME
+    state = load_manifest(state_path, STATE_VERSION)
+    hasher = FileHasher(root, state.setdefault('hashes', {}))
+
+    index = site_index.scan(root)
+    deps = dependencies(stages, index)
+    if dry_run:
+        print_plan(stages, deps, state, index, hasher, force)
+        return []
+
+    pending = {stage.name: stage for stage in stages}
+    finished, failed = set(), []
+    running = {}
+
+    def record(stage):
+        key, outputs = fingerprint(stage, site_index.scan(root), hasher)
+        state['entries'][stage.name] = {'inputs': key, 'outputs': outputs}
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        while pending or running:
+            for name, stage in list(pending.items()):
+                if any(dep not in finished and dep not in failed for dep in deps[name]):
+                    continue
+                if any(dep in failed for dep in deps[name]):
+                    del pending[name]
+                    failed.append(name)
+                    print(f"[{name}] NOT RUN (depends on a failed stage)")
+                    continue
+                del pending[name]
+                # Decided only now, so it sees what earlier stages wrote
+                key, outputs = fingerprint(stage, site_index.scan(root), hasher)
+                action, reason = decide(stage, state['entries'].get(name), key, outputs, force)
+                if action == 'skip':
+                    print(f"[{name}] skipped ({reason})")
+                    finished.add(name)
+                elif action == 'adopt':
+                    state['entries'][name] = {'inputs': key, 'outputs': outputs}
+                    print(f"[{name}] adopted ({reason})")
+                    finished.add(name)
+                else:
+                    print(f"[{name}] running ({reason})...")
+                    running[executor.submit(run_stage, stage, root)] = stage
+
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                name = stage.name
+                ok, log, seconds = future.result()
+                for line in log.splitlines():
+                    print(f"[{name}] {line}")
+                if ok:
+                    record(stage)
+                    finished.add(name)
+                    print(f"[{name}] done in {seconds:.1f}s")
+                else:
+                    failed.append(name)
+                    print(f"[{name}] FAILED after {seconds:.1f}s")
+
+    save_manifest(state_path, state)
+    return failed
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild the out-of-date parts of the site.")
+    parser.add_argument('stages', nargs='*', help="stages to consider (default: all)")
+    parser.add_argument('--dry-run', action='store_true', help="print the stage plan without running anything")
+    parser.add_argument('--force', action='store_true', help="run the selected stages even if up to date")
+    parser.add_argument('--all', action='store_true',
+                        help="include opt-in stages (%s) when no stages are named"
+                             % ', '.join(stage.name for stage in STAGES if stage.opt_in))
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help="stages run concurrently at most (default: CPU count)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    names = [stage.name for stage in STAGES]
+    unknown = [name for name in args.stages if name not in names]
+    if unknown:
+        print(f"Unknown stage(s): {', '.join(unknown)}; available: {', '.join(names)}")
+        sys.exit(2)
+
+    if args.stages:
+        stages = [stage for stage in STAGES if stage.name in args.stages]
+    else:
+        stages = [stage for stage in STAGES if args.all or not stage.opt_in]
+    failed = build(Path.cwd(), stages, args.jobs, args.force, args.dry_run)
+    if failed:
+        print(f"Failed: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Build the client-side search index.
+
+The text of the site's pages (the root pages, courses/ and blog/), the
+titles of the papers in research/*.pdf and the blog metadata in
+blog/posts.json are tokenized into an inverted index: term -> documents
+with a score (occurrences, title words counting TITLE_WEIGHT times).
+
+The index is written as small JSON shards keyed by term prefix, so the
+browser (js/search.js) only fetches the shards for the words typed:
+
+    search/index.json        shard keys, stop words and the document list
+    search/shards/<key>.json {term: [doc, score, doc, score, ...]}
+
+Shards hold consecutive terms in sorted order, about SHARD_BYTES each,
+and are named by the shortest prefix of their first term that sorts
+after the previous shard; a term is in the shard with the last key that
+sorts before it.  Files are only written when their content changes, and
+shards that are no longer needed are removed.
+"""
+
+import argparse
+import json
+import posixpath
+import re
+import unicodedata
+from html.parser import HTMLParser
+from pathlib import Path
+
+import site_index
+from build_utils import atomic_write_bytes
+from generate_blog_index import load_posts
+from prerender_partials import PARTIALS
+
+OUTPUT_DIR = 'search'
+INDEX_FILE = 'search/index.json'
+SHARD_DIR = 'search/shards'
+INDEX_VERSION = 1
+
+PAGE_DIRECTORIES = ('', 'courses', 'blog')
+SEARCH_PAGE = 'search.html'
+PAPER_DIRECTORY = 'research'
+
+SHARD_BYTES = 2048
+TITLE_WEIGHT = 5
+SUMMARY_LENGTH = 160
+
+# Elements whose text is the same on every page, or not text at all
+SKIP_ELEMENTS = ('script', 'style', 'noscript', 'nav', 'header', 'footer')
+
+STOP_WORDS = frozenset('''
+a an and are as at be but by for from has have he her his i if in into is it
+its me my of on or our she so than that the their them then there these they
+this to was we were what when where which who will with you your
+'''.split())
+
+TITLE_PREFIX = 'Keivan Monfared - '
+# Titles (and headings) shared by many of the older pages; the first other
+# heading names the page instead
+GENERIC_TITLES = ("Keivan Hassani Monfared's Home Page", 'Homepage')
+HEADINGS = ('h1', 'h2', 'h3')
+
+
+def tokenize(text):
+    """Lowercase ASCII-folded words of at least two characters, minus stop words."""
+    folded = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii').lower()
+    return [word for word in re.findall(r'[a-z0-9]+', folded) if len(word) > 1 and word not in STOP_WORDS]
+
+
+class _TextExtractor(HTMLParser):
+    """Collects a page's <title>, headings and visible body text."""
+
+    def __init__(self):
+        super().__init__()
+        self.title = []
+        self.headings = []
+        self.text = []
+        self._skip = 0
+        self._in_title = False
+        self._heading = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_ELEMENTS:
+            self._skip += 1
+        elif tag == 'title':
+            self._in_title = True
+        elif tag in HEADINGS and not self._skip:
+            self._heading = []
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_ELEMENTS:
+            self._skip = max(0, self._skip - 1)
+        elif tag == 'title':
+            self._in_title = False
+        elif tag in HEADINGS and self._heading is not None:
+            self.headings.append(' '.join(''.join(self._heading).split()))
+            self._heading = None
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title.append(data)
+        elif not self._skip:
+            self.text.append(data)
+            if self._heading is not None:
+                self._heading.append(data)
+
+
+def page_document(path):
+    """(title, text) of an HTML page."""
+    parser = _TextExtractor()
+    parser.feed(path.read_text(encoding='utf-8', errors='ignore'))
+    parser.close()
+    title = ' '.join(''.join(parser.title).split())
+    if title.startswith(TITLE_PREFIX):
+        title = title[len(TITLE_PREFIX):]
+    if not title or title in GENERIC_TITLES:
+        title = next((heading for heading in parser.headings if heading and heading not in GENERIC_TITLES), title)
+    return title, ' '.join(' '.join(parser.text).split())
+
+
+def paper_title(filename):
+    """research/2016_Spectral_characterization_of_matchings_in_graphs.pdf -> its title."""
+    stem = posixpath.splitext(posixpath.basename(filename))[0]
+    return re.sub(r'^\d{4,8}_', '', stem).replace('_', ' ')
+
+
+def collect_documents(root_dir, index=None):
+    """
+    [(url, title, summary, text)] for everything searchable, in a stable
+    order (the document ids in the index).
+    """
+    root = Path(root_dir)
+    if index is None:
+        index = site_index.scan(root)
+    posts = {f"blog/{post['filename']}": post for post in load_posts(root)}
+
+    documents = []
+    for rel, (kind, _, _) in index.items():
+        directory = posixpath.dirname(rel)
+        name = posixpath.basename(rel)
+        if kind == 'html' and name.endswith('.html') and directory in PAGE_DIRECTORIES \
+                and rel not in PARTIALS.values() and rel != SEARCH_PAGE and not name.startswith('_'):
+            title, text = page_document(root / rel)
+            post = posts.get(rel)
+            if post:
+                title = post['title']
+                summary = post.get('description', '')
+                text = f"{summary} {post['date']} {text}"
+            else:
+                summary = text[:SUMMARY_LENGTH].rsplit(' ', 1)[0] if len(text) > SUMMARY_LENGTH else text
+            documents.append((rel, title or rel, summary, text))
+        elif kind == 'pdf' and directory == PAPER_DIRECTORY:
+            title = paper_title(rel)
+            year = re.match(r'\d{4}', name)
+            documents.append((rel, title, f"Paper ({year.group(0)})" if year else "Paper", ''))
+    return documents
+
+
+def build_postings(documents):
+    """{term: [doc, score, doc, score, ...]} with documents in id order."""
+    postings = {}
+    for doc_id, (_, title, _, text) in enumerate(documents):
+        scores = {}
+        for word in tokenize(title):
+            scores[word] = scores.get(word, 0) + TITLE_WEIGHT
+        for word in tokenize(text):
+            scores[word] = scores.get(word, 0) + 1
+        for word, score in scores.items():
+            postings.setdefault(word, []).extend((doc_id, score))
+    return dict(sorted(postings.items()))
+
+
+def _dumps(value):
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False)
+
+
+def _shard_key(first, previous):
+    """Shortest prefix of first that still sorts after previous (the last term of the shard before)."""
+    for length in range(1, len(first) + 1):
+        if first[:length] > previous:
+            return first[:length]
+    return first
+
+
+def shard(postings, max_bytes=SHARD_BYTES):
+    """
+    Split sorted postings into {key: {term: postings}} shards of consecutive
+    terms of about max_bytes each.  A shard's key is a prefix of its first
+    term, and a term is in the shard with the last key <= the term.
+    """
+    shards = {}
+    current, size, previous = {}, 0, ''
+    for term, docs in postings.items():
+        entry = len(_dumps(term)) + len(_dumps(docs)) + 2
+        if current and size + entry > max_bytes:
+            last = next(reversed(current))
+            shards[_shard_key(next(iter(current)), previous)] = current
+            current, size, previous = {}, 0, last
+        current[term] = docs
+        size += entry
+    if current:
+        shards[_shard_key(next(iter(current)), previous)] = current
+    return shards
+
+
+def _write_if_changed(path, text):
+    data = text.encode('utf-8')
+    if path.exists() and path.read_bytes() == data:
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    atomic_write_bytes(path, data)
+    return True
+
+
+def build_index(root_dir):
+    """
+    Write the index and its shards.  Returns (documents,
+    [(file, bytes, terms, status)]) with status 'written', 'unchanged' or
+    'removed'.
+    """
+    root = Path(root_dir)
+    documents = collect_documents(root)
+    shards = shard(build_postings(documents))
+
+    report = []
+    for key, terms in shards.items():
+        name = f"{SHARD_DIR}/{key}.json"
+        text = _dumps(terms) + '\n'
+        status = 'written' if _write_if_changed(root / name, text) else 'unchanged'
+        report.append((name, len(text.encode('utf-8')), len(terms), status))
+
+    index = {
+        'version': INDEX_VERSION,
+        'shards': list(shards),
+        'stop': sorted(STOP_WORDS),
+        'docs': [[url, title, summary] for url, title, summary, _ in documents],
+    }
+    text = _dumps(index) + '\n'
+    status = 'written' if _write_if_changed(root / INDEX_FILE, text) else 'unchanged'
+    report.insert(0, (INDEX_FILE, len(text.encode('utf-8')), None, status))
+
+    shard_dir = root / SHARD_DIR
+    for path in sorted(shard_dir.glob('*.json')):
+        if path.stem not in shards:
+            path.unlink()
+            report.append((f"{SHARD_DIR}/{path.name}", 0, None, 'removed'))
+    return documents, report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build the sharded client-side search index.")
+    parser.add_argument('-v', '--verbose', action='store_true', help="list every shard, not just the summary")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    documents, report = build_index(Path.cwd())
+
+    shards = [row for row in report if row[2] is not None]
+    sizes = sorted(size for _, size, _, _ in shards)
+    print(f"Indexed {len(documents)} documents into {len(shards)} shards "
+          f"({sum(terms for _, _, terms, _ in shards)} terms)")
+    print("-" * 70)
+    for name, size, terms, status in report:
+        if args.verbose or terms is None or status != 'unchanged':
+            count = f"{terms:5d} terms" if terms is not None else ' ' * 11
+            print(f"  {name:32s} {size/1024:7.1f}KB {count}  {status}")
+    if sizes:
+        print("-" * 70)
+        print(f"  Shard size: min {sizes[0]/1024:.1f}KB, median {sizes[len(sizes) // 2]/1024:.1f}KB, "
+              f"max {sizes[-1]/1024:.1f}KB, total {sum(sizes)/1024:.1f}KB")
+
+
+if __name__ == '__main__':
+    main()
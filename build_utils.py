@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Small helpers shared by the site maintenance scripts: content hashing,
+atomic file writes, JSON manifests that survive crashes and fresh
+checkouts, and peak memory measurement.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+
+def sha256_file(path, chunk_size=1024 * 1024):
+    """Return the hex SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def sha256_bytes(data):
+    """Return the hex SHA-256 of a bytes object."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def _default_mode(path):
+    """Permissions for a replaced file: keep the old ones, else honour the umask."""
+    try:
+        return os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+@contextmanager
+def atomic_open(path, mode='w', encoding='utf-8'):
+    """
+    Open a temp file next to path for writing; it replaces path when the
+    block exits normally and is removed if it raises, so readers never
+    see a partly written file.
+    """
+    path = Path(path)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, mode, encoding=None if 'b' in mode else encoding) as f:
+            yield f
+        os.chmod(tmp_name, _default_mode(path))
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def atomic_write_bytes(path, data):
+    """Write data to path via a temp file in the same directory + rename."""
+    with atomic_open(path, 'wb') as f:
+        f.write(data)
+
+
+def load_manifest(path, version=1):
+    """Load a JSON manifest, returning an empty one if missing, corrupt or outdated."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {'version': version, 'entries': {}}
+
+    if manifest.get('version') != version or not isinstance(manifest.get('entries'), dict):
+        return {'version': version, 'entries': {}}
+    return manifest
+
+
+def save_manifest(path, manifest):
+    """Atomically write a JSON manifest with stable key order (diff-friendly)."""
+    text = json.dumps(manifest, indent=1, sort_keys=True, ensure_ascii=False) + '\n'
+    atomic_write_bytes(path, text.encode('utf-8'))
+
+
+def reset_peak_rss():
+    """
+    Reset this process's peak RSS counter so the next peak_rss() covers only
+    the work done after this call.  Only Linux supports this (clear_refs);
+    returns False where the peak cannot be reset.
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss():
+    """Peak resident set size of this process in bytes, or None if unknown."""
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return maxrss if sys.platform == 'darwin' else maxrss * 1024
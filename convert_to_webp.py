@@ -2,12 +2,22 @@
 """
 Convert all JPEG images to WebP format and update HTML references.
 WebP typically reduces file size by 25-35% while maintaining quality.
+With --responsive, width variants are generated as well and <img> tags are
+rewritten to <picture>/srcset with the original JPEG as fallback.
 """
 
+import argparse
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import re
+import urllib.parse
+
+from build_utils import load_manifest, peak_rss, reset_peak_rss, save_manifest, sha256_file
+import site_index
+from image_quality import parse_size, search_quality
+from animated_webp import convert_animations, gif_fallback_table, print_report as print_animation_report
 
 try:
     from PIL import Image
@@ -17,125 +27,490 @@ except ImportError:
     sys.exit(1)
 
 
-def convert_image_to_webp(jpeg_path, quality=90):
+# Conversion manifest: records, per source image (by root-relative path), the
+# content hash and the encoder settings its WebP was produced with, so later
+# runs skip unchanged images by content rather than mtime.  It is local state
+# (listed in .gitignore), so a cold checkout has no records and re-encodes
+# every image once; only runs after that skip unchanged work.
+MANIFEST_NAME = '.webp-manifest.json'
+MANIFEST_VERSION = 1
+
+
+# Width buckets for responsive variants (only those narrower than the source)
+DEFAULT_VARIANT_WIDTHS = (480, 960, 1600)
+
+
+def encoder_settings(quality=90, method=6, widths=(), target_bytes=None, min_ssim=None, max_dimension=None):
+    """Identify everything that affects the encoded bytes of one image."""
+    # Alpha / palette images are flattened onto white before encoding
+    if target_bytes is None and min_ssim is None:
+        settings = f"webp:q{quality}:m{method}:flatten-white"
+    else:
+        # Quality is searched per image (and cached in the entry)
+        settings = f"webp:budget{target_bytes}:ssim{min_ssim}:m{method}:flatten-white"
+    if max_dimension:
+        settings += f":max{max_dimension}"
+    if widths:
+        settings += ":w" + ",".join(str(w) for w in sorted(widths))
+    return settings
+
+
+def variant_path(webp_path, width):
+    """Path of the width-bucket variant of a WebP, e.g. photo-480w.webp."""
+    return webp_path.with_name(f"{webp_path.stem}-{width}w.webp")
+
+
+def _outputs_intact(webp_path, entry):
+    """Check the recorded outputs of a manifest entry still exist unchanged."""
+    if not webp_path.exists() or webp_path.stat().st_size != entry.get('output_size'):
+        return False
+    return all(variant_path(webp_path, int(width)).exists() for width in entry.get('variants', {}))
+
+
+def decode_bounded(img, max_dimension=None):
+    """
+    Decode an opened image as RGB, at most max_dimension pixels on its long side.
+
+    JPEGs are decoded in draft mode: libjpeg scales the DCT by 1/2, 1/4 or
+    1/8 while decoding, so the full-resolution bitmap is never allocated.
+    The remaining reduction happens before alpha/palette images are
+    flattened onto white, so the background canvas is only output-sized.
+    """
+    target = None
+    if max_dimension and max(img.size) > max_dimension:
+        scale = max_dimension / max(img.size)
+        target = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+        if img.format == 'JPEG':
+            img.draft(img.mode, target)
+
+    if img.mode == 'P':
+        img = img.convert('RGBA')
+    if target is not None and img.size != target:
+        img = img.resize(target, Image.LANCZOS)
+
+    # Convert RGBA to RGB if necessary
+    if img.mode in ('RGBA', 'LA'):
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.split()[-1])
+        img = background
+    return img
+
+
+def _encode_webp(jpeg_path, options, entry=None):
+    """
+    Encode a JPEG image as WebP, raising on failure.
+
+    options holds quality, method, widths (responsive variant buckets) and
+    optionally target_bytes / min_ssim, in which case the quality is searched
+    per image (see image_quality.search_quality) and reused from the entry
+    while the source is unchanged, and max_dimension (see decode_bounded).
+    Returns (webp_path, jpeg_size, webp_size, new_entry).  Sizes are 0 when
+    the manifest entry shows the existing WebP is already up to date.
+    """
+    quality = options.get('quality', 90)
+    method = options.get('method', 6)
+    widths = tuple(options.get('widths', ()))
+    target_bytes = options.get('target_bytes')
+    min_ssim = options.get('min_ssim')
+    max_dimension = options.get('max_dimension')
+    searched = target_bytes is not None or min_ssim is not None
+
+    webp_path = jpeg_path.with_suffix('.webp')
+    settings = encoder_settings(quality, method, widths, target_bytes, min_ssim, max_dimension)
+    source_hash = sha256_file(jpeg_path)
+
+    new_entry = {
+        'source_sha256': source_hash,
+        'settings': settings,
+        'output': webp_path.name,
+    }
+
+    # Skip if the source bytes and encoder settings are unchanged.  Without a
+    # record nothing says how an existing WebP was encoded, so it is redone.
+    if (entry is not None and entry.get('source_sha256') == source_hash and entry.get('settings') == settings
+            and _outputs_intact(webp_path, entry)):
+        return webp_path, 0, 0, entry
+
+    # Open and convert image
+    with Image.open(jpeg_path) as img:
+        img = decode_bounded(img, max_dimension)
+
+        data = None
+        if searched:
+            if (entry is not None and entry.get('source_sha256') == source_hash
+                    and entry.get('settings') == settings and 'quality' in entry):
+                quality = entry['quality']
+            else:
+                quality, data, _ = search_quality(img.convert('RGB'), 'WebP', target_bytes, min_ssim, method)
+            new_entry['quality'] = quality
+
+        # Save as WebP (the search already holds the encoded bytes)
+        if data is not None:
+            webp_path.write_bytes(data)
+        else:
+            img.save(webp_path, 'WebP', quality=quality, method=method)
+        new_entry['width'], new_entry['height'] = img.size
+
+        # Downscaled variants for srcset, one per width bucket
+        variants = {}
+        for width in sorted(widths):
+            if width >= img.width:
+                continue
+            height = max(1, round(img.height * width / img.width))
+            out_path = variant_path(webp_path, width)
+            img.resize((width, height), Image.LANCZOS).save(out_path, 'WebP', quality=quality, method=method)
+            variants[str(width)] = out_path.stat().st_size
+        if variants:
+            new_entry['variants'] = variants
+
+    # Get file sizes
+    jpeg_size = jpeg_path.stat().st_size
+    webp_size = webp_path.stat().st_size
+    new_entry['output_size'] = webp_size
+
+    return webp_path, jpeg_size, webp_size, new_entry
+
+
+def convert_image_to_webp(jpeg_path, quality=90, method=6, entry=None):
     """Convert a JPEG image to WebP format."""
     try:
-        webp_path = jpeg_path.with_suffix('.webp')
-
-        # Skip if WebP already exists and is newer
-        if webp_path.exists() and webp_path.stat().st_mtime > jpeg_path.stat().st_mtime:
-            return webp_path, 0, 0
-
-        # Open and convert image
-        with Image.open(jpeg_path) as img:
-            # Convert RGBA to RGB if necessary
-            if img.mode in ('RGBA', 'LA', 'P'):
-                background = Image.new('RGB', img.size, (255, 255, 255))
-                if img.mode == 'P':
-                    img = img.convert('RGBA')
-                background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
-                img = background
-
-            # Save as WebP
-            img.save(webp_path, 'WebP', quality=quality, method=6)
-
-        # Get file sizes
-        jpeg_size = jpeg_path.stat().st_size
-        webp_size = webp_path.stat().st_size
-
+        webp_path, jpeg_size, webp_size, _ = _encode_webp(
+            jpeg_path, {'quality': quality, 'method': method}, entry)
         return webp_path, jpeg_size, webp_size
-
     except Exception as e:
         print(f"Error converting {jpeg_path}: {e}")
         return None, 0, 0
 
 
-def find_jpeg_files(root_dir):
-    """Find all JPEG files in the directory."""
-    root = Path(root_dir)
-    jpeg_files = []
+def _convert_task(jpeg_path, options, entry):
+    """
+    Process-pool entry point: never raises, returns the error text instead.
 
-    for ext in ['*.jpg', '*.jpeg', '*.JPG', '*.JPEG']:
-        jpeg_files.extend(root.rglob(ext))
+    The last item is the peak RSS in bytes while converting this image (on
+    platforms that cannot reset the counter, the process peak so far).
+    """
+    reset_peak_rss()
+    try:
+        webp_path, jpeg_size, webp_size, new_entry = _encode_webp(jpeg_path, options, entry)
+        return webp_path, jpeg_size, webp_size, None, new_entry, peak_rss()
+    except Exception as e:
+        return None, 0, 0, str(e), None, peak_rss()
 
-    return sorted(jpeg_files)
 
+def convert_all(jpeg_files, workers=1, entries=None, **options):
+    """
+    Convert JPEG files to WebP, yielding (jpeg_path, webp_path, jpeg_size,
+    webp_size, error, new_entry, peak_rss) in input order.
 
-def find_html_files(root_dir):
-    """Find all HTML files in the directory."""
-    root = Path(root_dir)
-    return sorted(root.rglob('*.html'))
+    entries maps each jpeg_path to its previous manifest entry (or None);
+    options are passed to the encoder (quality, method, widths, ...).
 
+    With workers > 1 the files are hashed and encoded in a process pool;
+    results are still yielded in input order so progress output is
+    deterministic.  A file whose worker raised or died is yielded with
+    webp_path None and the error text, so failures are always reported
+    rather than dropped.
+    """
+    entries = entries or {}
 
-def replace_references_in_file(html_path, replacements):
-    """Replace JPEG references with WebP in an HTML file."""
+    if workers <= 1:
+        for jpeg_path in jpeg_files:
+            yield (jpeg_path, *_convert_task(jpeg_path, options, entries.get(jpeg_path)))
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_convert_task, jpeg_path, options, entries.get(jpeg_path))
+                   for jpeg_path in jpeg_files]
+        for jpeg_path, future in zip(jpeg_files, futures):
+            try:
+                yield (jpeg_path, *future.result())
+            except Exception as e:
+                # Worker process crashed (e.g. killed for running out of memory)
+                yield jpeg_path, None, 0, 0, f"worker failed: {e!r}", None, None
+
+
+def find_jpeg_files(root_dir, index=None):
+    """Find all JPEG files in the directory (index: a site_index.scan result to reuse)."""
+    if index is None:
+        index = site_index.scan(root_dir)
+    return site_index.files_of_kind(root_dir, index, 'jpeg')
+
+
+def find_html_files(root_dir, index=None):
+    """Find all HTML files in the directory (index: a site_index.scan result to reuse)."""
+    if index is None:
+        index = site_index.scan(root_dir)
+    return site_index.files_of_kind(root_dir, index, 'html')
+
+
+# One scan per file: every token that ends in a JPEG extension is a candidate
+# reference.  Candidates start only at a token boundary (quote, whitespace,
+# parenthesis, '=' ...), and the lazy body stops at the first extension, so
+# the scan is linear in the file size regardless of how many images exist.
+JPEG_REFERENCE_PATTERN = re.compile(
+    r'''(?<![^\s"'()<>=,;])[^\s"'()<>=,;]+?\.jpe?g(?![\w])''',
+    re.IGNORECASE
+)
+RELATIVE_PREFIX_PATTERN = re.compile(r'(?:\.\.?/)*')
+
+# Responsive mode scans for <img> tags in the same pass; existing <picture>
+# blocks (e.g. from a previous run) are passed through untouched so their
+# JPEG fallbacks are never rewritten.
+HTML_REWRITE_PATTERN = re.compile(
+    r'(?P<picture><picture\b.*?</picture>)|(?P<img><img\b[^>]*>)|(?P<ref>' + JPEG_REFERENCE_PATTERN.pattern + ')',
+    re.IGNORECASE | re.DOTALL
+)
+IMG_SRC_PATTERN = re.compile(r'''(\bsrc\s*=\s*)(["'])(.*?)\2''', re.IGNORECASE | re.DOTALL)
+
+
+def _lookup_reference(reference, table):
+    """
+    Find the key of table that a reference points to.
+
+    URLs with a scheme or host point at other sites and never match.  A
+    root-absolute path ('/images/x.jpg') is looked up without its slash.
+    For a page-relative path, a leading './' or '../' chain is kept as-is
+    and the remaining path is looked up; failing that, the longest trailing
+    path suffix that is a known image is used.  Returns (head, key) where
+    head is the part of the reference before the key, or None if nothing
+    matches.
+    """
+    parts = urllib.parse.urlsplit(reference)
+    if parts.scheme or parts.netloc:
+        return None
+    if reference.startswith('/'):
+        return ('/', reference[1:]) if reference[1:] in table else None
+
+    prefix = RELATIVE_PREFIX_PATTERN.match(reference).group()
+    path = reference[len(prefix):]
+
+    if path in table:
+        return prefix, path
+
+    start = path.find('/')
+    while start != -1:
+        if path[start + 1:] in table:
+            return prefix + path[:start + 1], path[start + 1:]
+        start = path.find('/', start + 1)
+
+    return None
+
+
+def _resolve_reference(reference, replacements):
+    """Map one candidate reference to its replacement, or None."""
+    found = _lookup_reference(reference, replacements)
+    if found is None:
+        return None
+    head, key = found
+    return head + replacements[key]
+
+
+def build_responsive_table(entries):
+    """
+    Build the lookup used to turn <img> tags into <picture> elements.
+
+    Keyed by both the JPEG path and its full-size WebP path (pages that were
+    already converted reference the latter); each value is the original JPEG
+    path and the srcset candidates as (path, width) pairs, widest last.
+    """
+    table = {}
+    for jpeg_rel, entry in entries.items():
+        if not entry.get('variants') or 'width' not in entry:
+            continue
+        webp_rel = Path(jpeg_rel).with_suffix('.webp')
+        candidates = [(variant_path(webp_rel, int(width)).as_posix(), int(width))
+                      for width in sorted(entry['variants'], key=int)]
+        candidates.append((webp_rel.as_posix(), entry['width']))
+        table[jpeg_rel] = table[webp_rel.as_posix()] = (jpeg_rel, candidates)
+    return table
+
+
+def localize_tables(replacements, responsive, base):
+    """
+    Add page-relative keys for pages in the subdirectory base.
+
+    The tables are keyed by root-relative paths, which covers root pages and
+    '../' references from subdirectories; a page in blog/ referring to
+    'images/x.gif' means blog/images/x.gif, so entries under base/ are added
+    again with that prefix stripped from keys and values.
+    """
+    prefix = base.rstrip('/') + '/'
+
+    def strip(path):
+        return path[len(prefix):] if path.startswith(prefix) else path
+
+    local_replacements = dict(replacements)
+    for key, value in replacements.items():
+        if key.startswith(prefix):
+            local_replacements[strip(key)] = strip(value)
+
+    local_responsive = dict(responsive)
+    for key, (source_rel, candidates) in responsive.items():
+        if key.startswith(prefix):
+            local_responsive[strip(key)] = (strip(source_rel), [(strip(path), width) for path, width in candidates])
+
+    return local_replacements, local_responsive
+
+
+def _picture_for_img(img_tag, responsive, sizes):
+    """Wrap an <img> in a WebP <picture>, or return None if it has no variants."""
+    src_match = IMG_SRC_PATTERN.search(img_tag)
+    if not src_match:
+        return None
+    found = _lookup_reference(src_match.group(3), responsive)
+    if found is None:
+        return None
+
+    head, key = found
+    jpeg_rel, candidates = responsive[key]
+    if len(candidates) == 1:
+        source = f'<source type="image/webp" srcset="{head}{candidates[0][0]}">'
+    else:
+        srcset = ", ".join(f"{head}{path} {width}w" for path, width in candidates)
+        source = f'<source type="image/webp" srcset="{srcset}" sizes="{sizes}">'
+
+    # The <img> keeps the original JPEG (or GIF) as the fallback for non-WebP browsers
+    fallback = (img_tag[:src_match.start(3)] + head + jpeg_rel + img_tag[src_match.end(3):])
+    return f'<picture>{source}{fallback}</picture>'
+
+
+def rewrite_references(content, replacements, responsive=None, sizes='100vw'):
+    """
+    Rewrite all JPEG references in content in a single pass.
+
+    With a responsive table (see build_responsive_table), <img> tags whose
+    source has width variants become <picture> elements with a WebP srcset
+    and the JPEG as fallback; every other reference is replaced as usual.
+
+    Returns (new_content, counts) where counts maps each reference string as
+    it appeared in the document to the number of occurrences replaced.
+    """
+    counts = {}
+
+    def substitute_reference(match):
+        reference = match.group()
+        replacement = _resolve_reference(reference, replacements)
+        if replacement is None:
+            return reference
+        counts[reference] = counts.get(reference, 0) + 1
+        return replacement
+
+    if not responsive:
+        return JPEG_REFERENCE_PATTERN.sub(substitute_reference, content), counts
+
+    def substitute(match):
+        if match.group('picture'):
+            return match.group()
+        if match.group('img'):
+            img_tag = match.group()
+            picture = _picture_for_img(img_tag, responsive, sizes)
+            if picture is None:
+                return JPEG_REFERENCE_PATTERN.sub(substitute_reference, img_tag)
+            key = '<picture> ' + IMG_SRC_PATTERN.search(img_tag).group(3)
+            counts[key] = counts.get(key, 0) + 1
+            return picture
+        return substitute_reference(match)
+
+    return HTML_REWRITE_PATTERN.sub(substitute, content), counts
+
+
+def replace_references_in_file(html_path, replacements, responsive=None, sizes='100vw'):
+    """
+    Replace JPEG references with WebP in an HTML file.
+
+    Returns a dict of {reference: occurrences replaced} (empty if unchanged).
+    """
     try:
         with open(html_path, 'r', encoding='utf-8', errors='ignore') as f:
             content = f.read()
 
-        original_content = content
-        changes_made = []
-
-        for jpeg_rel, webp_rel in replacements.items():
-            # Try different path variations
-            patterns = [
-                jpeg_rel,
-                jpeg_rel.replace('\\', '/'),
-                './' + jpeg_rel,
-                '../' + jpeg_rel,
-            ]
-
-            for pattern in patterns:
-                if pattern in content:
-                    content = content.replace(pattern, webp_rel)
-                    if pattern not in changes_made:
-                        changes_made.append(pattern)
+        new_content, counts = rewrite_references(content, replacements, responsive, sizes)
 
         # Only write if changes were made
-        if content != original_content:
+        if new_content != content:
             with open(html_path, 'w', encoding='utf-8') as f:
-                f.write(content)
-            return len(changes_made)
+                f.write(new_content)
 
-        return 0
+        return counts
 
     except Exception as e:
         print(f"Error processing {html_path}: {e}")
-        return 0
-
-
-def main():
-    root_dir = Path.cwd()
-
-    print("=" * 70)
-    print("JPEG to WebP Converter")
-    print("=" * 70)
-    print()
-
-    # Find all JPEG files
-    print("Scanning for JPEG files...")
-    jpeg_files = find_jpeg_files(root_dir)
-    print(f"Found {len(jpeg_files)} JPEG files")
-    print()
-
-    if not jpeg_files:
-        print("No JPEG files found!")
-        return
-
-    # Convert images
-    print("Converting images to WebP...")
+        return {}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Convert JPEG images to WebP and update HTML references.")
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1,
+                        help="number of encoder processes (default: CPU count, 1 = no pool)")
+    parser.add_argument('--quality', type=int, default=90,
+                        help="WebP quality 0-100 (default: 90)")
+    parser.add_argument('--method', type=int, default=6, choices=range(7),
+                        help="WebP encoder effort 0 (fast) - 6 (smallest, slowest) (default: 6)")
+    parser.add_argument('--target-bytes', type=parse_size,
+                        help="search each image's quality to fit this byte budget, e.g. 200k")
+    parser.add_argument('--min-ssim', type=float,
+                        help="search each image's lowest quality reaching this SSIM (needs NumPy)")
+    parser.add_argument('--max-dimension', type=int,
+                        help="downscale images to at most this many pixels on the long side, "
+                             "decoding large JPEGs at reduced size to bound memory")
+    parser.add_argument('--responsive', action='store_true',
+                        help="also emit width variants and rewrite <img> tags to <picture>/srcset")
+    parser.add_argument('--widths', default=",".join(str(w) for w in DEFAULT_VARIANT_WIDTHS),
+                        help="comma-separated variant widths in pixels for --responsive "
+                             "(default: %(default)s)")
+    parser.add_argument('--animations', action='store_true',
+                        help="also convert frame sequences and GIFs to animated WebP "
+                             "(see animated_webp.py) and wrap GIF <img> tags in <picture>")
+    stage = parser.add_mutually_exclusive_group()
+    stage.add_argument('--no-references', action='store_true',
+                       help="only convert images; leave the HTML alone")
+    stage.add_argument('--references-only', action='store_true',
+                       help="only rewrite HTML references, to the WebPs recorded in the manifest")
+    parser.add_argument('--sizes', default='100vw',
+                        help="sizes attribute for generated <source> tags (default: %(default)s)")
+    return parser.parse_args(argv)
+
+
+def convert_images(root_dir, jpeg_files, args):
+    """
+    Convert jpeg_files (and, with --animations, the animations) and update
+    the manifest; returns ({jpeg rel: webp rel} for every image with a WebP,
+    the new manifest entries).
+    """
+    workers = max(1, min(args.workers, len(jpeg_files) or args.workers))
+    print(f"Converting images to WebP ({workers} worker{'s' if workers != 1 else ''})...")
     print("-" * 70)
 
     conversions = {}
     total_jpeg_size = 0
     total_webp_size = 0
     successful_conversions = 0
-
-    for i, jpeg_path in enumerate(jpeg_files, 1):
+    failed = []
+    max_rss = 0
+
+    manifest_path = root_dir / MANIFEST_NAME
+    manifest = load_manifest(manifest_path, MANIFEST_VERSION)
+    old_entries = manifest['entries']
+    entries = {p: old_entries.get(p.relative_to(root_dir).as_posix()) for p in jpeg_files}
+    new_entries = {}
+
+    widths = tuple(int(w) for w in args.widths.split(',') if w.strip()) if args.responsive else ()
+    results = convert_all(jpeg_files, workers=workers, entries=entries,
+                          quality=args.quality, method=args.method, widths=widths,
+                          target_bytes=args.target_bytes, min_ssim=args.min_ssim,
+                          max_dimension=args.max_dimension)
+    for i, (jpeg_path, webp_path, jpeg_size, webp_size, error, entry, rss) in enumerate(results, 1):
         rel_path = jpeg_path.relative_to(root_dir)
-        print(f"[{i}/{len(jpeg_files)}] {rel_path}", end=" ... ")
+        print(f"[{i}/{len(jpeg_files)}] {rel_path}", end=" ... ", flush=True)
 
-        webp_path, jpeg_size, webp_size = convert_image_to_webp(jpeg_path)
+        if entry is not None:
+            new_entries[rel_path.as_posix()] = entry
+        elif entries[jpeg_path] is not None:
+            # Keep the old record of a failed file; its hash will not match next time
+            new_entries[rel_path.as_posix()] = entries[jpeg_path]
+
+        rss_note = f", peak RSS {rss/1024/1024:.0f}MB" if rss else ""
+        max_rss = max(max_rss, rss or 0)
 
         if webp_path:
             conversions[str(rel_path)] = str(webp_path.relative_to(root_dir))
@@ -144,12 +519,17 @@ def main():
 
             if jpeg_size > 0:
                 reduction = ((jpeg_size - webp_size) / jpeg_size) * 100
-                print(f"OK ({jpeg_size/1024:.1f}KB → {webp_size/1024:.1f}KB, {reduction:.1f}% smaller)")
+                print(f"OK ({jpeg_size/1024:.1f}KB → {webp_size/1024:.1f}KB, {reduction:.1f}% smaller{rss_note})")
                 successful_conversions += 1
             else:
-                print("SKIPPED (already exists)")
+                print("SKIPPED (unchanged)")
         else:
-            print("FAILED")
+            print(f"FAILED ({error}{rss_note})")
+            failed.append((rel_path, error))
+
+    # Entries of deleted source images are dropped here
+    manifest['entries'] = new_entries
+    save_manifest(manifest_path, manifest)
 
     print()
     print("=" * 70)
@@ -160,14 +540,67 @@ def main():
         total_reduction = ((total_jpeg_size - total_webp_size) / total_jpeg_size) * 100
         print(f"  Space saved: {(total_jpeg_size - total_webp_size)/1024/1024:.2f} MB ({total_reduction:.1f}%)")
     print(f"  Successful conversions: {successful_conversions}/{len(jpeg_files)}")
+    if max_rss:
+        print(f"  Peak RSS per image (max): {max_rss/1024/1024:.0f} MB")
+    if failed:
+        print(f"  Failed conversions: {len(failed)}")
+        for rel_path, error in failed:
+            print(f"    {rel_path}: {error}")
     print("=" * 70)
     print()
 
+    if args.animations:
+        print("Converting animations to WebP...")
+        print("-" * 70)
+        print_animation_report(convert_animations(root_dir, workers, method=args.method))
+        print()
+
+    return conversions, new_entries
+
+
+def recorded_conversions(root_dir):
+    """
+    The conversions of earlier runs, as convert_images returns them, from the
+    manifest: images whose WebP still exists.
+    """
+    entries = load_manifest(root_dir / MANIFEST_NAME, MANIFEST_VERSION)['entries']
+    conversions = {rel: Path(rel).with_suffix('.webp').as_posix() for rel in entries
+                   if (root_dir / rel).with_suffix('.webp').exists()}
+    return conversions, entries
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    root_dir = Path.cwd()
+
+    print("=" * 70)
+    print("JPEG to WebP Converter")
+    print("=" * 70)
+    print()
+
+    # Find all JPEG files
+    print("Scanning for JPEG files...")
+    index = site_index.scan(root_dir)
+    jpeg_files = find_jpeg_files(root_dir, index)
+    print(f"Found {len(jpeg_files)} JPEG files")
+    print()
+
+    if not jpeg_files and not args.animations and not args.references_only:
+        print("No JPEG files found!")
+        return
+
+    if args.references_only:
+        conversions, new_entries = recorded_conversions(root_dir)
+    else:
+        conversions, new_entries = convert_images(root_dir, jpeg_files, args)
+    if args.no_references:
+        return
+
     # Update HTML files
     print("Updating HTML file references...")
     print("-" * 70)
 
-    html_files = find_html_files(root_dir)
+    html_files = find_html_files(root_dir, index)
     print(f"Found {len(html_files)} HTML files")
     print()
 
@@ -178,14 +611,26 @@ def main():
         replacements[jpeg_path] = webp_path
         replacements[jpeg_path.replace('\\', '/')] = webp_path.replace('\\', '/')
 
+    responsive = build_responsive_table(new_entries) if args.responsive else {}
+    if args.animations:
+        responsive.update(gif_fallback_table(root_dir))
+
     total_replacements = 0
     files_modified = 0
+    localized = {'.': (replacements, responsive)}
 
     for html_path in html_files:
         rel_path = html_path.relative_to(root_dir)
-        changes = replace_references_in_file(html_path, replacements)
-        if changes > 0:
+        base = rel_path.parent.as_posix()
+        if base not in localized:
+            localized[base] = localize_tables(replacements, responsive, base)
+        page_replacements, page_responsive = localized[base]
+        counts = replace_references_in_file(html_path, page_replacements, page_responsive, args.sizes)
+        if counts:
+            changes = sum(counts.values())
             print(f"  {rel_path}: {changes} reference(s) updated")
+            for reference, count in sorted(counts.items()):
+                print(f"      {reference} ×{count}")
             total_replacements += changes
             files_modified += 1
 
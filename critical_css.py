@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Critical CSS: the part of a stylesheet needed to paint the top of a page.
+
+There is no layout engine here, so "above the fold" is approximated by
+document order: the <html> and <body> elements plus the first
+FOLD_ELEMENTS elements of the body (the header, the navigation and the
+start of the content on this site's pages).  A style rule is critical if
+the rightmost compound selector of any of its selectors matches one of
+those elements; ancestors and pseudo-classes are ignored, which can only
+include a few rules too many, never leave out one that applies.  @media
+and @supports blocks keep their critical rules, @font-face and @import
+are always kept, and @keyframes are kept when a critical rule uses them.
+
+The critical rules are inlined in the page and the full stylesheet loads
+asynchronously after it; since the full stylesheet repeats every inlined
+rule in the same order, the page renders the same once it has loaded.
+
+Usage:
+    python critical_css.py index.html css/mainCSS.css css/otherStyles.css
+"""
+
+import argparse
+import re
+
+from html_transform import tokenize
+from minify import minify_css
+
+FOLD_ELEMENTS = 120
+
+# Selectors matched by elements that scripts add before first paint or that
+# are fixed on screen wherever they sit in the document
+ALWAYS_CRITICAL = ('.theme-toggle', '.scroll-to-top', '.bg-gradient')
+
+# Attribute set on <html> by the pre-paint theme script; either value may be active
+SCRIPT_ATTRIBUTES = {'html': ('data-theme',)}
+
+# At-rules whose block holds further rules
+NESTING_AT_RULES = ('@media', '@supports', '@document', '@layer')
+ALWAYS_KEPT_AT_RULES = ('@font-face', '@import')
+
+_STRING = re.compile(r'''"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*\'''')
+_SIMPLE = re.compile(r'''
+    (?P<tag>^[a-zA-Z][\w-]*|^\*)
+  | \#(?P<id>[\w-]+)
+  | \.(?P<cls>[\w-]+)
+  | \[\s*(?P<attr>[\w-]+)\s*(?:(?P<op>[~|^$*]?=)\s*(?P<value>"[^"]*"|'[^']*'|[^\]\s]+)\s*)?(?:[iIsS]\s*)?\]
+  | ::?(?P<pseudo>[\w-]+)(?:\((?:[^()]|\([^()]*\))*\))?
+''', re.VERBOSE)
+
+ANY = object()
+
+
+# --- Stylesheet parsing ----------------------------------------------------
+
+def _block_end(css, i):
+    """Index of the '}' closing the block whose '{' is at css[i]."""
+    depth = 0
+    while i < len(css):
+        string = _STRING.match(css, i)
+        if string:
+            i = string.end()
+            continue
+        if css[i] == '{':
+            depth += 1
+        elif css[i] == '}':
+            depth -= 1
+            if not depth:
+                return i
+        i += 1
+    return len(css)
+
+
+def parse_rules(css):
+    """
+    Split a (comment-free) stylesheet into [(prelude, block)]: block is the
+    declaration text, a nested rule list for @media and the like, or None
+    for statements such as @import.
+    """
+    rules = []
+    i = start = 0
+    while i < len(css):
+        string = _STRING.match(css, i)
+        if string:
+            i = string.end()
+            continue
+        c = css[i]
+        if c == ';':
+            prelude = css[start:i].strip()
+            if prelude:
+                rules.append((prelude, None))
+            start = i = i + 1
+        elif c == '{':
+            end = _block_end(css, i)
+            prelude, body = css[start:i].strip(), css[i + 1:end]
+            if prelude.lower().startswith(NESTING_AT_RULES):
+                rules.append((prelude, parse_rules(body)))
+            else:
+                rules.append((prelude, body))
+            start = i = end + 1
+        elif c == '}':
+            start = i = i + 1  # stray brace
+        else:
+            i += 1
+    return rules
+
+
+def serialize(rules):
+    out = []
+    for prelude, block in rules:
+        if block is None:
+            out.append(prelude + ';')
+        elif isinstance(block, list):
+            out.append(prelude + '{' + serialize(block) + '}')
+        else:
+            out.append(prelude + '{' + block + '}')
+    return ''.join(out)
+
+
+# --- Selector matching -----------------------------------------------------
+
+def _split_top_level(text, separators):
+    """Split text at separator characters outside brackets, parens and strings."""
+    parts, depth, start, i = [], 0, 0, 0
+    while i < len(text):
+        string = _STRING.match(text, i)
+        if string:
+            i = string.end()
+            continue
+        c = text[i]
+        if c in '([':
+            depth += 1
+        elif c in ')]':
+            depth -= 1
+        elif c in separators and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+        i += 1
+    parts.append(text[start:])
+    return parts
+
+
+def key_compound(selector):
+    """The rightmost compound selector (what the matched element itself must satisfy)."""
+    parts = [part for part in _split_top_level(selector.strip(), ' >+~\t\n') if part]
+    return parts[-1] if parts else '*'
+
+
+def _compound_matches(compound, element):
+    tag, attrs = element
+    for match in _SIMPLE.finditer(compound):
+        if match.group('tag'):
+            if match.group('tag') != '*' and match.group('tag').lower() != tag:
+                return False
+        elif match.group('id'):
+            if not _attr_matches(attrs.get('id'), '=', match.group('id')):
+                return False
+        elif match.group('cls'):
+            if not _attr_matches(attrs.get('class'), '~=', match.group('cls')):
+                return False
+        elif match.group('attr'):
+            name = match.group('attr').lower()
+            if name not in attrs:
+                return False
+            if match.group('op'):
+                if not _attr_matches(attrs[name], match.group('op'), match.group('value').strip('\'"')):
+                    return False
+        elif match.group('pseudo') == 'root':
+            if tag != 'html':
+                return False
+        # Other pseudo-classes and pseudo-elements (:hover, ::before, ...) are
+        # ignored: the rule is kept for the element either way
+    return True
+
+
+def _attr_matches(actual, op, expected):
+    if actual is ANY:
+        return True
+    if actual is None:
+        return False
+    if op == '=':
+        return actual == expected
+    if op == '~=':
+        return expected in actual.split()
+    if op == '|=':
+        return actual == expected or actual.startswith(expected + '-')
+    if op == '^=':
+        return actual.startswith(expected)
+    if op == '$=':
+        return actual.endswith(expected)
+    return expected in actual  # *=
+
+
+def selector_matches(selector_list, elements):
+    """Whether any selector in a comma-separated list could match one of elements."""
+    for selector in _split_top_level(selector_list, ','):
+        compound = key_compound(selector)
+        if any(always in selector for always in ALWAYS_CRITICAL):
+            return True
+        if any(_compound_matches(compound, element) for element in elements):
+            return True
+    return False
+
+
+# --- Pages -----------------------------------------------------------------
+
+def fold_elements(tokens, limit=FOLD_ELEMENTS):
+    """(tag, attrs) of <html>, <body> and the first `limit` elements of the body."""
+    elements = []
+    in_body = False
+    count = 0
+    for token in tokens:
+        if token.kind not in ('starttag', 'startendtag'):
+            continue
+        attrs = {name: '' if value is None else value for name, value in token.attrs.items()}
+        for name in SCRIPT_ATTRIBUTES.get(token.tag, ()):
+            attrs[name] = ANY
+        if token.tag in ('html', 'body'):
+            elements.append((token.tag, attrs))
+            in_body = in_body or token.tag == 'body'
+        elif in_body:
+            elements.append((token.tag, attrs))
+            count += 1
+            if count >= limit:
+                break
+    if not any(tag == 'html' for tag, _ in elements):
+        elements.insert(0, ('html', {name: ANY for name in SCRIPT_ATTRIBUTES['html']}))
+    return elements
+
+
+def _critical(rules, elements):
+    kept = []
+    for prelude, block in rules:
+        lowered = prelude.lower()
+        if isinstance(block, list):
+            inner = _critical(block, elements)
+            if inner:
+                kept.append((prelude, inner))
+        elif lowered.startswith(ALWAYS_KEPT_AT_RULES):
+            kept.append((prelude, block))
+        elif lowered.startswith('@'):
+            continue  # @keyframes are added below if used; @charset, @page, ... are not needed
+        elif selector_matches(prelude, elements):
+            kept.append((prelude, block))
+    return kept
+
+
+def _keyframes(rules):
+    for prelude, block in rules:
+        if isinstance(block, list):
+            yield from _keyframes(block)
+        elif re.match(r'@(?:-[a-z]+-)?keyframes\s', prelude, re.IGNORECASE):
+            yield prelude.split()[-1], (prelude, block)
+
+
+def extract(css, elements):
+    """Critical subset of css (minified text) for a page's fold elements."""
+    rules = parse_rules(minify_css(css))
+    critical = serialize(_critical(rules, elements))
+    used = [rule for name, rule in _keyframes(rules) if re.search(r'\b' + re.escape(name) + r'\b', critical)]
+    return critical + serialize(used)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print the critical CSS of a page.")
+    parser.add_argument('page', help="HTML page")
+    parser.add_argument('stylesheets', nargs='+', help="stylesheets the page uses, in order")
+    parser.add_argument('--fold', type=int, default=FOLD_ELEMENTS,
+                        help="body elements considered above the fold (default: %(default)s)")
+    parser.add_argument('--print', action='store_true', help="print the critical CSS itself")
+    args = parser.parse_args(argv)
+
+    with open(args.page, 'r', encoding='utf-8') as f:
+        elements = fold_elements(tokenize(f.read()), args.fold)
+    css = ''
+    for name in args.stylesheets:
+        with open(name, 'r', encoding='utf-8') as f:
+            css += f.read() + '\n'
+    critical = extract(css, elements)
+    if args.print:
+        print(critical)
+        return
+    full = minify_css(css)
+    print(f"  {args.page}: {len(critical)/1024:.1f}KB critical of {len(full)/1024:.1f}KB "
+          f"({len(critical) / len(full) * 100:.0f}%)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Local development server with stage reruns and live reload.
+
+Serves the site root over http:// (so pages behave as they do when
+published, rather than through the file:// special cases) and polls the
+tree for changes.  Nothing is rebuilt in memory: when a file changes the
+server
+
+- drops it from the response cache (file bytes, with the live-reload
+  script injected into HTML, keyed by the file's size and mtime);
+- reruns, in the background, the build.py stages whose inputs include it
+  and the stages that read what those write, against the files on disk,
+  with build.py's hash checks skipping stages that are up to date;
+- tells every open page to reload, over a server-sent event stream, once
+  the rerun has finished (or right away if no stage reads the file).
+
+Files the rerun writes do not start another one.  Stages only rewrite
+pages (migration, partials, image references) rather than reading them
+(see build.py), so editing a page's text reruns just the search index.
+
+On start the development stages are brought up to date once, in the
+background.  The publish and precompress stages are not run: the server
+serves the sources.
+
+Usage:
+    python dev_server.py                 # http://127.0.0.1:8000/
+    python dev_server.py --port 8080
+    python dev_server.py --no-build      # serve and reload only
+"""
+
+import argparse
+import mimetypes
+import os
+import posixpath
+import threading
+import time
+import urllib.parse
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import build
+import site_index
+
+RELOAD_PATH = '/__livereload'
+RELOAD_SCRIPT = (
+    '<script>new EventSource("' + RELOAD_PATH + '").onmessage = function () { location.reload(); };</script>'
+)
+
+# Stages that only produce the published copy are irrelevant when serving the
+# sources; opt-in stages are left to `build.py`
+DEV_STAGES = [stage for stage in build.STAGES
+              if stage.name not in ('publish', 'precompress') and not stage.opt_in]
+
+# Seconds between keep-alive comments on idle event streams (detects closed tabs)
+HEARTBEAT = 15
+
+
+class ResponseCache:
+    """Response bodies by root-relative path, validated against the file's stat."""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, rel, stat, load):
+        stamp = (stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            entry = self._entries.get(rel)
+        if entry and entry[0] == stamp:
+            return entry[1]
+        body = load()
+        with self._lock:
+            self._entries[rel] = (stamp, body)
+        return body
+
+    def invalidate(self, rels):
+        with self._lock:
+            for rel in rels:
+                self._entries.pop(rel, None)
+
+
+class Reloader:
+    """Wakes every open event stream when the site changed."""
+
+    def __init__(self):
+        self._generation = 0
+        self._changed = threading.Condition()
+
+    @property
+    def generation(self):
+        return self._generation
+
+    def notify(self):
+        with self._changed:
+            self._generation += 1
+            self._changed.notify_all()
+
+    def wait(self, generation, timeout):
+        """Wait until the generation moves past `generation`; returns the current one."""
+        with self._changed:
+            self._changed.wait_for(lambda: self._generation != generation, timeout)
+            return self._generation
+
+
+def inject_reload(body):
+    """Add the live-reload listener to an HTML page."""
+    marker = body.lower().rfind(b'</body>')
+    script = RELOAD_SCRIPT.encode('utf-8')
+    if marker < 0:
+        return body + script
+    return body[:marker] + script + body[marker:]
+
+
+class DevRequestHandler(BaseHTTPRequestHandler):
+    root = None
+    cache = None
+    reloader = None
+
+    def log_request(self, code='-', size='-'):
+        # Only errors: a page load fetches dozens of files
+        if isinstance(code, int) and code >= HTTPStatus.BAD_REQUEST:
+            super().log_request(code, size)
+
+    def do_GET(self):
+        path = urllib.parse.unquote(urllib.parse.urlsplit(self.path).path)
+        if path == RELOAD_PATH:
+            self._event_stream()
+            return
+        self._serve_file(path, send_body=True)
+
+    def do_HEAD(self):
+        self._serve_file(urllib.parse.unquote(urllib.parse.urlsplit(self.path).path), send_body=False)
+
+    def _resolve(self, path):
+        """Root-relative file for a URL path, or None if outside the site or hidden."""
+        rel = posixpath.normpath(path.lstrip('/')) if path.strip('/') else '.'
+        if rel.startswith('..') or any(part.startswith('.') and part != '.' for part in rel.split('/')):
+            return None
+        target = self.root / rel
+        if target.is_dir():
+            target = target / 'index.html'
+            rel = posixpath.join(rel, 'index.html') if rel != '.' else 'index.html'
+        return rel, target
+
+    def _serve_file(self, path, send_body):
+        resolved = self._resolve(path)
+        try:
+            rel, target = resolved
+            stat = target.stat()
+        except (TypeError, OSError):
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+
+        content_type = mimetypes.guess_type(target.name)[0] or 'application/octet-stream'
+
+        def load():
+            body = target.read_bytes()
+            return inject_reload(body) if content_type == 'text/html' else body
+
+        body = self.cache.get(rel, stat, load)
+        self.send_response(HTTPStatus.OK)
+        if content_type.startswith('text/') or content_type in ('application/javascript', 'application/json'):
+            content_type += '; charset=utf-8'
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def _event_stream(self):
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        generation = self.reloader.generation
+        try:
+            while True:
+                current = self.reloader.wait(generation, HEARTBEAT)
+                if current != generation:
+                    self.wfile.write(b'data: reload\n\n')
+                    generation = current
+                else:
+                    self.wfile.write(b': keep-alive\n\n')
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+def diff_index(old, new):
+    """
+    Root-relative paths added, removed or modified between two scans,
+    ignoring dot files (the scripts' manifests and caches).
+    """
+    return {rel for rel in old.keys() | new.keys()
+            if old.get(rel) != new.get(rel) and not any(part.startswith('.') for part in rel.split('/'))}
+
+
+def affected_stages(changed, index, stages=DEV_STAGES):
+    """
+    The stages that read any of the changed files, and those that read
+    what they write (stages are in build order, so one pass finds them).
+    """
+    changed = set(changed)
+    affected = []
+    for stage in stages:
+        if changed & set(stage.inputs(index)):
+            affected.append(stage)
+            changed |= stage.writes(index)
+    return affected
+
+
+class Watcher(threading.Thread):
+    """
+    Polls the site index, reruns the affected stages in the background and
+    reloads pages once each rerun is done.
+    """
+
+    def __init__(self, root, cache, reloader, interval, rebuild=True, workers=1):
+        super().__init__(daemon=True)
+        self.root = root
+        self.cache = cache
+        self.reloader = reloader
+        self.interval = interval
+        self.rebuild = rebuild
+        self.workers = workers
+        self._builder = None
+
+    def _scan(self):
+        return site_index.scan(self.root, use_cache=False)
+
+    def _build(self, stages):
+        started = time.perf_counter()
+        try:
+            failed = build.build(self.root, stages, self.workers)
+        except Exception as e:
+            print(f"Rebuild error: {e}")
+            return
+        status = f"failed: {', '.join(failed)}" if failed else "done"
+        print(f"Rebuilt {', '.join(stage.name for stage in stages)} ({status}, {time.perf_counter() - started:.2f}s)")
+
+    def _start_build(self, stages, index):
+        """Run stages in the background; returns the files they may write."""
+        self._builder = threading.Thread(target=self._build, args=(stages,), daemon=True)
+        self._builder.start()
+        return set().union(*(stage.writes(index) for stage in stages))
+
+    def _building(self):
+        return self._builder is not None and self._builder.is_alive()
+
+    def run(self):
+        index = self._scan()
+        pending = set()   # changed files no rerun has seen yet
+        writes = set()    # files the running rerun may write
+        stale = False     # open pages are out of date
+        if self.rebuild:
+            # Bring the tree up to date (and record the build state) first
+            writes = self._start_build(DEV_STAGES, index)
+        while True:
+            time.sleep(self.interval)
+            # A rerun that finished before this scan has all its writes in it
+            finished = not self._building()
+            new_index = self._scan()
+            changed = diff_index(index, new_index)
+            index = new_index
+            if changed:
+                self.cache.invalidate(changed)
+                for rel in sorted(changed)[:5]:
+                    print(f"Changed: {rel}")
+                if len(changed) > 5:
+                    print(f"Changed: ... and {len(changed) - 5} more")
+                stale = True
+                if self.rebuild:
+                    # The rerun's own writes were already followed through by
+                    # affected_stages; an edit to one of those files while it
+                    # runs waits for the next change or `build.py`
+                    pending |= changed - writes
+
+            # One rerun at a time; pages reload when it is done
+            if not finished:
+                continue
+            writes = set()
+            if pending:
+                stages = affected_stages(pending, index)
+                pending = set()
+                if stages:
+                    writes = self._start_build(stages, index)
+                    continue
+            if stale:
+                self.reloader.notify()
+                stale = False
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the site locally with rebuilds and live reload.")
+    parser.add_argument('--host', default='127.0.0.1', help="address to listen on (default: %(default)s)")
+    parser.add_argument('--port', type=int, default=8000, help="port (default: %(default)s)")
+    parser.add_argument('--interval', type=float, default=0.2,
+                        help="seconds between checks for changed files (default: %(default)s)")
+    parser.add_argument('--no-build', dest='rebuild', action='store_false',
+                        help="only reload pages; do not rerun build stages")
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help="stages rebuilt concurrently at most (default: CPU count)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    root = Path.cwd()
+
+    DevRequestHandler.root = root
+    DevRequestHandler.cache = ResponseCache()
+    DevRequestHandler.reloader = Reloader()
+
+    Watcher(root, DevRequestHandler.cache, DevRequestHandler.reloader,
+            args.interval, args.rebuild, args.jobs).start()
+
+    server = ThreadingHTTPServer((args.host, args.port), DevRequestHandler)
+    server.daemon_threads = True
+    print(f"Serving {root} at http://{args.host}:{args.port}/ (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopped.")
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Generate the blog index from blog/posts.json.
+
+blog/posts.json is the only list of posts.  From it this script writes:
+
+- the post listing inside blog.html (between <!-- blog-index --> markers),
+  split into blog.html, blog-2.html, ... once there are more than
+  POSTS_PER_PAGE posts;
+- the blogPosts array in js/nav-loader.js (prev/next links in posts);
+- the Atom feed blog/atom.xml.
+
+Each output records a hash of the post fields it is built from (and of
+the blog.html template for the listing pages) in .blog-index-manifest.json;
+outputs whose inputs are unchanged are not regenerated, and files are only
+written when their content changes.
+"""
+
+import argparse
+import datetime
+import html
+import json
+import re
+from pathlib import Path
+from xml.sax.saxutils import escape as xml_escape
+
+from build_utils import atomic_write_bytes, load_manifest, save_manifest, sha256_bytes
+
+POSTS_FILE = 'blog/posts.json'
+BLOG_PAGE = 'blog.html'
+NAV_LOADER = 'js/nav-loader.js'
+FEED_FILE = 'blog/atom.xml'
+
+SITE_URL = 'https://k1monfared.github.io/'
+FEED_TITLE = "Keivan Monfared's Blog"
+AUTHOR = 'Keivan Monfared'
+
+POSTS_PER_PAGE = 10
+
+MANIFEST_NAME = '.blog-index-manifest.json'
+MANIFEST_VERSION = 1
+
+LISTING_PATTERN = re.compile(r'<!-- blog-index -->.*?<!-- /blog-index -->', re.DOTALL)
+NAV_POSTS_PATTERN = re.compile(r'(var blogPosts = )\[.*?\];', re.DOTALL)
+
+
+def load_posts(root_dir):
+    """Posts from posts.json, newest first."""
+    with open(Path(root_dir) / POSTS_FILE, 'r', encoding='utf-8') as f:
+        posts = json.load(f)
+    for post in posts:
+        datetime.date.fromisoformat(post['date'])  # fail early on a malformed date
+    return sorted(posts, key=lambda post: (post['date'], post['filename']), reverse=True)
+
+
+def page_name(number):
+    """File name of listing page number (1-based): blog.html, blog-2.html, ..."""
+    return BLOG_PAGE if number == 1 else BLOG_PAGE.replace('.html', f'-{number}.html')
+
+
+def paginate(posts, per_page=POSTS_PER_PAGE):
+    """Split posts into pages (at least one, possibly empty)."""
+    return [posts[i:i + per_page] for i in range(0, len(posts), per_page)] or [[]]
+
+
+def format_date(date):
+    """2025-11-12 -> November 12, 2025 (as the old in-browser listing showed it)."""
+    day = datetime.date.fromisoformat(date)
+    return f"{day:%B} {day.day}, {day.year}"
+
+
+def render_listing(posts, number, page_count):
+    """Static HTML for one listing page, wrapped in the blog-index markers."""
+    lines = ['<!-- blog-index -->']
+    if not posts:
+        lines.append('\t\t\t\t<p>No blog posts yet.</p>')
+    for post in posts:
+        href = html.escape(f"blog/{post['filename']}")
+        lines += [
+            '\t\t\t\t<div class="blog-post">',
+            f'\t\t\t\t\t<h3><a href="{href}">{html.escape(post["title"])}</a></h3>',
+            f'\t\t\t\t\t<div class="date">{format_date(post["date"])}</div>',
+            f'\t\t\t\t\t<div class="description">{html.escape(post.get("description", ""))}</div>',
+            f'\t\t\t\t\t<a href="{href}">Read more →</a>',
+            '\t\t\t\t</div>',
+        ]
+    if page_count > 1:
+        newer = f'<a href="{page_name(number - 1)}">&laquo; Newer</a>' if number > 1 else ''
+        older = f'<a href="{page_name(number + 1)}">Older &raquo;</a>' if number < page_count else ''
+        lines.append(f'\t\t\t\t<nav class="blog-pager">{newer} <span>Page {number} of {page_count}</span> {older}</nav>')
+    lines.append('\t\t\t\t<!-- /blog-index -->')
+    return '\n'.join(lines)
+
+
+def _js_string(value):
+    """Single-quoted JavaScript string literal, as nav-loader.js writes them."""
+    escaped = value.replace('\\', '\\\\').replace("'", "\\'").replace('\n', '\\n')
+    return f"'{escaped}'"
+
+
+def render_nav_posts(posts):
+    """The blogPosts array literal for js/nav-loader.js."""
+    entries = ',\n'.join(
+        f"\t\t{{\n\t\t\tfilename: {_js_string(post['filename'])},\n"
+        f"\t\t\ttitle: {_js_string(post['title'])}\n\t\t}}"
+        for post in posts
+    )
+    return f"[\n{entries}\n\t];"
+
+
+def render_feed(posts):
+    """Atom feed of all posts."""
+    def timestamp(date):
+        return f"{date}T00:00:00Z"
+
+    updated = timestamp(posts[0]['date']) if posts else '1970-01-01T00:00:00Z'
+    lines = [
+        '<?xml version="1.0" encoding="utf-8"?>',
+        '<feed xmlns="http://www.w3.org/2005/Atom">',
+        f'  <title>{xml_escape(FEED_TITLE)}</title>',
+        f'  <link href="{SITE_URL}{BLOG_PAGE}"/>',
+        f'  <link rel="self" href="{SITE_URL}{FEED_FILE}"/>',
+        f'  <id>{SITE_URL}{BLOG_PAGE}</id>',
+        f'  <updated>{updated}</updated>',
+        f'  <author><name>{xml_escape(AUTHOR)}</name></author>',
+    ]
+    for post in posts:
+        url = f"{SITE_URL}blog/{post['filename']}"
+        lines += [
+            '  <entry>',
+            f'    <title>{xml_escape(post["title"])}</title>',
+            f'    <link href="{xml_escape(url)}"/>',
+            f'    <id>{xml_escape(url)}</id>',
+            f'    <updated>{timestamp(post["date"])}</updated>',
+            f'    <summary>{xml_escape(post.get("description", ""))}</summary>',
+            '  </entry>',
+        ]
+    lines.append('</feed>')
+    return '\n'.join(lines) + '\n'
+
+
+def _inputs_key(*parts):
+    return sha256_bytes(json.dumps(parts, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+
+
+def _write_if_changed(path, text):
+    data = text.encode('utf-8')
+    if path.exists() and path.read_bytes() == data:
+        return False
+    atomic_write_bytes(path, data)
+    return True
+
+
+def generate(root_dir, per_page=POSTS_PER_PAGE, force=False):
+    """
+    Regenerate the outputs whose inputs changed.
+
+    Returns a list of (output, status) with status 'written', 'unchanged'
+    (regenerated, same content), 'skipped' (inputs unchanged) or 'removed'.
+    """
+    root = Path(root_dir)
+    manifest_path = root / MANIFEST_NAME
+    manifest = load_manifest(manifest_path, MANIFEST_VERSION)
+    old_keys = manifest['entries']
+    new_keys = {}
+    results = []
+
+    posts = load_posts(root)
+    template = (root / BLOG_PAGE).read_text(encoding='utf-8')
+    if not LISTING_PATTERN.search(template):
+        raise ValueError(f"{BLOG_PAGE} has no <!-- blog-index --> ... <!-- /blog-index --> markers")
+
+    def output(name, key, render):
+        path = root / name
+        new_keys[name] = key
+        if not force and old_keys.get(name) == key and path.exists():
+            results.append((name, 'skipped'))
+            return
+        results.append((name, 'written' if _write_if_changed(path, render()) else 'unchanged'))
+
+    # Listing pages.  blog.html is both page 1 and the template of the others,
+    # so its layout (outside the markers) is part of every page's inputs.
+    pages = paginate(posts, per_page)
+    layout = LISTING_PATTERN.sub('', template)
+    for number, page_posts in enumerate(pages, 1):
+        def render_page(page_posts=page_posts, number=number):
+            listing = render_listing(page_posts, number, len(pages))
+            return LISTING_PATTERN.sub(lambda _: listing, template, count=1)
+        key = _inputs_key(page_posts, number, len(pages), sha256_bytes(layout.encode('utf-8')))
+        output(page_name(number), key, render_page)
+
+    # Pages left over from when there were more posts
+    for name in sorted(set(old_keys) - set(new_keys)):
+        if name.startswith(BLOG_PAGE.replace('.html', '-')) and (root / name).exists():
+            (root / name).unlink()
+            results.append((name, 'removed'))
+
+    nav_posts = [{'filename': post['filename'], 'title': post['title']} for post in posts]
+
+    def render_nav_loader():
+        source = (root / NAV_LOADER).read_text(encoding='utf-8')
+        rendered, count = NAV_POSTS_PATTERN.subn(lambda m: m.group(1) + render_nav_posts(posts), source, count=1)
+        if not count:
+            raise ValueError(f"no 'var blogPosts = [...];' in {NAV_LOADER}")
+        return rendered
+    output(NAV_LOADER, _inputs_key(nav_posts), render_nav_loader)
+
+    output(FEED_FILE, _inputs_key(posts, SITE_URL, FEED_TITLE, AUTHOR), lambda: render_feed(posts))
+
+    manifest['entries'] = new_keys
+    save_manifest(manifest_path, manifest)
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the blog listing, nav post list and Atom feed.")
+    parser.add_argument('--per-page', type=int, default=POSTS_PER_PAGE,
+                        help="posts per listing page (default: %(default)s)")
+    parser.add_argument('--force', action='store_true', help="regenerate every output")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    for name, status in generate(Path.cwd(), max(1, args.per_page), args.force):
+        print(f"  {name}: {status}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Token-level HTML rewriting in a single pass.
+
+The document is tokenized once with html.parser (charrefs are not
+converted, and every token keeps its exact source text, so untouched parts
+of a page are written back byte for byte).  Migrations are declared as
+rules:
+
+    Rule('doctype', [decl('DOCTYPE html PUBLIC'), start('html', xmlns=ANY)],
+         '<!DOCTYPE html>\\n<html lang="en">')
+
+A Rule matches a sequence of tokens; whitespace-only text between them is
+skipped (and replaced along with the match), so a migration does not depend
+on the page's indentation.  Optional lookahead tokens must follow the match
+but are left in place for other rules.  DataRules substitute a regex inside
+text, e.g. in the body of <script> elements, which the tokenizer does not
+split further.
+
+Transform.apply returns the new document and the number of times each rule
+fired, so callers can report what actually changed in each file.
+"""
+
+import re
+from collections import namedtuple
+from html.parser import HTMLParser
+
+# Attribute value wildcard for start(): the attribute must be present
+ANY = object()
+
+# Elements whose content html.parser passes through as one raw text token
+CDATA_ELEMENTS = ('script', 'style')
+
+
+class Token:
+    """One lexical token: kind, lowercased tag name, attributes and source text."""
+
+    __slots__ = ('kind', 'tag', 'attrs', 'text')
+
+    def __init__(self, kind, tag, attrs, text):
+        self.kind = kind
+        self.tag = tag
+        self.attrs = attrs
+        self.text = text
+
+    def is_space(self):
+        return self.kind == 'data' and not self.text.strip()
+
+    def __repr__(self):
+        return f"Token({self.kind!r}, {self.tag!r}, {self.text[:40]!r})"
+
+
+class _Tokenizer(HTMLParser):
+    """Records (kind, tag, attrs, start offset) for every token fed to it."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.marks = []
+
+    def _mark(self, kind, tag=None, attrs=None):
+        self.marks.append((kind, tag, attrs, self.getpos()))
+
+    def handle_starttag(self, tag, attrs):
+        self._mark('starttag', tag, dict(attrs))
+
+    def handle_startendtag(self, tag, attrs):
+        self._mark('startendtag', tag, dict(attrs))
+
+    def handle_endtag(self, tag):
+        self._mark('endtag', tag)
+
+    def handle_data(self, data):
+        self._mark('data')
+
+    def handle_entityref(self, name):
+        self._mark('entityref', name)
+
+    def handle_charref(self, name):
+        self._mark('charref', name)
+
+    def handle_comment(self, data):
+        self._mark('comment')
+
+    def handle_decl(self, decl):
+        self._mark('decl')
+
+    def handle_pi(self, data):
+        self._mark('pi')
+
+    def unknown_decl(self, data):
+        self._mark('decl')
+
+
+def tokenize(source):
+    """
+    Split source into Tokens whose texts concatenate back to source exactly.
+
+    Each token's text runs from its own start position to the next token's,
+    so nothing the parser normalises (case, quoting, entities) is lost.
+    """
+    parser = _Tokenizer()
+    parser.feed(source)
+    parser.close()
+
+    line_starts = [0]
+    line_starts.extend(m.end() for m in re.finditer('\n', source))
+    offsets = [line_starts[line - 1] + column for _, _, _, (line, column) in parser.marks]
+    offsets.append(len(source))
+
+    tokens = []
+    if offsets[0] > 0:
+        tokens.append(Token('data', None, None, source[:offsets[0]]))
+    for (kind, tag, attrs, _), begin, end in zip(parser.marks, offsets, offsets[1:]):
+        if end > begin:
+            tokens.append(Token(kind, tag, attrs, source[begin:end]))
+    return tokens
+
+
+def _normalize_space(text):
+    return ' '.join(text.split())
+
+
+class Matcher:
+    """Predicate over one token; key is the (kind, tag) it can match."""
+
+    __slots__ = ('kind', 'tag', 'attrs', 'value', 'prefix')
+
+    def __init__(self, kind, tag=None, attrs=None, value=None, prefix=False):
+        self.kind = kind
+        self.tag = tag
+        self.attrs = attrs or {}
+        self.value = value
+        self.prefix = prefix
+
+    @property
+    def key(self):
+        return self.kind, self.tag
+
+    def __call__(self, token):
+        if _dispatch_kind(token) != self.kind or (self.tag is not None and token.tag != self.tag):
+            return False
+        for name, expected in self.attrs.items():
+            if name not in token.attrs or (expected is not ANY and token.attrs[name] != expected):
+                return False
+        if self.value is None:
+            return True
+        content = _normalize_space(_token_content(token))
+        return content.startswith(self.value) if self.prefix else content == self.value
+
+
+def _dispatch_kind(token):
+    # <meta ... /> and <meta ...> are the same element to a rule
+    return 'starttag' if token.kind == 'startendtag' else token.kind
+
+
+def _token_content(token):
+    """Token text without its markup delimiters (for text/comment/decl matching)."""
+    if token.kind == 'comment':
+        return token.text[4:-3]
+    if token.kind == 'decl':
+        return token.text[2:-1]
+    return token.text
+
+
+def _attr_names(attrs):
+    # class_='x' -> class, http_equiv='x' -> http-equiv
+    return {name.rstrip('_').replace('_', '-'): value for name, value in attrs.items()}
+
+
+def start(tag, **attrs):
+    """A start tag, self-closing or not, with at least these attribute values (ANY: just present)."""
+    return Matcher('starttag', tag, _attr_names(attrs))
+
+
+def end(tag):
+    return Matcher('endtag', tag)
+
+
+def text(value):
+    """Text equal to value, ignoring surrounding and repeated whitespace."""
+    return Matcher('data', value=_normalize_space(value))
+
+
+def comment(value):
+    """A comment whose content equals value, ignoring whitespace differences."""
+    return Matcher('comment', value=_normalize_space(value))
+
+
+def decl(prefix):
+    """A declaration (e.g. DOCTYPE) starting with prefix."""
+    return Matcher('decl', value=_normalize_space(prefix), prefix=True)
+
+
+Rule = namedtuple('Rule', 'name pattern replacement lookahead', defaults=((),))
+Rule.__doc__ = """
+Replace a token sequence.
+
+pattern is a list of matchers; replacement is a string or a callable
+(matched_tokens, context) -> string.  lookahead matchers must follow the
+match but are not replaced; the whitespace before them is.
+"""
+
+DataRule = namedtuple('DataRule', 'name pattern replacement within', defaults=(None,))
+DataRule.__doc__ = """
+Regex substitution inside text tokens.
+
+within restricts it to the content of the named elements (e.g.
+('script',)); None applies it to all text.
+"""
+
+
+def _element_after(token, cdata):
+    """Track which raw-text element (script/style) the stream is inside."""
+    if token.kind == 'starttag':
+        return token.tag if token.tag in CDATA_ELEMENTS else None
+    if token.kind == 'endtag':
+        return None
+    return cdata
+
+
+def _skip_space(tokens, i):
+    while i < len(tokens) and tokens[i].is_space():
+        i += 1
+    return i
+
+
+def _match_sequence(tokens, i, matchers):
+    """Index just past matchers matched from tokens[i] (skipping whitespace between), or -1."""
+    for n, matcher in enumerate(matchers):
+        if n:
+            i = _skip_space(tokens, i)
+        if i >= len(tokens) or not matcher(tokens[i]):
+            return -1
+        i += 1
+    return i
+
+
+class Transform:
+    """A set of rules applied together in one pass over a document's tokens."""
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        # Token rules are looked up by the (kind, tag) of their first matcher,
+        # so each token is only tried against rules that can start on it
+        self._by_key = {}
+        self._data_rules = []
+        for rule in self.rules:
+            if isinstance(rule, DataRule):
+                self._data_rules.append((rule, re.compile(rule.pattern)))
+            else:
+                self._by_key.setdefault(rule.pattern[0].key, []).append(rule)
+
+    def _try_rule(self, rule, tokens, i):
+        """Index past the tokens rule replaces at tokens[i], or -1."""
+        j = _match_sequence(tokens, i, rule.pattern)
+        if j < 0 or not rule.lookahead:
+            return j
+        after = _skip_space(tokens, j)
+        return after if _match_sequence(tokens, after, rule.lookahead) >= 0 else -1
+
+    def apply(self, source, context=None):
+        """
+        Rewrite source.  Returns (new_source, fired) where fired maps each
+        rule name that matched to its number of matches.
+        """
+        tokens = tokenize(source)
+        fired = {}
+        out = []
+        cdata = None  # name of the <script>/<style> element we are inside
+        i = 0
+        while i < len(tokens):
+            token = tokens[i]
+
+            for rule in self._by_key.get((_dispatch_kind(token), token.tag), ()):
+                j = self._try_rule(rule, tokens, i)
+                if j >= 0:
+                    replacement = rule.replacement
+                    if callable(replacement):
+                        replacement = replacement(tokens[i:j], context or {})
+                    out.append(replacement)
+                    fired[rule.name] = fired.get(rule.name, 0) + 1
+                    for consumed in tokens[i:j]:
+                        cdata = _element_after(consumed, cdata)
+                    i = j
+                    break
+            else:
+                if token.kind == 'data' and self._data_rules:
+                    out.append(self._substitute(token.text, cdata, fired))
+                else:
+                    out.append(token.text)
+                cdata = _element_after(token, cdata)
+                i += 1
+
+        return ''.join(out), fired
+
+    def _substitute(self, data, element, fired):
+        for rule, pattern in self._data_rules:
+            if rule.within is not None and element not in rule.within:
+                continue
+            data, count = pattern.subn(rule.replacement, data)
+            if count:
+                fired[rule.name] = fired.get(rule.name, 0) + count
+        return data
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Pick the encoder quality per image: the highest quality whose output fits
+a byte budget, or the lowest that still reaches a perceptual (SSIM)
+threshold.
+
+Replaces images/convert.sh (ImageMagick + `jpegoptim --size=200k` into
+images/.opt/).  The equivalent run is:
+
+    python image_quality.py images --target-bytes 200k --output-dir .opt
+
+Quality is found by bisection over the encoder's quality scale (about 7
+trial encodes per image), and the chosen value is cached per source hash so
+unchanged images are re-encoded once, without searching.
+"""
+
+import argparse
+import io
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+try:
+    from PIL import Image
+except ImportError:
+    print("Error: Pillow library not found.")
+    print("Please install it with: pip install Pillow")
+    sys.exit(1)
+
+try:
+    import numpy as np
+except ImportError:
+    # Only needed for --min-ssim
+    np = None
+
+from build_utils import atomic_write_bytes, load_manifest, save_manifest, sha256_file
+
+QUALITY_RANGE = (20, 95)
+
+# SSIM is computed on the luma plane downscaled to at most this many pixels
+# on the long side: cheap, and close to what a viewer perceives on screen.
+SSIM_MAX_SIDE = 512
+SSIM_BLOCK = 8
+
+CACHE_NAME = '.quality-cache.json'
+CACHE_VERSION = 1
+
+FORMATS = {
+    'webp': ('WebP', '.webp'),
+    'jpeg': ('JPEG', '.jpg'),
+}
+
+
+def parse_size(text):
+    """Parse a byte count like '200k', '1.5M' or '150000'."""
+    text = text.strip().lower().rstrip('b')
+    multiplier = 1
+    if text and text[-1] in 'kmg':
+        multiplier = 1024 ** ('kmg'.index(text[-1]) + 1)
+        text = text[:-1]
+    return int(float(text) * multiplier)
+
+
+def flatten(img):
+    """Return an RGB copy of img, compositing any alpha onto white."""
+    if img.mode in ('RGBA', 'LA', 'P'):
+        if img.mode == 'P':
+            img = img.convert('RGBA')
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.split()[-1])
+        return background
+    if img.mode != 'RGB':
+        return img.convert('RGB')
+    return img
+
+
+def encode(img, fmt, quality, method=6):
+    """Encode img in memory and return the bytes."""
+    buffer = io.BytesIO()
+    if fmt == 'WebP':
+        img.save(buffer, fmt, quality=quality, method=method)
+    else:
+        img.save(buffer, fmt, quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+def luma_plane(img, max_side=SSIM_MAX_SIDE):
+    """Downscaled luma plane of img as a float64 NumPy array."""
+    luma = img.convert('L')
+    scale = max(luma.size) / max_side
+    if scale > 1:
+        luma = luma.resize((max(1, round(luma.width / scale)), max(1, round(luma.height / scale))), Image.BOX)
+    return np.asarray(luma, dtype=np.float64)
+
+
+def ssim(reference, candidate, block=SSIM_BLOCK):
+    """
+    Mean SSIM of two equally sized luma planes over non-overlapping blocks.
+
+    Fully vectorised: the planes are reshaped into (n_blocks, block*block)
+    and every statistic is computed per row in one NumPy call.
+    """
+    height = (min(reference.shape[0], candidate.shape[0]) // block) * block
+    width = (min(reference.shape[1], candidate.shape[1]) // block) * block
+    if height == 0 or width == 0:
+        return 1.0 if np.array_equal(reference, candidate) else 0.0
+
+    def blocks(plane):
+        plane = plane[:height, :width]
+        return (plane.reshape(height // block, block, width // block, block)
+                .swapaxes(1, 2).reshape(-1, block * block))
+
+    a, b = blocks(reference), blocks(candidate)
+    mu_a, mu_b = a.mean(axis=1), b.mean(axis=1)
+    var_a, var_b = a.var(axis=1), b.var(axis=1)
+    cov = ((a - mu_a[:, None]) * (b - mu_b[:, None])).mean(axis=1)
+
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+    index = ((2 * mu_a * mu_b + c1) * (2 * cov + c2)) / ((mu_a ** 2 + mu_b ** 2 + c1) * (var_a + var_b + c2))
+    return float(index.mean())
+
+
+def _first_true(predicate, lo, hi):
+    """Smallest q in [lo, hi] with predicate(q) true (hi + 1 if none); predicate must be monotone."""
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        if predicate(mid):
+            hi = mid - 1
+        else:
+            lo = mid + 1
+    return lo
+
+
+def search_quality(img, fmt='WebP', target_bytes=None, min_ssim=None, method=6, quality_range=QUALITY_RANGE):
+    """
+    Find the quality to encode img with.
+
+    With target_bytes, the highest quality whose output fits the budget.
+    With min_ssim, the lowest quality whose SSIM against img reaches the
+    threshold (capped by the budget if both are given).  Every trial encode
+    is memoised, so bisection costs about log2(range) encodes.
+
+    Returns (quality, encoded_bytes, trial_encodes).
+    """
+    if min_ssim is not None and np is None:
+        raise RuntimeError("--min-ssim needs NumPy (pip install numpy)")
+
+    lo, hi = quality_range
+    trials = {}
+
+    def trial(quality):
+        if quality not in trials:
+            trials[quality] = encode(img, fmt, quality, method)
+        return trials[quality]
+
+    if target_bytes is not None:
+        # Largest quality whose size still fits (size grows with quality)
+        hi = _first_true(lambda q: len(trial(q)) > target_bytes, lo, hi) - 1
+        hi = max(hi, lo)  # budget unreachable: fall back to the lowest quality
+
+    quality = hi
+    if min_ssim is not None:
+        reference = luma_plane(img)
+
+        def good_enough(q):
+            with Image.open(io.BytesIO(trial(q))) as decoded:
+                return ssim(reference, luma_plane(decoded)) >= min_ssim
+
+        quality = min(_first_true(good_enough, lo, hi), hi)
+
+    return quality, trial(quality), len(trials)
+
+
+def target_settings(fmt, target_bytes=None, min_ssim=None, method=6):
+    """Cache key component describing a search target."""
+    parts = [fmt.lower()]
+    if target_bytes is not None:
+        parts.append(f"budget{target_bytes}")
+    if min_ssim is not None:
+        parts.append(f"ssim{min_ssim}")
+    if fmt == 'WebP':
+        parts.append(f"m{method}")
+    return ":".join(parts)
+
+
+def optimize_image(source, output, fmt, target_bytes=None, min_ssim=None, method=6, cached=None):
+    """
+    Encode source to output at the searched quality.
+
+    cached is the previous cache entry for this source/target.  When the
+    source hash still matches, its quality is reused without searching, and
+    nothing is encoded at all if the recorded output is still in place.
+    Returns (quality, output_size, trial_encodes, cache_entry).
+    """
+    source_hash = sha256_file(source)
+    settings = target_settings(fmt, target_bytes, min_ssim, method)
+    hit = cached and cached.get('source_sha256') == source_hash and cached.get('settings') == settings
+
+    if hit and output.exists() and output.stat().st_size == cached.get('output_size'):
+        return cached['quality'], cached['output_size'], 0, cached
+
+    with Image.open(source) as img:
+        img = flatten(img)
+        if hit:
+            quality = cached['quality']
+            data, trials = encode(img, fmt, quality, method), 1
+        else:
+            quality, data, trials = search_quality(img, fmt, target_bytes, min_ssim, method)
+
+    atomic_write_bytes(output, data)
+    entry = {'source_sha256': source_hash, 'settings': settings, 'quality': quality, 'output_size': len(data)}
+    return quality, len(data), trials, entry
+
+
+def _optimize_task(source, output, fmt, target_bytes, min_ssim, method, cached):
+    """Process-pool entry point: never raises, returns the error text instead."""
+    try:
+        return (*optimize_image(source, output, fmt, target_bytes, min_ssim, method, cached), None)
+    except Exception as e:
+        return None, 0, 0, None, str(e)
+
+
+def find_source_images(directory):
+    """
+    JPEG files directly inside directory, plus PNGs without a JPEG sibling.
+
+    (convert.sh's PNGs were made from the JPEGs, so those add nothing.)
+    """
+    files = [p for p in Path(directory).iterdir() if p.is_file()]
+    jpeg_stems = {p.stem for p in files if p.suffix.lower() in ('.jpg', '.jpeg')}
+    return sorted(p for p in files
+                  if p.suffix.lower() in ('.jpg', '.jpeg')
+                  or (p.suffix.lower() == '.png' and p.stem not in jpeg_stems))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Encode images at the highest quality within a byte budget, "
+                                                 "or the lowest reaching an SSIM threshold.")
+    parser.add_argument('directory', nargs='?', default='images',
+                        help="directory holding the source images (default: %(default)s)")
+    parser.add_argument('--output-dir', default='.opt',
+                        help="output directory, relative to the source directory (default: %(default)s)")
+    parser.add_argument('--format', dest='formats', action='append', choices=sorted(FORMATS),
+                        help="output format, may be repeated (default: jpeg)")
+    parser.add_argument('--target-bytes', type=parse_size,
+                        help="per-image byte budget, e.g. 200k")
+    parser.add_argument('--min-ssim', type=float,
+                        help="perceptual threshold, e.g. 0.95 (needs NumPy)")
+    parser.add_argument('--method', type=int, default=6, choices=range(7),
+                        help="WebP encoder effort (default: 6)")
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1,
+                        help="number of encoder processes (default: CPU count)")
+    args = parser.parse_args(argv)
+    if args.target_bytes is None and args.min_ssim is None:
+        parser.error("give --target-bytes and/or --min-ssim")
+    args.formats = args.formats or ['jpeg']
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    source_dir = Path(args.directory)
+    output_dir = source_dir / args.output_dir
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    cache_path = output_dir / CACHE_NAME
+    cache = load_manifest(cache_path, CACHE_VERSION)
+
+    jobs = []
+    for source in find_source_images(source_dir):
+        for name in args.formats:
+            fmt, suffix = FORMATS[name]
+            if fmt == 'JPEG' and source.suffix.lower() in ('.jpg', '.jpeg'):
+                output = output_dir / source.name  # same name, like jpegoptim -d
+            else:
+                output = output_dir / (source.stem + suffix)
+            key = f"{source.name}:{name}"
+            jobs.append((key, source, output, fmt))
+
+    print(f"Optimizing {len(jobs)} image(s) into {output_dir}...")
+    print("-" * 70)
+
+    failed = []
+    total_trials = 0
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        futures = [executor.submit(_optimize_task, source, output, fmt, args.target_bytes,
+                                   args.min_ssim, args.method, cache['entries'].get(key))
+                   for key, source, output, fmt in jobs]
+        for (key, source, output, fmt), future in zip(jobs, futures):
+            try:
+                quality, size, trials, entry, error = future.result()
+            except Exception as e:
+                quality, size, trials, entry, error = None, 0, 0, None, f"worker failed: {e!r}"
+
+            if error:
+                print(f"  {output.name}: FAILED ({error})")
+                failed.append(source)
+                continue
+
+            cache['entries'][key] = entry
+            total_trials += trials
+            over = " OVER BUDGET" if args.target_bytes and size > args.target_bytes else ""
+            print(f"  {output.name}: q={quality} {size/1024:.1f}KB ({trials} encode{'s' if trials != 1 else ''}){over}")
+
+    save_manifest(cache_path, cache)
+
+    print("-" * 70)
+    print(f"Trial encodes: {total_trials}, failed: {len(failed)}")
+
+
+if __name__ == '__main__':
+    main()
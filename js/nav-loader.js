@@ -1,6 +1,10 @@
 /**
  * Navigation and Footer Loader
  * Loads shared navigation and footer using innerHTML (works with file:// protocol)
+ *
+ * Pages normally have nav.html and footer.html inlined at build time
+ * (prerender_partials.py); the templates below are only used to fill a
+ * container that is still empty.
  */
 
 (function() {
@@ -43,6 +47,7 @@
 		<a href="${pathPrefix}learning.html">learning</a>
 		<a href="${pathPrefix}blog.html">blog</a>
 		<a href="${pathPrefix}contact.html">contact</a>
+		<a href="${pathPrefix}search.html">search</a>
 	</div>
 	<div id="small_menu">
 		<!-- Page-specific sub-menu will be inserted here by each page -->
@@ -63,7 +68,10 @@
 	function loadNavigation() {
 		var navContainer = document.getElementById('nav-container');
 		if (navContainer) {
-			navContainer.innerHTML = navHTML;
+			// Fallback only: keep the prerendered navigation if present
+			if (navContainer.children.length === 0) {
+				navContainer.innerHTML = navHTML;
+			}
 			// After nav loads, set the active page
 			setActivePage();
 			// Load blog post navigation if we're in a blog post
@@ -135,7 +143,7 @@
 	// Load footer
 	function loadFooter() {
 		var footerContainer = document.getElementById('footer-container');
-		if (footerContainer) {
+		if (footerContainer && footerContainer.children.length === 0) {
 			footerContainer.innerHTML = footerHTML;
 		}
 	}
@@ -162,7 +170,7 @@
 
 			// Match exact page or blog section
 			if (linkPage === currentPage || (inBlogPost && linkPage === 'blog.html')) {
-				// Mark this link as active
+				// Mark this link as active (already done in prerendered pages)
 				link.classList.add('active');
 			}
 		});
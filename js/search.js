@@ -0,0 +1,190 @@
+/**
+ * Site Search - queries the prebuilt index in search/ (see build_search_index.py).
+ * NOTE: Only index.json and the shards holding the typed words are fetched;
+ * words are folded the same way as at build time.
+ */
+
+(function() {
+    // This script lives one directory below the site root (js/, or assets/ once published)
+    var script = document.currentScript;
+    var siteRoot = new URL('..', script ? script.src : location.href).href;
+    var searchRoot = siteRoot + 'search/';
+
+    var indexPromise = null;
+    var shardPromises = {};
+
+    function fetchJSON(url) {
+        return fetch(url).then(function(response) {
+            if (!response.ok) {
+                throw new Error('Could not load ' + url + ' (' + response.status + ')');
+            }
+            return response.json();
+        });
+    }
+
+    function loadIndex() {
+        if (!indexPromise) {
+            indexPromise = fetchJSON(searchRoot + 'index.json');
+        }
+        return indexPromise;
+    }
+
+    function loadShard(key) {
+        if (!shardPromises[key]) {
+            shardPromises[key] = fetchJSON(searchRoot + 'shards/' + encodeURIComponent(key) + '.json');
+        }
+        return shardPromises[key];
+    }
+
+    // Same folding as tokenize() in build_search_index.py
+    function tokenize(text, stopWords) {
+        var folded = text.normalize('NFKD').replace(/[^\x00-\x7f]/g, '').toLowerCase();
+        return (folded.match(/[a-z0-9]+/g) || []).filter(function(word) {
+            return word.length > 1 && stopWords.indexOf(word) < 0;
+        });
+    }
+
+    // Keys of the shards that can hold `term` (or, with prefix, any word starting with it)
+    function shardKeys(keys, term, prefix) {
+        var first = 0;
+        for (var i = 0; i < keys.length && keys[i] <= term; i++) {
+            first = i;
+        }
+        var found = [keys[first]];
+        if (prefix) {
+            for (var j = first + 1; j < keys.length && keys[j].indexOf(term) === 0; j++) {
+                found.push(keys[j]);
+            }
+        }
+        return found;
+    }
+
+    // {doc id: score} for a word; prefix also matches longer words
+    function lookup(index, term, prefix) {
+        var keys = shardKeys(index.shards, term, prefix);
+        return Promise.all(keys.map(loadShard)).then(function(shards) {
+            var scores = {};
+            shards.forEach(function(shard) {
+                Object.keys(shard).forEach(function(word) {
+                    if (word === term || (prefix && word.indexOf(term) === 0)) {
+                        var postings = shard[word];
+                        for (var k = 0; k < postings.length; k += 2) {
+                            // Exact matches rank above completions
+                            var score = word === term ? postings[k + 1] : postings[k + 1] / 2;
+                            scores[postings[k]] = (scores[postings[k]] || 0) + score;
+                        }
+                    }
+                });
+            });
+            return scores;
+        });
+    }
+
+    /**
+     * Search the site: resolves to [{url, title, summary, score}], best first.
+     * Every word must match; the last one may be incomplete.
+     */
+    function search(query) {
+        return loadIndex().then(function(index) {
+            var terms = tokenize(query, index.stop);
+            if (!terms.length) {
+                return [];
+            }
+            var lookups = terms.map(function(term, i) {
+                return lookup(index, term, i === terms.length - 1);
+            });
+            return Promise.all(lookups).then(function(results) {
+                var totals = results[0];
+                results.slice(1).forEach(function(scores) {
+                    Object.keys(totals).forEach(function(doc) {
+                        if (doc in scores) {
+                            totals[doc] += scores[doc];
+                        } else {
+                            delete totals[doc];
+                        }
+                    });
+                });
+                return Object.keys(totals).map(function(doc) {
+                    var entry = index.docs[doc];
+                    return {url: siteRoot + entry[0], title: entry[1], summary: entry[2], score: totals[doc]};
+                }).sort(function(a, b) {
+                    return b.score - a.score;
+                });
+            });
+        });
+    }
+
+    function renderResults(container, query, results) {
+        container.textContent = '';
+        if (!query.trim()) {
+            return;
+        }
+        if (!results.length) {
+            var empty = document.createElement('p');
+            empty.className = 'search-empty';
+            empty.textContent = 'No results for "' + query + '".';
+            container.appendChild(empty);
+            return;
+        }
+        var list = document.createElement('ul');
+        list.className = 'search-results-list';
+        results.forEach(function(result) {
+            var item = document.createElement('li');
+            var link = document.createElement('a');
+            link.href = result.url;
+            link.textContent = result.title;
+            item.appendChild(link);
+            if (result.summary) {
+                var summary = document.createElement('p');
+                summary.textContent = result.summary;
+                item.appendChild(summary);
+            }
+            list.appendChild(item);
+        });
+        container.appendChild(list);
+    }
+
+    // Bind to <input id="site-search"> and <div id="search-results"> if the page has them
+    function bindSearchBox() {
+        var input = document.getElementById('site-search');
+        var container = document.getElementById('search-results');
+        if (!input || !container) {
+            return;
+        }
+        var timer = null;
+        var latest = 0;
+
+        function update() {
+            var query = input.value;
+            var request = ++latest;
+            search(query).then(function(results) {
+                // Ignore answers to queries that have been typed over
+                if (request === latest) {
+                    renderResults(container, query, results);
+                }
+            }).catch(function(error) {
+                container.textContent = 'Search is unavailable: ' + error.message;
+            });
+        }
+
+        input.addEventListener('input', function() {
+            clearTimeout(timer);
+            timer = setTimeout(update, 150);
+        });
+
+        // search.html?q=words
+        var initial = new URLSearchParams(location.search).get('q');
+        if (initial) {
+            input.value = initial;
+            update();
+        }
+    }
+
+    window.siteSearch = search;
+
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', bindSearchBox);
+    } else {
+        bindSearchBox();
+    }
+})();
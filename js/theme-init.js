@@ -0,0 +1,20 @@
+/**
+ * Theme Init - applies the saved light/dark theme before first paint.
+ * NOTE: publish_site.py replaces each page's own inline copy of this script,
+ * where it stands, with this file minified (the page's other markup is not
+ * moved); theme-toggle.js saves the choice it reads.
+ */
+
+(function() {
+    // Cookie first (works with file://), then localStorage
+    var match = document.cookie.match(/(?:^|; )theme=([^;]*)/);
+    var theme = match && match[1];
+    if (!theme) {
+        try {
+            theme = localStorage.getItem('theme');
+        } catch (e) {
+            // localStorage not available
+        }
+    }
+    document.documentElement.setAttribute('data-theme', theme || 'dark');
+})();
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Conservative CSS and JavaScript minifiers.
+
+Both only remove comments and whitespace; strings (and in JavaScript,
+template literals and regex literals) are copied verbatim.  The JavaScript
+minifier keeps one newline wherever the source had a line break, so
+automatic semicolon insertion behaves exactly as before; it makes no
+attempt to rename or restructure code.
+
+Usage:
+    python minify.py css/mainCSS.css js/nav-loader.js   # print sizes before/after
+"""
+
+import argparse
+import re
+import sys
+
+# --- CSS -----------------------------------------------------------------
+
+_CSS_TOKEN = re.compile(r'''("(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')|(/\*.*?\*/)|(\s+)''', re.DOTALL)
+# Whitespace next to these is never significant (':' only after it: "a :hover" differs from "a:hover")
+_CSS_TIGHT = set('{};,>')
+
+
+def minify_css(source):
+    """Strip comments and redundant whitespace from a stylesheet."""
+    out = []
+    pos = 0
+    space = False
+    for match in _CSS_TOKEN.finditer(source):
+        if match.start() > pos:
+            _css_emit(out, source[pos:match.start()], space)
+            space = False
+        string = match.group(1)
+        if string:
+            _css_emit(out, string, space)
+            space = False
+        else:
+            space = True
+        pos = match.end()
+    if pos < len(source):
+        _css_emit(out, source[pos:], space)
+    return ''.join(out).replace(';}', '}')
+
+
+def _css_emit(out, text, space):
+    if space and out:
+        before = out[-1][-1]
+        if before not in _CSS_TIGHT and before != ':' and text[0] not in _CSS_TIGHT:
+            out.append(' ')
+    out.append(text)
+
+
+# --- JavaScript ----------------------------------------------------------
+
+# After these characters a '/' starts a regex literal rather than a division
+_REGEX_AFTER = set('(,=:[!&|?{};+-*%~^<>')
+_REGEX_KEYWORDS = {
+    'return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void',
+    'throw', 'case', 'do', 'else', 'yield', 'await',
+}
+
+
+def _is_word_char(c):
+    return c.isalnum() or c in '_$\\' or ord(c) > 127
+
+
+def _string_end(source, i):
+    """Index just past the string or template literal starting at source[i]."""
+    quote = source[i]
+    i += 1
+    n = len(source)
+    while i < n:
+        c = source[i]
+        if c == '\\':
+            i += 2
+            continue
+        if c == quote:
+            return i + 1
+        if quote == '`' and source.startswith('${', i):
+            i = _code_end(source, i + 2)
+            continue
+        if c == '\n' and quote != '`':
+            break  # unterminated; let the browser report it
+        i += 1
+    return min(i, n)
+
+
+def _code_end(source, i):
+    """Index just past the '}' closing a template substitution opened before source[i]."""
+    depth = 1
+    n = len(source)
+    while i < n:
+        c = source[i]
+        if c in '\'"`':
+            i = _string_end(source, i)
+            continue
+        if c == '{':
+            depth += 1
+        elif c == '}':
+            depth -= 1
+            if not depth:
+                return i + 1
+        i += 1
+    return n
+
+
+def _regex_end(source, i):
+    """Index just past the regex literal (with flags) starting at source[i]."""
+    i += 1
+    n = len(source)
+    in_class = False
+    while i < n:
+        c = source[i]
+        if c == '\\':
+            i += 2
+            continue
+        if c == '\n':
+            break
+        if c == '[':
+            in_class = True
+        elif c == ']':
+            in_class = False
+        elif c == '/' and not in_class:
+            i += 1
+            while i < n and _is_word_char(source[i]):
+                i += 1
+            return i
+        i += 1
+    return min(i, n)
+
+
+def _needs_space(before, after):
+    """Whether two tokens would fuse (or change meaning) without a space between them."""
+    if _is_word_char(before) and _is_word_char(after):
+        return True
+    if before in '+-' and after in '+-':
+        return True  # a + +b, a - -b
+    if before.isdigit() and after == '.':
+        return True  # 1 .toString()
+    return before == '/' and after == '/'
+
+
+def minify_js(source):
+    """Strip comments and indentation from a script, keeping line breaks."""
+    out = []
+    last = ''        # last character emitted that is not whitespace
+    last_word = ''   # last identifier/keyword emitted
+    pending = ''     # whitespace seen since `last`: '', ' ' or '\n'
+    i = 0
+    n = len(source)
+
+    def emit(text):
+        nonlocal last, pending
+        if pending == '\n' and last:
+            out.append('\n')
+        elif pending == ' ' and last and _needs_space(last, text[0]):
+            out.append(' ')
+        pending = ''
+        out.append(text)
+        last = text[-1]
+
+    while i < n:
+        c = source[i]
+        if c in ' \t\r\f\v':
+            pending = pending or ' '
+            i += 1
+        elif c == '\n':
+            pending = '\n'
+            i += 1
+        elif source.startswith('//', i):
+            end = source.find('\n', i)
+            i = n if end < 0 else end
+        elif source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            end = n if end < 0 else end + 2
+            if '\n' in source[i:end]:
+                pending = '\n'
+            else:
+                pending = pending or ' '
+            i = end
+        elif c in '\'"`':
+            end = _string_end(source, i)
+            emit(source[i:end])
+            last_word = ''
+            i = end
+        elif c == '/' and (not last or last in _REGEX_AFTER or last_word in _REGEX_KEYWORDS):
+            end = _regex_end(source, i)
+            emit(source[i:end])
+            last_word = ''
+            i = end
+        elif _is_word_char(c):
+            end = i + 1
+            while end < n and (_is_word_char(source[end]) or
+                               (source[end] == '.' and source[i].isdigit())):
+                end += 1
+            word = source[i:end]
+            emit(word)
+            last_word = word
+            i = end
+        else:
+            emit(c)
+            last_word = ''
+            i += 1
+
+    return ''.join(out).strip()
+
+
+def minify(source, kind):
+    """Minify source of the given kind ('css' or 'js')."""
+    return minify_css(source) if kind == 'css' else minify_js(source)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report what minification saves on the given files.")
+    parser.add_argument('files', nargs='+', help=".css or .js files")
+    parser.add_argument('--print', action='store_true', help="write the minified text to stdout instead")
+    args = parser.parse_args(argv)
+
+    for name in args.files:
+        kind = 'css' if name.lower().endswith('.css') else 'js'
+        with open(name, 'r', encoding='utf-8') as f:
+            source = f.read()
+        minified = minify(source, kind)
+        if args.print:
+            sys.stdout.write(minified + '\n')
+            continue
+        before, after = len(source.encode('utf-8')), len(minified.encode('utf-8'))
+        saved = (1 - after / before) * 100 if before else 0
+        print(f"  {name}: {before/1024:.1f}KB → {after/1024:.1f}KB ({saved:.1f}% smaller)")
+
+
+if __name__ == '__main__':
+    main()
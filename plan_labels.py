@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Workout labels for the training plan page (TEMPO BIKE, SWIM BASE +
+LACTATE, ...), assigned from a parsed workout (see triathlon_plan.py)
+while the page is rendered.
+
+Each workout is reduced once to a Signature: discipline, total, and what
+its main set asks for.  The label is that of the first LabelRule for the
+discipline whose test accepts the signature; the last rule for each
+discipline has no test and is its default.
+
+Usage:
+    python plan_labels.py            # every workout's label
+    python plan_labels.py --check    # only labels that differ from the source titles
+"""
+
+import argparse
+import re
+from collections import namedtuple
+
+from triathlon_plan import INTENSITIES, load_plan
+
+LabelRule = namedtuple('LabelRule', 'label sport test', defaults=(None,))
+LabelRule.__doc__ = """
+Label a workout of the given sport; test, if given, is a callable
+(Signature) -> bool the workout must also pass.
+"""
+
+Signature = namedtuple('Signature', 'sport total transition main sets reps rep_seconds work hills')
+Signature.__doc__ = """
+What a workout's label is decided on.
+
+total is seconds (or, for swims, yards); main is the set of intensities
+the main set mentions, sets those of the further sets after it; reps and
+rep_seconds describe main set intervals; work is the seconds spent at
+VO2max; hills is whether the main set is hill climbs.
+"""
+
+_MENTIONED = re.compile(r'\b(' + '|'.join(INTENSITIES) + r')\b', re.IGNORECASE)
+_CANONICAL = {intensity.lower(): intensity for intensity in INTENSITIES}
+
+
+def _mentioned(text):
+    return frozenset(_CANONICAL[found.lower()] for found in _MENTIONED.findall(text))
+
+
+def signature(workout):
+    main, sets = frozenset(), frozenset()
+    reps = rep_seconds = None
+    work = 0
+    hills = False
+    for segment in workout.segments:
+        if segment.kind == 'MS':
+            main = _mentioned(segment.text)
+            reps, rep_seconds = segment.reps, segment.duration
+            hills = 'hill' in segment.text
+        elif segment.kind == 'set' and not segment.label:
+            sets |= _mentioned(segment.text)
+        else:
+            continue
+        if segment.intensity == 'VO2max' and segment.duration:
+            work += (segment.reps or 1) * segment.duration
+    total = workout.total_duration if workout.total_duration is not None else workout.total_distance
+    return Signature(workout.sport, total, workout.transition, main, sets, reps, rep_seconds, work, hills)
+
+
+LABEL_RULES = [
+    LabelRule('RACE DAY!', 'race'),
+    LabelRule('BRICK', 'brick'),
+
+    # Intervals that move between intensities within the main set
+    LabelRule('SWIM FARTLEK + SPRINT', 'swim', lambda s: len(s.main) > 1),
+    LabelRule('SWIM THRESHOLD + SPRINT', 'swim', lambda s: 'threshold' in s.main),
+    LabelRule('SWIM BASE + LACTATE', 'swim', lambda s: 'VO2max' in s.main | s.sets),
+    LabelRule('SWIM BASE', 'swim'),
+
+    # Warm-up and cool-down only
+    LabelRule('RECOVERY BIKE', 'bike', lambda s: not s.main),
+    LabelRule('BIKE SHORT HILL CLIMBS', 'bike', lambda s: s.hills and (s.rep_seconds or 0) <= 60),
+    LabelRule('BIKE LONG HILL CLIMBS', 'bike', lambda s: s.hills),
+    LabelRule('BIKE LACTATE INTERVALS', 'bike', lambda s: 'VO2max' in s.main),
+    LabelRule('TEMPO BIKE', 'bike', lambda s: 'threshold' in s.main),
+    LabelRule('LONG BIKE', 'bike', lambda s: (s.total or 0) >= 2 * 3600),
+    LabelRule('FOUNDATION BIKE', 'bike'),
+
+    LabelRule('TRANSITION RUN', 'run', lambda s: s.transition),
+    LabelRule('TEMPO RUN', 'run', lambda s: 'threshold' in s.main),
+    # Fartlek runs have a few short bursts, lactate intervals 6+ minutes of them
+    LabelRule('RUN LACTATE INTERVALS', 'run', lambda s: s.work >= 6 * 60),
+    LabelRule('FARTLEK RUN', 'run', lambda s: 'VO2max' in s.main),
+    LabelRule('LONG RUN', 'run', lambda s: (s.total or 0) >= 3600),
+    LabelRule('FOUNDATION RUN', 'run'),
+
+    LabelRule('WORKOUT', 'other'),
+]
+
+# sport -> its rules in order, so a workout is only tested against its own
+_RULES = {}
+for _rule in LABEL_RULES:
+    _RULES.setdefault(_rule.sport, []).append(_rule)
+
+
+def classify(workout):
+    """The label shown on a workout's card."""
+    sig = signature(workout)
+    for rule in _RULES.get(workout.sport, _RULES['other']):
+        if rule.test is None or rule.test(sig):
+            return rule.label
+    return 'WORKOUT'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Label the workouts of a training plan.")
+    parser.add_argument('--source', default='blog/tri.txt', help="plan text (default: %(default)s)")
+    parser.add_argument('--check', action='store_true',
+                        help="only show workouts whose label differs from the title in the source")
+    args = parser.parse_args(argv)
+
+    plan = load_plan(args.source)
+    differ = 0
+    for week in plan.weeks:
+        for day in week.days.values():
+            for workout in day.workouts:
+                if workout.sport == 'rest':
+                    continue
+                label = classify(workout)
+                if label != workout.title.upper():
+                    differ += 1
+                elif args.check:
+                    continue
+                print(f"Week {week.number:2} {day.name:9} {label:24} {workout.title} ({workout.total})")
+    print(f"{differ} labels differ from the source titles")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+HTML for the training plan page, rendered from a parsed Plan (see
+triathlon_plan.py).
+
+Templates are compiled once into literal text and {field} slots.
+Rendering never concatenates strings: the page is passed fragment by
+fragment to an emit callable, which is list.append to collect fragments
+(and join them once) or a file's write to stream the page straight to
+disk, so time and memory grow with the fragments written rather than
+with repeated copies of the document.  A field whose value is callable
+is rendered by calling it with emit, which is how templates nest.  Small
+templates (a card and its details) are filled in with format()
+and emitted whole, which is cheaper than a fragment per slot.
+
+Every workout, including race days and both halves of a bike + transition
+run day, uses the same card template.
+"""
+
+import html
+import re
+
+from plan_labels import classify
+from plan_text import normalize_detail
+from triathlon_plan import DAYS
+
+_FIELD = re.compile(r'\{(\w+)\}')
+
+
+class Template:
+    """A template with {name} fields, compiled into (is_field, text) parts."""
+
+    __slots__ = ('parts',)
+
+    def __init__(self, text):
+        pieces = _FIELD.split(text)
+        # split() alternates literal text and field names
+        self.parts = tuple((bool(n % 2), piece) for n, piece in enumerate(pieces) if piece or n % 2)
+
+    def format(self, **values):
+        """The filled-in text, for values that are all strings."""
+        return ''.join([values[text] if is_field else text for is_field, text in self.parts])
+
+    def render(self, emit, **values):
+        for is_field, text in self.parts:
+            if not is_field:
+                emit(text)
+                continue
+            value = values[text]
+            if callable(value):
+                value(emit)
+            else:
+                emit(value)
+
+
+PHASE = Template('<div class="phase-header">{title}</div>\n')
+
+WEEK = Template('''<div class="week-wrapper">
+<div class="table-wrapper">
+<div class="week-label">WEEK {number}</div>
+<table>
+<thead><tr>
+''' + ''.join(f'<th>{day}</th>' for day in DAYS) + '''
+</tr></thead>
+<tbody><tr>
+{days}
+</tr></tbody>
+</table>
+</div>
+</div>
+
+''')
+
+REST_DAY = '<td class="rest-day">REST</td>'
+DAY = Template('<td>{cards}</td>')
+
+CARD = Template('''<div class="workout-card {card_class}">
+        <div class="workout-header">
+            <div class="workout-type"><span class="workout-icon">{icon}</span> {workout_type}</div>
+            <span class="workout-duration">{duration}</span>
+        </div>
+        <ul class="workout-details">{details}</ul></div>''')
+
+DETAIL = Template('''
+            <li>
+                <span class="bullet">▸</span>
+                <div class="detail-content">
+                    {label}<span class="detail-part">{content}</span>
+                </div>
+            </li>''')
+
+LABEL = Template('<span class="detail-part"><span class="label">{label}:</span></span>\n                    ')
+
+SOURCE_LINK = '''<div class="source-link">
+    <p><strong>Source:</strong> This training plan is adapted from
+    <a href="https://www.triathlete.com/training/olympic-triathlon-16-week-training-plan/" target="_blank">
+    Triathlete Magazine's 16-Week Olympic Triathlon Training Plan</a></p>
+</div>
+'''
+
+# sport -> (icon, card class); the card's label comes from plan_labels.py
+WORKOUT_TYPES = {
+    'brick': ('🏋️', 'brick-card'),
+    'race': ('🏁', 'race-card'),
+    'swim': ('🏊', 'swim-card'),
+    'bike': ('🚴', 'bike-card'),
+    'run': ('🏃', 'run-card'),
+    'other': ('💪', 'brick-card'),
+}
+
+# Unit swim distances are shown in (see triathlon_plan.DISTANCE_UNITS)
+PAGE_UNIT = 'pool'
+
+# Phase name in the plan source -> what the phase header says it is for,
+# unless the source gives a tagline
+PHASE_TAGLINES = {
+    'base': 'Build Aerobic Capacity & Endurance',
+    'build': 'High-Intensity & Endurance Development',
+    'peak': 'Race-Specific Training & Taper',
+}
+
+
+def format_total(workout, unit=PAGE_UNIT):
+    """Workout duration/distance for the card header: 800m, 45 min, 1:15."""
+    distance = workout.total_distance
+    if distance is not None:
+        return distance.format(unit)
+    duration = workout.total_duration
+    if duration is not None:
+        return duration.format()
+    # Not a quantity the parser knows: shorten the text as written
+    return normalize_detail(workout.total)
+
+
+def render_details(workout):
+    """The <li> items of a workout card."""
+    items = []
+    for segment in workout.segments:
+        # Race day notes are shown as written
+        text = segment.text if workout.sport == 'race' else normalize_detail(segment.text)
+        label = LABEL.format(label=segment.label) if segment.label else ''
+        items.append(DETAIL.format(label=label, content=html.escape(text, quote=False)))
+    return ''.join(items)
+
+
+def render_card(emit, workout, unit=PAGE_UNIT):
+    icon, card_class = WORKOUT_TYPES[workout.sport]
+    emit(CARD.format(card_class=card_class, icon=icon, workout_type=classify(workout),
+                     duration=format_total(workout, unit), details=render_details(workout)))
+
+
+def render_day(emit, day, unit=PAGE_UNIT):
+    if day is None or day.is_rest:
+        emit(REST_DAY)
+        return
+    # A bike workout followed by a transition run gets a card for each
+    DAY.render(emit, cards=lambda out: [render_card(out, workout, unit) for workout in day.workouts])
+
+
+def render_week(emit, week, unit=PAGE_UNIT):
+    WEEK.render(emit, number=str(week.number),
+                days=lambda out: [render_day(out, week.days.get(name), unit) for name in DAYS])
+
+
+def phase_title(phase):
+    """The phase header's HTML; the name and tagline come from the source and are escaped."""
+    title = f"{phase.name.upper()} PHASE (Weeks {phase.first_week}-{phase.last_week})"
+    tagline = phase.tagline or PHASE_TAGLINES.get(phase.name)
+    return html.escape(f"{title} - {tagline}" if tagline else title, quote=False)
+
+
+def render_schedule(emit, plan, unit=PAGE_UNIT):
+    """The plan's schedule section: a header per phase, a table per week, the source link."""
+    for phase in plan.phases:
+        emit(PHASE.format(title=phase_title(phase)))
+        for week in phase.weeks:
+            render_week(emit, week, unit)
+    emit(SOURCE_LINK)
+
+
+def schedule_html(plan, unit=PAGE_UNIT):
+    """The schedule section as one string."""
+    fragments = []
+    render_schedule(fragments.append, plan, unit)
+    return ''.join(fragments)
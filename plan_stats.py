@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Training volume and intensity of a plan, per week and discipline.
+
+The parsed plan (see triathlon_plan.py) is flattened once into arrays:
+one entry per workout (week, discipline, time, distance) and one per
+segment with an intensity (week, intensity, time, distance).  Each table
+is then a single np.add.at over those arrays; work the plan gives no
+intensity for (drills, recoveries, the rest of an open-ended set) is
+what is left of each week's volume.  Swims are measured by distance and
+everything else by time, as the plan writes them.
+
+Usage:
+    python plan_stats.py                     # tables for blog/tri.txt
+    python plan_stats.py --unit m            # swim distances in meters
+    python plan_stats.py --json -o plan-stats.json   # chart data
+"""
+
+import argparse
+import json
+import sys
+
+try:
+    import numpy as np
+except ImportError:
+    print("Error: NumPy not found.")
+    print("Please install it with: pip install numpy")
+    sys.exit(1)
+
+from build_utils import atomic_open
+from triathlon_plan import DISTANCE_UNITS, INTENSITIES, SOURCE_FILE, load_plan
+
+DISCIPLINES = ('swim', 'bike', 'run', 'brick')
+ZONES = INTENSITIES + ('unspecified',)
+
+
+def plan_arrays(plan):
+    """The plan flattened into (weeks, workouts, segments) arrays; see the module docstring."""
+    weeks = [week.number for week in plan.weeks]
+    workouts = {'week': [], 'discipline': [], 'time': [], 'distance': []}
+    segments = {'week': [], 'zone': [], 'time': [], 'distance': []}
+    for w, week in enumerate(plan.weeks):
+        for day in week.days.values():
+            for workout in day.workouts:
+                if workout.sport not in DISCIPLINES:
+                    continue
+                workouts['week'].append(w)
+                workouts['discipline'].append(DISCIPLINES.index(workout.sport))
+                workouts['time'].append(workout.total_duration or 0)
+                workouts['distance'].append(workout.total_distance or 0)
+                for segment in workout.segments:
+                    if segment.intensity is None:
+                        continue
+                    segments['week'].append(w)
+                    segments['zone'].append(INTENSITIES.index(segment.intensity))
+                    # Work only: recoveries count as unspecified
+                    segments['time'].append((segment.reps or 1) * (segment.duration or 0))
+                    segments['distance'].append(segment.total_distance or 0)
+    as_arrays = lambda columns: {name: np.asarray(values, dtype=np.int64) for name, values in columns.items()}
+    return weeks, as_arrays(workouts), as_arrays(segments)
+
+
+def summarize(plan):
+    """
+    Per-week tables as NumPy arrays:
+
+    sessions, time, distance: weeks x DISCIPLINES (seconds, yards)
+    time_zones, distance_zones: weeks x ZONES (seconds, yards)
+    """
+    weeks, workouts, segments = plan_arrays(plan)
+    shape = (len(weeks), len(DISCIPLINES))
+    sessions, time, distance = np.zeros(shape, np.int64), np.zeros(shape, np.int64), np.zeros(shape, np.int64)
+    at = (workouts['week'], workouts['discipline'])
+    np.add.at(sessions, at, 1)
+    np.add.at(time, at, workouts['time'])
+    np.add.at(distance, at, workouts['distance'])
+
+    zone_shape = (len(weeks), len(ZONES))
+    time_zones, distance_zones = np.zeros(zone_shape, np.int64), np.zeros(zone_shape, np.int64)
+    at = (segments['week'], segments['zone'])
+    np.add.at(time_zones, at, segments['time'])
+    np.add.at(distance_zones, at, segments['distance'])
+    time_zones[:, -1] = time.sum(axis=1) - time_zones[:, :-1].sum(axis=1)
+    distance_zones[:, -1] = distance.sum(axis=1) - distance_zones[:, :-1].sum(axis=1)
+
+    return {'weeks': weeks, 'sessions': sessions, 'time': time, 'distance': distance,
+            'time_zones': time_zones, 'distance_zones': distance_zones}
+
+
+def chart_data(plan, summary, unit='yd'):
+    """The summary as JSON-ready series: time in minutes, distance in the given unit."""
+    scale, suffix = DISTANCE_UNITS[unit]
+    minutes = lambda table: np.round(table / 60, 1).tolist()
+    distances = lambda table: np.round(table * scale).astype(int).tolist()
+    return {
+        'title': plan.title,
+        'weeks': summary['weeks'],
+        'phases': [{'name': phase.name, 'first_week': phase.first_week, 'last_week': phase.last_week}
+                   for phase in plan.phases],
+        'units': {'time': 'min', 'distance': suffix},
+        'sessions': {name: summary['sessions'][:, n].tolist() for n, name in enumerate(DISCIPLINES)},
+        'time': {name: minutes(summary['time'][:, n]) for n, name in enumerate(DISCIPLINES)},
+        'distance': {name: distances(summary['distance'][:, n]) for n, name in enumerate(DISCIPLINES)},
+        'intensity': {
+            'time': {zone: minutes(summary['time_zones'][:, n]) for n, zone in enumerate(ZONES)},
+            'distance': {zone: distances(summary['distance_zones'][:, n]) for n, zone in enumerate(ZONES)},
+        },
+    }
+
+
+def print_table(title, weeks, columns, rows):
+    width = max(9, *(len(column) + 1 for column in columns))
+    print(title)
+    print('Week' + ''.join(f"{column:>{width}}" for column in columns))
+    for week, row in zip(weeks, rows):
+        print(f"{week:>4}" + ''.join(f"{value:>{width}}" for value in row))
+    print()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-week training volume and intensity of a plan.")
+    parser.add_argument('source', nargs='?', default=SOURCE_FILE, help="plan text (default: %(default)s)")
+    parser.add_argument('--unit', choices=sorted(DISTANCE_UNITS), default='yd',
+                        help="unit swim distances are shown in (default: %(default)s)")
+    parser.add_argument('--json', action='store_true', help="write chart data as JSON instead of tables")
+    parser.add_argument('-o', '--output', help="file to write the JSON to (default: stdout)")
+    args = parser.parse_args(argv)
+
+    plan = load_plan(args.source)
+    summary = summarize(plan)
+
+    if args.json:
+        text = json.dumps(chart_data(plan, summary, args.unit), separators=(',', ':'), ensure_ascii=False) + '\n'
+        if args.output:
+            with atomic_open(args.output) as f:
+                f.write(text)
+            print(f"Wrote {args.output}")
+        else:
+            sys.stdout.write(text)
+        return
+
+    scale, suffix = DISTANCE_UNITS[args.unit]
+    weeks = summary['weeks']
+    minutes = np.round(summary['time'] / 60, 1)
+    volume = [[f"{round(swum * scale)}{suffix}"] + [f"{value:g} min" for value in timed] + [str(sessions)]
+              for swum, timed, sessions in zip(summary['distance'][:, 0], minutes[:, 1:],
+                                               summary['sessions'].sum(axis=1))]
+    print(plan.title or args.source)
+    print()
+    print_table("Volume", weeks, list(DISCIPLINES) + ['sessions'], volume)
+    print_table("Bike, run and brick time by intensity (min)", weeks, ZONES,
+                [[f"{value:g}" for value in row] for row in np.round(summary['time_zones'] / 60, 1)])
+    print_table(f"Swim distance by intensity ({suffix})", weeks, ZONES,
+                [[str(value) for value in row] for row in np.round(summary['distance_zones'] * scale).astype(int)])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Display normalization of training plan text.
+
+The workout details in tri.txt are shortened for the plan page ("200
+Yards @ low aerobic intensity" -> "200m @ easy", "4 x 25" -> "4 ×25").
+The rewrites are a declarative table of TextRules, compiled into one
+regex (an alternation of the rule patterns, each in its own group) so a
+line is rewritten in a single scan, with a callback dispatching each
+match to its rule.  Rules only ever see the original text, never each
+other's output, so their order matters only where two could match at
+the same position (the earlier one wins).
+
+Usage:
+    python plan_text.py "4 x 100 @ VO2max intensity, RI=1:00"
+    python plan_text.py --benchmark      # against chained re.sub calls
+"""
+
+import argparse
+import re
+import timeit
+from collections import namedtuple
+
+from triathlon_plan import load_plan
+
+TextRule = namedtuple('TextRule', 'name pattern replacement starts', defaults=(None,))
+TextRule.__doc__ = """
+Rewrite every match of pattern.
+
+replacement is a template (\\1 refers to the pattern's own groups) or a
+callable (match groups tuple) -> string.  starts, if given, is a regex
+character class body ('0-9', 'Mm') of the characters a match can start
+with; when every rule has one, the combined pattern skips other
+positions without trying each rule there.
+"""
+
+
+class RuleSet:
+    """TextRules compiled into one pattern, applied in one pass."""
+
+    def __init__(self, rules, flags=0):
+        self.rules = list(rules)
+        parts = []
+        self._dispatch = {}
+        group = 1
+        for n, rule in enumerate(self.rules):
+            count = re.compile(rule.pattern, flags).groups
+            parts.append(f"(?P<r{n}>{rule.pattern})")
+            # The rule's own groups follow its wrapping group
+            self._dispatch[f"r{n}"] = (rule.name, self._replacer(rule.replacement, group + 1, count))
+            group += 1 + count
+        pattern = '|'.join(parts)
+        if all(rule.starts for rule in self.rules):
+            pattern = f"(?=[{''.join(rule.starts for rule in self.rules)}])(?:{pattern})"
+        self.pattern = re.compile(pattern, flags)
+
+    @staticmethod
+    def _replacer(replacement, first, count):
+        """match -> replacement text, with the rule's group references resolved in advance."""
+        if callable(replacement):
+            return lambda match: replacement(match.groups()[first - 1:first - 1 + count])
+        pieces = re.split(r'\\(\d)', replacement)
+        if len(pieces) == 1:
+            return lambda match: replacement
+        # Literal text alternates with group numbers
+        groups = [first + int(ref) - 1 for ref in pieces[1::2]]
+        literals = pieces[::2]
+
+        def expand(match):
+            out = [literals[0]]
+            for number, literal in zip(groups, literals[1:]):
+                out.append(match.group(number) or '')
+                out.append(literal)
+            return ''.join(out)
+        return expand
+
+    def apply(self, text, fired=None):
+        """Rewrite text; fired (a dict) is updated with the number of matches per rule name."""
+        dispatch = self._dispatch
+        if fired is None:
+            return self.pattern.sub(lambda match: dispatch[match.lastgroup][1](match), text)
+
+        def replace(match):
+            name, replacer = dispatch[match.lastgroup]
+            fired[name] = fired.get(name, 0) + 1
+            return replacer(match)
+        return self.pattern.sub(replace, text)
+
+
+# Workout details and totals as shown on the plan page
+DETAIL_RULES = [
+    # Yards are shown as meters 1:1 (the 'pool' unit in triathlon_plan.DISTANCE_UNITS)
+    TextRule('yards', r'(\d+)\s*Yards?\b', r'\1m', '0-9'),
+    TextRule('hours', r'(\d+)\s*Hours?\b', r'\1:00', '0-9'),
+    TextRule('at', r'(\d+)\s*@', r'\1 @', '0-9'),
+    TextRule('low', r'low aerobic intensity', 'easy', 'l'),
+    TextRule('moderate', r'moderate aerobic intensity', 'moderate', 'm'),
+    TextRule('threshold', r'threshold intensity', 'threshold', 't'),
+    TextRule('recovery', r'recovery intensity', 'recovery', 'r'),
+    TextRule('vo2max', r'VO2max intensity', 'VO2max', 'V'),
+    TextRule('speed', r'speed intensity', 'speed', 's'),
+    TextRule('minutes', r'\b[Mm]inutes\b', 'min', 'Mm'),
+    # "4 x 25": only a standalone x, not the one in "VO2max"
+    TextRule('times', r'\bx\b\s*', '×', 'x'),
+]
+
+DETAILS = RuleSet(DETAIL_RULES)
+
+
+def normalize_detail(text):
+    """Shorten a workout detail (or total) for display."""
+    return DETAILS.apply(text)
+
+
+def _chained_normalize(content):
+    """The sequential re.sub calls DETAIL_RULES replaced, kept for --benchmark."""
+    content = re.sub(r'(\d+)\s*Yards?', r'\1m', content)
+    content = re.sub(r'(\d+)\s*@', r'\1 @', content)
+    content = re.sub(r'low aerobic intensity', 'easy', content)
+    content = re.sub(r'moderate aerobic intensity', 'moderate', content)
+    content = re.sub(r'threshold intensity', 'threshold', content)
+    content = re.sub(r'recovery intensity', 'recovery', content)
+    content = re.sub(r'VO2max intensity', 'VO2max', content)
+    content = re.sub(r'speed intensity', 'speed', content)
+    content = re.sub(r'Minutes', 'min', content)
+    content = re.sub(r'minutes', 'min', content)
+    content = re.sub(r'x\s*', '×', content)
+    return content
+
+
+def benchmark(lines, repeat=5):
+    """Best time per pass over lines for (chained, one-pass), and the lines whose output differs."""
+    chained = min(timeit.repeat(lambda: [_chained_normalize(line) for line in lines], number=20, repeat=repeat)) / 20
+    one_pass = min(timeit.repeat(lambda: [normalize_detail(line) for line in lines], number=20, repeat=repeat)) / 20
+    differences = [(line, _chained_normalize(line), normalize_detail(line)) for line in lines
+                   if _chained_normalize(line) != normalize_detail(line)]
+    return chained, one_pass, differences
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Normalize training plan text for display.")
+    parser.add_argument('text', nargs='*', help="text to normalize")
+    parser.add_argument('--benchmark', action='store_true',
+                        help="time the rule table against chained re.sub calls on the plan's detail lines")
+    parser.add_argument('--source', default='blog/tri.txt', help="plan text for --benchmark (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    for text in args.text:
+        print(normalize_detail(text))
+    if not args.benchmark:
+        return
+
+    plan = load_plan(args.source)
+    lines = [segment.text for week in plan.weeks for day in week.days.values()
+             for workout in day.workouts for segment in workout.segments]
+    chained, one_pass, differences = benchmark(lines)
+    print(f"{len(lines)} detail lines, {len(DETAIL_RULES)} rules")
+    print(f"  chained re.sub: {chained * 1000:.2f}ms per pass")
+    print(f"  one-pass table: {one_pass * 1000:.2f}ms per pass ({chained / one_pass:.1f}x)")
+    print(f"  {len(differences)} lines differ:")
+    for line, old, new in differences[:10]:
+        print(f"    {line}\n      chained:  {old}\n      one-pass: {new}")
+
+
+if __name__ == '__main__':
+    main()
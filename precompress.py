@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Precompress the published text assets.
+
+Writes page.html.gz (gzip, level 9) and, if the brotli module is
+installed, page.html.br (quality 11) next to every HTML, CSS, JS, SVG,
+XML, JSON and text file in the published site, so a static server or CDN
+can serve them as is (e.g. nginx gzip_static / brotli_static) instead of
+compressing on every request.  A sibling is only kept when it is smaller
+than the original.
+
+Files are compressed in a process pool.  .precompress-manifest.json
+records each file's content hash; a file whose hash is unchanged and whose
+siblings still exist is skipped, and siblings of files that no longer
+exist are removed.
+
+Usage:
+    python precompress.py           # compress _site/
+    python precompress.py public    # compress another directory
+"""
+
+import argparse
+import gzip
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import site_index
+from build_utils import atomic_write_bytes, load_manifest, save_manifest, sha256_bytes
+from publish_site import OUTPUT_DIR
+
+try:
+    import brotli
+except ImportError:
+    # Optional: without it only .gz siblings are written
+    brotli = None
+
+MANIFEST_NAME = '.precompress-manifest.json'
+MANIFEST_VERSION = 1
+
+TEXT_KINDS = ('html', 'css', 'js', 'svg', 'xml', 'json', 'text')
+# Below this, the response headers outweigh anything compression saves
+MIN_SIZE = 256
+
+
+def _gzip(data):
+    # mtime=0 keeps the output identical for identical input
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def _brotli(data):
+    return brotli.compress(data, quality=11)
+
+
+def encoders():
+    """{sibling suffix: compress function} for the encodings available here."""
+    available = {'.gz': _gzip}
+    if brotli is not None:
+        available['.br'] = _brotli
+    return available
+
+
+def compress_file(path, entry=None):
+    """
+    Write the compressed siblings of one file.
+
+    entry is the file's manifest record from the last run.  Returns
+    (source size, {suffix: compressed size or None if not smaller},
+    new_entry), with sizes None when the file was skipped as up to date.
+    """
+    data = path.read_bytes()
+    digest = sha256_bytes(data)
+    codecs = encoders()
+    if (entry is not None and entry['sha256'] == digest and set(codecs) <= set(entry['sizes'])
+            and all(size is None or Path(f"{path}{suffix}").exists()
+                    for suffix, size in entry['sizes'].items())):
+        return len(data), None, entry
+
+    sizes = {}
+    for suffix, compress in codecs.items():
+        sibling = Path(f"{path}{suffix}")
+        compressed = compress(data)
+        if len(compressed) < len(data):
+            atomic_write_bytes(sibling, compressed)
+            sizes[suffix] = len(compressed)
+        else:
+            sibling.unlink(missing_ok=True)
+            sizes[suffix] = None
+    return len(data), sizes, {'sha256': digest, 'sizes': sizes}
+
+
+def _compress_task(path, entry):
+    """Process-pool entry point: never raises, returns the error text instead."""
+    try:
+        return (*compress_file(path, entry), None)
+    except Exception as e:
+        return 0, None, entry, str(e)
+
+
+def find_text_files(directory):
+    """Text assets in directory worth compressing, as Paths."""
+    index = site_index.scan(directory, use_cache=False)
+    return [Path(directory) / rel for rel, (kind, size, _) in index.items()
+            if kind in TEXT_KINDS and size >= MIN_SIZE]
+
+
+def precompress(root_dir, directory=OUTPUT_DIR, workers=1):
+    """
+    Compress every text asset under root_dir/directory, yielding
+    (rel path, source size, sizes, error) in path order; sizes is None for
+    files skipped as up to date.
+    """
+    root = Path(root_dir).resolve()
+    target = (root / directory).resolve()
+    manifest_path = root / MANIFEST_NAME
+    manifest = load_manifest(manifest_path, MANIFEST_VERSION)
+    if manifest.get('directory') != str(target):
+        manifest = {'version': MANIFEST_VERSION, 'entries': {}, 'directory': str(target)}
+    old_entries = manifest['entries']
+    entries = {}
+
+    paths = find_text_files(target)
+    rels = [path.relative_to(target).as_posix() for path in paths]
+    try:
+        with ProcessPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = [executor.submit(_compress_task, path, old_entries.get(rel))
+                       for path, rel in zip(paths, rels)]
+            for rel, future in zip(rels, futures):
+                try:
+                    size, sizes, entry, error = future.result()
+                except Exception as e:
+                    # Worker process crashed
+                    size, sizes, entry, error = 0, None, None, f"worker failed: {e!r}"
+                if entry is not None:
+                    entries[rel] = entry
+                yield rel, size, sizes, error
+
+        # Siblings of files that were removed since the last run
+        for rel in sorted(set(old_entries) - set(entries)):
+            for suffix in old_entries[rel]['sizes']:
+                (target / f"{rel}{suffix}").unlink(missing_ok=True)
+    finally:
+        manifest['entries'] = entries
+        save_manifest(manifest_path, manifest)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Write .gz/.br siblings of the published text assets.")
+    parser.add_argument('directory', nargs='?', default=OUTPUT_DIR,
+                        help="directory to compress, relative to the site root (default: %(default)s)")
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1,
+                        help="number of compressor processes (default: CPU count)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    root_dir = Path.cwd()
+    if not (root_dir / args.directory).is_dir():
+        print(f"Error: {args.directory}/ does not exist (run publish_site.py first)")
+        sys.exit(1)
+
+    print("=" * 70)
+    print(f"Precompressing {args.directory}/ ({', '.join(encoders())})")
+    if brotli is None:
+        print("Note: brotli library not found, writing .gz files only.")
+        print("      Install it with: pip install brotli")
+    print("=" * 70)
+
+    totals = dict.fromkeys(encoders(), 0)
+    total_source = compressed_count = skipped = failed = 0
+    for rel, size, sizes, error in precompress(root_dir, args.directory, args.workers):
+        if error:
+            print(f"  ✗ {rel}: {error}")
+            failed += 1
+            continue
+        if sizes is None:
+            skipped += 1
+            continue
+        compressed_count += 1
+        total_source += size
+        parts = []
+        for suffix, compressed in sizes.items():
+            compressed = size if compressed is None else compressed
+            totals[suffix] += compressed
+            parts.append(f"{suffix} {compressed/1024:.1f}KB (-{(1 - compressed / size) * 100:.0f}%)")
+        print(f"  {rel}: {size/1024:.1f}KB → {', '.join(parts)}")
+
+    print("\n" + "=" * 70)
+    print("Precompression Summary:")
+    print(f"  Files compressed: {compressed_count}")
+    print(f"  Skipped (unchanged): {skipped}")
+    print(f"  Failed: {failed}")
+    for suffix, total in totals.items():
+        if total_source:
+            print(f"  {suffix}: {total_source/1024:.1f}KB → {total/1024:.1f}KB "
+                  f"(saved {(total_source - total)/1024:.1f}KB, {(1 - total / total_source) * 100:.1f}%)")
+    print("=" * 70)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Inline nav.html and footer.html into every page at build time.
+
+js/nav-loader.js used to build the navigation and footer from template
+strings and inject them after the page loaded.  This step writes the same
+markup straight into each page's #nav-container / #footer-container, with
+links prefixed ../ for pages one directory down (blog/), and the current
+page's menu link marked active.  nav-loader.js now only fills a container
+that is still empty.
+
+Each inlined block is wrapped in marker comments carrying a hash of what
+was rendered:
+
+    <div id="nav-container"><!-- partial:nav.html 3f2a9c1b7d4e -->
+    ...
+    <!-- /partial:nav.html --></div>
+
+so a page whose markers already carry the current hashes is left untouched,
+and after editing a partial only the pages that include it are rewritten.
+"""
+
+import argparse
+import hashlib
+import posixpath
+import re
+from pathlib import Path
+
+import site_index
+from build_utils import atomic_write_bytes
+
+# container id -> partial file, relative to the site root
+PARTIALS = {
+    'nav-container': 'nav.html',
+    'footer-container': 'footer.html',
+}
+
+# An empty container, or one holding a previously inlined partial
+CONTAINER_PATTERN = re.compile(
+    r'<div id="(?P<id>' + '|'.join(re.escape(c) for c in PARTIALS) + r')">'
+    r'(?:<!-- partial:(?P<name>[^ ]+) [0-9a-f]+ -->.*?<!-- /partial:(?P=name) -->)?'
+    r'</div>',
+    re.DOTALL
+)
+
+# Relative links inside a partial that need the page's path prefix
+LINK_PATTERN = re.compile(r'''\b(href|src)="(?![a-z][a-z0-9+.-]*:|/|#)([^"]*)"''', re.IGNORECASE)
+
+
+def prefix_links(markup, prefix):
+    """Prefix every relative href/src in markup (e.g. with ../)."""
+    if not prefix:
+        return markup
+    return LINK_PATTERN.sub(lambda m: f'{m.group(1)}="{prefix}{m.group(2)}"', markup)
+
+
+def mark_active(markup, href):
+    """Add class="active" to the link pointing at href (what setActivePage did at runtime)."""
+    return markup.replace(f'<a href="{href}">', f'<a href="{href}" class="active">', 1)
+
+
+def render_partial(name, source, prefix, active):
+    """Return (marker hash, wrapped markup) for one partial on one page."""
+    markup = mark_active(prefix_links(source.rstrip('\n'), prefix), prefix + active)
+    digest = hashlib.sha256(markup.encode('utf-8')).hexdigest()[:12]
+    return digest, f'<!-- partial:{name} {digest} -->\n{markup}\n<!-- /partial:{name} -->'
+
+
+def page_context(rel_path):
+    """(link prefix, active menu page) for a root-relative page path."""
+    directory, page = posixpath.split(rel_path)
+    depth = len(directory.split('/')) if directory else 0
+    # Blog posts and the older listing pages (blog-2.html, ...) highlight
+    # the blog entry of the menu
+    active = 'blog.html' if directory == 'blog' or re.fullmatch(r'blog-\d+\.html', page) else page
+    return '../' * depth, active
+
+
+def prerender_page(content, rel_path, partials):
+    """
+    Inline the partials into one page's content.
+
+    partials maps a partial name to its source text.  When every container
+    already holds the current rendering (checked by its marker), content is
+    returned as is without substituting.
+    """
+    prefix, active = page_context(rel_path)
+    rendered = {name: render_partial(name, source, prefix, active) for name, source in partials.items()}
+
+    stale = [name for container, name in PARTIALS.items()
+             if f'<div id="{container}">' in content
+             and f'<!-- partial:{name} {rendered[name][0]} -->' not in content]
+    if not stale:
+        return content
+
+    def substitute(match):
+        name = PARTIALS[match.group('id')]
+        return f'<div id="{match.group("id")}">{rendered[name][1]}</div>'
+
+    return CONTAINER_PATTERN.sub(substitute, content)
+
+
+def prerender_all(root_dir, pages=None):
+    """
+    Prerender the given pages (default: every HTML page in the site index).
+
+    Returns (updated rel paths, number of container pages already current);
+    pages without a container are ignored.
+    """
+    root = Path(root_dir)
+    partials = {name: (root / name).read_text(encoding='utf-8') for name in PARTIALS.values()}
+    if pages is None:
+        pages = site_index.files_of_kind(root, site_index.scan(root), 'html')
+
+    updated, unchanged = [], 0
+    for path in pages:
+        content = path.read_text(encoding='utf-8', errors='ignore')
+        if not any(f'<div id="{container}">' in content for container in PARTIALS):
+            continue
+        rel = path.relative_to(root).as_posix()
+        new_content = prerender_page(content, rel, partials)
+        if new_content == content:
+            unchanged += 1
+            continue
+        atomic_write_bytes(path, new_content.encode('utf-8'))
+        updated.append(rel)
+    return updated, unchanged
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Inline nav.html and footer.html into the site's pages.")
+    parser.add_argument('pages', nargs='*', help="pages to prerender (default: every page with a container)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    root_dir = Path.cwd()
+    pages = [(root_dir / page).resolve() for page in args.pages] if args.pages else None
+
+    updated, unchanged = prerender_all(root_dir, pages)
+    for rel in updated:
+        print(f"✓ Prerendered {rel}")
+    print(f"\n{len(updated)} updated, {unchanged} already current")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Build the publishable copy of the site in _site/.
+
+The pages in the repository stay the editable sources.  The published copy
+differs in four ways:
+
+- in every page, each run of local stylesheets (and each run of local
+  scripts) is replaced by one minified bundle with a content-hashed name,
+  e.g. assets/bundle.3f2a9c1b7d.css, so browsers can cache it for good;
+  pages using the same files share the bundle;
+- the stylesheet bundle loads asynchronously, after an inline <style>
+  with the page's critical rules (see critical_css.py), so it no longer
+  blocks the first paint;
+- inline <script> and <style> blocks are minified (see minify.py), and
+  each page's copy of the pre-paint theme script is replaced by the one
+  shared snippet in js/theme-init.js;
+- editor backups and scratch files (*~, *.backup, _temp.html, ...), dot
+  files, git-ignored files and the Python build scripts are not copied.
+
+Everything else is copied unchanged.  Copies are skipped when the source's
+size and mtime match the last publish (.publish-manifest.json); pages and
+bundles are always regenerated but only written when their content changes
+(the manifest records each page's content hash; bundle names carry theirs),
+and files left over from earlier publishes are removed.
+
+Usage:
+    python publish_site.py             # publish into _site/
+    python publish_site.py -o public   # publish somewhere else
+    python publish_site.py --no-critical-css
+"""
+
+import argparse
+import html
+import posixpath
+import re
+import shutil
+import subprocess
+from pathlib import Path
+
+import site_index
+from build_utils import atomic_write_bytes, load_manifest, save_manifest, sha256_bytes
+from critical_css import extract as critical_css, fold_elements
+from html_transform import tokenize
+from minify import minify
+
+OUTPUT_DIR = '_site'
+ASSETS_DIR = 'assets'
+HASH_LENGTH = 10
+
+MANIFEST_NAME = '.publish-manifest.json'
+# Bump when the minifiers or the page rewriting change, to regenerate everything
+PUBLISH_VERSION = 2
+
+# Never published, in addition to site_index's skipped backups and scratch files
+EXCLUDED_KINDS = ('python',)
+
+# Script types that hold JavaScript (anything else, e.g. text/x-sage, is data)
+JS_TYPES = (None, '', 'text/javascript', 'application/javascript', 'module')
+
+# Shared pre-paint theme script, and what identifies a page's own copy of it
+THEME_SCRIPT = 'js/theme-init.js'
+THEME_SCRIPT_MARKERS = ("setAttribute('data-theme'", "getItem('theme')")
+
+URL_PATTERN = re.compile(r'''url\(\s*(['"]?)([^'")]+)\1\s*\)''')
+
+
+def is_local(url):
+    """A site-relative reference without scheme, query or fragment."""
+    return bool(url) and not re.match(r'[a-z][a-z0-9+.-]*:|//', url, re.IGNORECASE) and not re.search(r'[?#]', url)
+
+
+def published_files(root):
+    """The site index minus what is never published; prefers git's view of ignored files."""
+    try:
+        index = site_index.scan(root, use_git=True)
+    except (OSError, subprocess.CalledProcessError):
+        index = site_index.scan(root)
+    return {rel: entry for rel, entry in index.items()
+            if entry[0] not in EXCLUDED_KINDS
+            and not any(part.startswith('.') for part in rel.split('/'))}
+
+
+def resolve(page_rel, url):
+    """Root-relative path of url as referenced from page_rel."""
+    if url.startswith('/'):
+        return posixpath.normpath(url.lstrip('/'))
+    return posixpath.normpath(posixpath.join(posixpath.dirname(page_rel), url))
+
+
+def relative(target_rel, from_rel):
+    """target_rel as referenced from the file from_rel."""
+    return posixpath.relpath(target_rel, posixpath.dirname(from_rel) or '.')
+
+
+def rebase_css(source, source_rel, target_dir):
+    """Rewrite relative url()s in a stylesheet moving from source_rel into target_dir."""
+    def rebase(match):
+        quote, url = match.groups()
+        if not is_local(url) or url.startswith('/'):
+            return match.group(0)
+        return f'url({quote}{posixpath.relpath(resolve(source_rel, url), target_dir)}{quote})'
+    return URL_PATTERN.sub(rebase, source)
+
+
+class Bundler:
+    """Builds and names bundles; identical source lists share one bundle."""
+
+    def __init__(self, root):
+        self.root = root
+        self.bundles = {}  # (kind, sources) -> (rel path, bytes)
+        self.texts = {}    # rel path -> text
+        self._theme_snippet = False
+
+    def text(self, name):
+        """Text of a bundle built earlier."""
+        return self.texts[name]
+
+    def theme_snippet(self):
+        """The minified shared theme script, or None if the site has none."""
+        if self._theme_snippet is False:
+            path = self.root / THEME_SCRIPT
+            self._theme_snippet = minify(path.read_text(encoding='utf-8'), 'js') if path.exists() else None
+        return self._theme_snippet
+
+    def bundle(self, kind, sources):
+        key = (kind, tuple(sources))
+        if key not in self.bundles:
+            parts = []
+            for rel in sources:
+                text = (self.root / rel).read_text(encoding='utf-8')
+                if kind == 'css':
+                    text = rebase_css(text, rel, ASSETS_DIR)
+                parts.append(minify(text, kind))
+            # ';' guards against a script that ends without one
+            data = ('\n' if kind == 'css' else ';\n').join(parts).encode('utf-8') + b'\n'
+            stem = posixpath.splitext(posixpath.basename(sources[0]))[0] if len(sources) == 1 else 'bundle'
+            name = f'{ASSETS_DIR}/{stem}.{sha256_bytes(data)[:HASH_LENGTH]}.{kind}'
+            self.bundles[key] = (name, data)
+            self.texts[name] = data.decode('utf-8')
+        return self.bundles[key][0]
+
+
+def _asset_ref(tokens, i, page_rel, files):
+    """
+    If tokens[i] starts a local stylesheet <link> or an empty <script src>,
+    return (kind, source rel path, other attributes, index past it).
+    """
+    token = tokens[i]
+    if token.kind not in ('starttag', 'startendtag'):
+        return None
+    attrs = token.attrs
+    if token.tag == 'link' and (attrs.get('rel') or '').lower() == 'stylesheet':
+        kind, url = 'css', attrs.get('href')
+        end = i + 1
+    elif (token.tag == 'script' and token.kind == 'starttag' and attrs.get('type') in JS_TYPES
+          and i + 1 < len(tokens) and tokens[i + 1].kind == 'endtag' and tokens[i + 1].tag == 'script'):
+        kind, url = 'js', attrs.get('src')
+        end = i + 2
+    else:
+        return None
+    if not url or not is_local(url):
+        return None
+    rel = resolve(page_rel, url)
+    if files.get(rel, ('',))[0] != kind:
+        return None  # missing, or not what it claims to be: leave the tag alone
+    others = tuple(sorted((name, value) for name, value in attrs.items()
+                          if name not in ('href', 'src', 'rel', 'type')))
+    return kind, rel, others, end
+
+
+def _skip_between(tokens, i):
+    """Skip whitespace and comments between tags of a run."""
+    while i < len(tokens) and (tokens[i].is_space() or tokens[i].kind == 'comment'):
+        i += 1
+    return i
+
+
+def _tag(kind, href, others):
+    extra = ''.join(f' {name}' if value is None else f' {name}="{html.escape(value)}"' for name, value in others)
+    if kind == 'css':
+        return f'<link rel="stylesheet" href="{href}"{extra}>'
+    return f'<script src="{href}"{extra}></script>'
+
+
+def _async_stylesheet(href, critical):
+    """Critical rules inline, the full stylesheet loaded without blocking rendering."""
+    critical = critical.replace('</', '<\\/')  # cannot end the <style> element early
+    return (f'<style>{critical}</style>\n'
+            f'\t<link rel="preload" href="{href}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">\n'
+            f'\t<noscript><link rel="stylesheet" href="{href}"></noscript>')
+
+
+def is_theme_script(code):
+    return all(marker in code for marker in THEME_SCRIPT_MARKERS)
+
+
+def rewrite_page(source, page_rel, files, bundler, critical=True):
+    """
+    The published version of one page: bundled assets, minified inline
+    code and, with critical, critical CSS inlined and stylesheets async.
+    """
+    tokens = tokenize(source)
+    elements = None
+    out = []
+    i = 0
+    while i < len(tokens):
+        ref = _asset_ref(tokens, i, page_rel, files)
+        if ref:
+            kind, rel, others, i = ref
+            sources = [rel]
+            while True:
+                j = _skip_between(tokens, i)
+                nxt = _asset_ref(tokens, j, page_rel, files) if j < len(tokens) else None
+                if not nxt or nxt[0] != kind or nxt[2] != others or nxt[1] in sources:
+                    break
+                sources.append(nxt[1])
+                i = nxt[3]
+            name = bundler.bundle(kind, sources)
+            href = relative(name, page_rel)
+            if kind == 'css' and critical and not others:
+                if elements is None:
+                    elements = fold_elements(tokens)
+                # url()s in the bundle are relative to assets/, inline ones to the page
+                rules = rebase_css(critical_css(bundler.text(name), elements), name,
+                                   posixpath.dirname(page_rel) or '.')
+                if rules:
+                    out.append(_async_stylesheet(href, rules))
+                    continue
+            out.append(_tag(kind, href, others))
+            continue
+
+        token = tokens[i]
+        if (token.kind == 'starttag' and i + 2 < len(tokens) and tokens[i + 1].kind == 'data'
+                and tokens[i + 2].kind == 'endtag' and tokens[i + 2].tag == token.tag
+                and ((token.tag == 'script' and 'src' not in token.attrs and token.attrs.get('type') in JS_TYPES)
+                     or token.tag == 'style')):
+            code = tokens[i + 1].text
+            if token.tag == 'script' and is_theme_script(code) and bundler.theme_snippet():
+                code = bundler.theme_snippet()
+            else:
+                code = minify(code, 'js' if token.tag == 'script' else 'css')
+            out += [token.text, code, tokens[i + 2].text]
+            i += 3
+            continue
+
+        out.append(token.text)
+        i += 1
+    return ''.join(out)
+
+
+def _write_if_changed(path, data):
+    if path.exists() and path.stat().st_size == len(data) and path.read_bytes() == data:
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    atomic_write_bytes(path, data)
+    return True
+
+
+def publish(root_dir, output_dir=OUTPUT_DIR, critical=True):
+    """
+    Publish the site into output_dir (critical: inline critical CSS).
+
+    Returns counts {'copied', 'pages', 'bundles', 'unchanged', 'removed'}
+    and the size report {bundle: ([source lists], source bytes, bundle bytes)}.
+    """
+    root = Path(root_dir).resolve()
+    output = (root / output_dir).resolve()
+    manifest_path = root / MANIFEST_NAME
+    manifest = load_manifest(manifest_path, PUBLISH_VERSION)
+    if manifest.get('output') != str(output):
+        manifest = {'version': PUBLISH_VERSION, 'entries': {}, 'output': str(output)}
+    old_entries = manifest['entries']
+    entries = {}
+    counts = dict.fromkeys(('copied', 'pages', 'bundles', 'unchanged', 'removed'), 0)
+
+    files = published_files(root)
+    bundler = Bundler(root)
+    for rel, (kind, size, mtime_ns) in files.items():
+        target = output / rel
+        if kind == 'html':
+            source = (root / rel).read_text(encoding='utf-8', errors='surrogateescape')
+            data = rewrite_page(source, rel, files, bundler, critical).encode('utf-8', errors='surrogateescape')
+            counts['pages' if _write_if_changed(target, data) else 'unchanged'] += 1
+            # With its content hash, so the manifest (and build.py's precompress stage) sees page edits
+            entries[rel] = ['page', sha256_bytes(data)]
+            continue
+        stamp = [size, mtime_ns]
+        if old_entries.get(rel) == stamp and target.exists():
+            counts['unchanged'] += 1
+        else:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(root / rel, target)
+            counts['copied'] += 1
+        entries[rel] = stamp
+
+    # Different source lists can produce identical bundles (same name)
+    report = {}
+    for (kind, sources), (name, data) in sorted(bundler.bundles.items(), key=lambda item: item[1][0]):
+        if name not in report:
+            counts['bundles' if _write_if_changed(output / name, data) else 'unchanged'] += 1
+            entries[name] = 'bundle'
+            report[name] = ([], sum(files[rel][1] for rel in sources), len(data))
+        report[name][0].append(list(sources))
+
+    # Outputs of earlier publishes that are gone from the site (or renamed bundles)
+    for rel in sorted(set(old_entries) - set(entries)):
+        target = output / rel
+        if target.exists():
+            target.unlink()
+            counts['removed'] += 1
+        parent = target.parent
+        while parent != output and parent.exists() and not any(parent.iterdir()):
+            parent.rmdir()
+            parent = parent.parent
+
+    manifest['entries'] = entries
+    save_manifest(manifest_path, manifest)
+    return counts, report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build the publishable copy of the site.")
+    parser.add_argument('-o', '--output', default=OUTPUT_DIR,
+                        help="output directory, relative to the site root (default: %(default)s)")
+    parser.add_argument('--no-critical-css', dest='critical', action='store_false',
+                        help="keep stylesheets render-blocking instead of inlining critical CSS")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    print("=" * 70)
+    print("Publishing site")
+    print("=" * 70)
+
+    counts, report = publish(Path.cwd(), args.output, args.critical)
+
+    print("\nBundles:")
+    print("-" * 70)
+    for name, (source_lists, before, after) in report.items():
+        saved = (1 - after / before) * 100 if before else 0
+        print(f"  {name}  ({before/1024:.1f}KB → {after/1024:.1f}KB, {saved:.1f}% smaller)")
+        for sources in source_lists:
+            print(f"      {' + '.join(sources)}")
+
+    print("\n" + "=" * 70)
+    print(f"Published into {args.output}/:")
+    print(f"  Pages written: {counts['pages']}")
+    print(f"  Bundles written: {counts['bundles']}")
+    print(f"  Files copied: {counts['copied']}")
+    print(f"  Unchanged: {counts['unchanged']}")
+    print(f"  Removed: {counts['removed']}")
+    print("=" * 70)
+
+
+if __name__ == '__main__':
+    main()
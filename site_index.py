@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+One pruned walk over the site tree, shared by all the maintenance scripts.
+
+The walk uses os.scandir, never descends into VCS/cache/build directories,
+skips editor backups and temp files (*~, *.backup, .~lock.*, _temp.html) and
+classifies every file by type.  A stat cache (.site-index-cache.json) stores
+each directory's mtime and listing, so a later walk only lists directories
+whose mtime changed; unchanged directories are taken from the cache.  Only
+listings are cached: every file is stat'ed on each scan, since rewriting a
+file in place does not change its directory's mtime.
+Alternatively the git index can supply the file list (tracked plus
+untracked-but-not-ignored files) without walking at all.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+from pathlib import Path
+
+from build_utils import atomic_write_bytes
+
+CACHE_NAME = '.site-index-cache.json'
+CACHE_VERSION = 2
+
+PRUNE_DIRS = {
+    '.git', '__pycache__', '.pytest_cache', '.mypy_cache', '.ruff_cache',
+    '.tox', '.nox', '.venv', 'venv', 'node_modules', '_site',
+}
+SKIP_SUFFIXES = ('~', '.backup', '.bak', '.orig', '.swp', '.tmp')
+SKIP_PREFIXES = ('.~lock.', '_temp.')
+
+KINDS = {
+    '.html': 'html', '.htm': 'html',
+    '.css': 'css',
+    '.js': 'js',
+    '.jpg': 'jpeg', '.jpeg': 'jpeg',
+    '.png': 'png',
+    '.gif': 'gif',
+    '.webp': 'webp',
+    '.svg': 'svg',
+    '.ico': 'ico',
+    '.pdf': 'pdf',
+    '.json': 'json',
+    '.xml': 'xml',
+    '.txt': 'text',
+    '.py': 'python',
+}
+IMAGE_KINDS = ('jpeg', 'png', 'gif', 'webp', 'svg', 'ico')
+
+
+def classify(name):
+    """File kind from its extension (case-insensitive), 'other' if unknown."""
+    return KINDS.get(os.path.splitext(name)[1].lower(), 'other')
+
+
+def is_skipped(name):
+    """Editor backups, lock files and scratch pages that are never published."""
+    return name.endswith(SKIP_SUFFIXES) or name.startswith(SKIP_PREFIXES)
+
+
+def _list_directory(path):
+    """Return (file names, subdirectory names) for one directory."""
+    files, subdirs = [], []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in PRUNE_DIRS:
+                        subdirs.append(entry.name)
+                elif entry.is_file() and not is_skipped(entry.name):
+                    files.append(entry.name)
+            except OSError:
+                continue
+    return sorted(files), sorted(subdirs)
+
+
+def _walk(root, cached_dirs):
+    """Pruned walk reusing listings of directories whose mtime is unchanged."""
+    dirs = {}
+    listed = 0
+    stack = ['']
+    while stack:
+        rel = stack.pop()
+        path = os.path.join(root, rel) if rel else root
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            continue
+
+        cached = cached_dirs.get(rel)
+        if cached and cached['mtime_ns'] == mtime_ns:
+            record = cached
+        else:
+            try:
+                files, subdirs = _list_directory(path)
+            except OSError:
+                continue
+            record = {'mtime_ns': mtime_ns, 'files': files, 'subdirs': subdirs}
+            listed += 1
+
+        dirs[rel] = record
+        stack.extend(f"{rel}/{name}" if rel else name for name in record['subdirs'])
+    return dirs, listed
+
+
+def _git_files(root):
+    """Files git knows about or would add (tracked + untracked, not ignored), minus deleted ones."""
+    def ls_files(*flags):
+        output = subprocess.run(['git', '-C', str(root), 'ls-files', '-z', *flags],
+                                check=True, capture_output=True).stdout
+        return [name for name in output.decode('utf-8', 'surrogateescape').split('\0') if name]
+
+    deleted = set(ls_files('--deleted'))
+    return [name for name in ls_files('--cached', '--others', '--exclude-standard') if name not in deleted]
+
+
+def scan(root_dir, use_cache=True, use_git=False):
+    """
+    Index the site tree.
+
+    Returns {root-relative posix path: (kind, size, mtime_ns)}.  With
+    use_cache, directory listings are reused from and saved to the stat
+    cache; with use_git, the file list comes from `git ls-files`.  Either
+    way each file is stat'ed, so sizes and mtimes are always current.
+    """
+    root = str(Path(root_dir).resolve())
+    index = {}
+
+    if use_git:
+        for rel in _git_files(root):
+            parts = rel.split('/')
+            if (any(part in PRUNE_DIRS for part in parts[:-1]) or is_skipped(parts[-1])
+                    or rel == CACHE_NAME):
+                continue
+            try:
+                stat = os.stat(os.path.join(root, rel))
+            except OSError:
+                continue
+            index[rel] = (classify(rel), stat.st_size, stat.st_mtime_ns)
+        return dict(sorted(index.items()))
+
+    cache_path = os.path.join(root, CACHE_NAME)
+    cached_dirs = {}
+    if use_cache:
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+            if cache.get('version') == CACHE_VERSION:
+                cached_dirs = cache['dirs']
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            pass
+
+    dirs, listed = _walk(root, cached_dirs)
+    if use_cache and (listed or dirs.keys() != cached_dirs.keys()):
+        data = json.dumps({'version': CACHE_VERSION, 'dirs': dirs}, separators=(',', ':'))
+        atomic_write_bytes(cache_path, data.encode('utf-8'))
+
+    for rel_dir, record in dirs.items():
+        for name in record['files']:
+            rel = f"{rel_dir}/{name}" if rel_dir else name
+            try:
+                stat = os.stat(os.path.join(root, rel))
+            except OSError:
+                continue
+            index[rel] = (classify(name), stat.st_size, stat.st_mtime_ns)
+    index.pop(CACHE_NAME, None)
+    return dict(sorted(index.items()))
+
+
+def files_of_kind(root_dir, index, *kinds):
+    """Sorted absolute Paths of the indexed files of the given kinds."""
+    root = Path(root_dir)
+    return [root / rel for rel, (kind, _, _) in index.items() if kind in kinds]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print a summary of the site file index.")
+    parser.add_argument('--git', action='store_true', help="list files from the git index instead of walking")
+    parser.add_argument('--no-cache', action='store_true', help="ignore and do not update the stat cache")
+    args = parser.parse_args()
+
+    index = scan(Path.cwd(), use_cache=not args.no_cache, use_git=args.git)
+    counts = {}
+    for kind, size, _ in index.values():
+        count, total = counts.get(kind, (0, 0))
+        counts[kind] = (count + 1, total + size)
+    for kind, (count, total) in sorted(counts.items()):
+        print(f"  {kind:8s} {count:6d} files {total/1024/1024:9.2f} MB")
+    print(f"  {'total':8s} {len(index):6d} files")
+
+
+if __name__ == '__main__':
+    main()
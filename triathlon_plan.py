@@ -0,0 +1,454 @@
+#!/usr/bin/env python3
+"""
+Typed model and parser for the training plan source (blog/tri.txt).
+
+The source is a copy of the published plan: a glossary, then one section
+per week, each a "Week N" heading (or "...: Week N"), optional paragraphs
+and a line per day:
+
+    Week 1                                      heading
+    The first 6 weeks ... the "base phase" ...  paragraph (starts a phase)
+    Phase: Base - Aerobic Capacity              or an explicit phase name and tagline
+    Tuesday<TAB>Swim Base: 800 Yards            day: workout title and total
+    WU: 200 @ low aerobic intensity             segment
+    4 x 25 drills, RI=0:10                      segment (set without a label)
+    intensity, RI=1:00                          wrapped continuation of the line above
+    Transition Run: 10 Minutes                  second workout on the same day
+
+Segment labels may also follow on the same line ("Tempo Run: 30 Minutes
+WU: ... MS: ... CD: ...").  parse_plan() reads the lines once, classifying
+each with one regex, and builds Plan -> Phase -> Week -> Day -> Workout ->
+Segment objects with every number (repetitions, distances, durations,
+rest intervals) parsed; nothing downstream needs to look at the source
+text again except to display it.
+
+Distances are Distance values in the source's unit (yards) and durations
+Duration values in seconds; both are ints that know how to show
+themselves in a chosen display unit.  A workout's total is summed from
+its segments (Workout.total_distance/total_duration), falling back to
+the total written in the title line only where the segments don't
+determine one, e.g. "with enough recovery to reach total workout time".
+
+Usage:
+    python triathlon_plan.py                 # summary of blog/tri.txt
+    python triathlon_plan.py other_plan.txt
+"""
+
+import argparse
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+SOURCE_FILE = 'blog/tri.txt'
+
+DAYS = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+LABELS = ('WU', 'MS', 'CD')
+
+# Intensities as written after '@', longest first
+INTENSITIES = ('low aerobic', 'moderate aerobic', 'threshold', 'VO2max', 'speed', 'recovery')
+
+# One pattern per line kind, tried in order
+_LINE = re.compile(r'''
+    (?P<blank>\s*$)
+  | (?:[^\t]*:\s*)?Week\s+(?P<week>\d+)\s*$
+  | (?P<day>''' + '|'.join(DAYS) + r''')\t\s*(?P<workout>.*?)\s*$
+  | (?P<term>[^\t]+?)\s*\t\s*(?P<definition>.+?)\s*$
+  | (?P<text>.+?)\s*$
+''', re.VERBOSE)
+
+# "Transition Run: 10 Minutes": a further workout within a day
+_WORKOUT_LINE = re.compile(r'(?P<title>[A-Z][A-Za-z +]*?):\s*(?P<total>\d[\d:]*(?:\s+[A-Za-z]+)?)\s*$')
+_INLINE_LABEL = re.compile(r'\s+(?=(?:' + '|'.join(LABELS) + r'):)')
+_LABEL = re.compile(r'(?P<label>' + '|'.join(LABELS) + r'):\s*(?P<text>.*)$', re.DOTALL)
+
+_PHASE = re.compile(r'\b(\w+)\W*\s+phase\b', re.IGNORECASE)
+_PHASE_LINE = re.compile(r'Phase:\s*(?P<name>.+?)\s*(?:\s[-–]\s*(?P<tagline>.+?))?\s*$')
+
+_REPS = re.compile(r'(\d+)\s*x\s*')
+_DURATION = re.compile(r'''
+    (?:(?P<hours>\d+)\s*hours?(?:\s+and\s+(?=\d))?)?
+    (?:(?P<minutes>\d+)[\s-]*minutes?)?
+    (?:(?P<seconds>\d+)[\s-]*seconds?)?
+''', re.VERBOSE | re.IGNORECASE)
+_DISTANCE = re.compile(r'(\d+)(?:\s*yards?)?\b(?![\s-]*(?:hours?|minutes?|seconds?)\b)', re.IGNORECASE)
+_INTENSITY = re.compile(r'@\s*(' + '|'.join(INTENSITIES) + r')\b', re.IGNORECASE)
+_REST = re.compile(r'\bRI\b(?:\s*\([^)]*\))?\s*=\s*(\d+):(\d\d)')
+_DRILL = re.compile(r'\b(drills|kick)\b')
+# "with 30-second active recoveries" (after each repetition), "with 10
+# minutes active recovery" (between them), "with enough recovery to reach ..."
+_RECOVERY = re.compile(r'\bwith\s+(?:(?P<enough>enough)|(?P<amount>.+?))\s+(?:active\s+)?recover(?:y|(?P<each>ies))\b',
+                       re.IGNORECASE)
+_CLOCK = re.compile(r'(\d+):(\d\d)$')
+
+
+# Display unit -> (display units per yard, suffix).  Pool lengths are
+# 25 yards or 25 meters and plans are swum in either, so the plan page
+# shows the numbers as written with meters ('pool').
+DISTANCE_UNITS = {
+    'yd': (1.0, 'yd'),
+    'm': (0.9144, 'm'),
+    'pool': (1.0, 'm'),
+}
+
+# Display unit -> seconds per unit; 'clock' is '45 min' below an hour, h:mm from an hour on
+DURATION_UNITS = {
+    's': 1,
+    'min': 60,
+    'h': 3600,
+    'clock': None,
+}
+
+
+class Distance(int):
+    """A distance in yards."""
+
+    __slots__ = ()
+
+    def to(self, unit):
+        return self * DISTANCE_UNITS[unit][0]
+
+    def format(self, unit='yd'):
+        scale, suffix = DISTANCE_UNITS[unit]
+        return f"{round(self * scale)}{suffix}"
+
+
+class Duration(int):
+    """A duration in seconds."""
+
+    __slots__ = ()
+
+    def to(self, unit):
+        return self / DURATION_UNITS[unit]
+
+    def format(self, unit='clock'):
+        if DURATION_UNITS[unit] is None:
+            return format_duration(self)
+        return f"{self.to(unit):g} {unit}"
+
+
+@dataclass(slots=True)
+class Segment:
+    """One line of a workout: a labelled part (WU/MS/CD) or an unlabelled set."""
+    label: str                      # 'WU', 'MS', 'CD' or ''
+    text: str                       # source text after the label
+    kind: str = 'set'               # 'WU', 'MS', 'CD', 'drills', 'kick', 'set' or 'note'
+    reps: Optional[int] = None
+    distance: Optional[int] = None  # per repetition
+    duration: Optional[int] = None  # seconds, per repetition
+    intensity: Optional[str] = None
+    rest: Optional[int] = None      # seconds between repetitions
+    recoveries: int = 0             # timed rests counted in the segment's duration
+    open_ended: bool = False        # runs on to the workout's written total
+
+    @property
+    def total_distance(self):
+        return Distance((self.reps or 1) * self.distance) if self.distance is not None else None
+
+    @property
+    def total_duration(self):
+        if self.duration is None:
+            return None
+        return Duration((self.reps or 1) * self.duration + self.recoveries * (self.rest or 0))
+
+
+@dataclass(slots=True)
+class Workout:
+    title: str                      # as written, e.g. 'Swim Base + Lactate'
+    sport: str                      # 'swim', 'bike', 'run', 'brick', 'race', 'rest' or 'other'
+    total: str = ''                 # source text, e.g. '800 Yards', '1:15'
+    distance: Optional[Distance] = None   # as written in the title line
+    duration: Optional[Duration] = None
+    transition: bool = False        # a run straight after the day's bike workout
+    segments: List[Segment] = field(default_factory=list)
+
+    def _summed(self, quantity, written):
+        parts = [getattr(segment, quantity) for segment in self.segments]
+        parts = [part for part in parts if part is not None]
+        if not parts or any(segment.open_ended for segment in self.segments):
+            return written
+        return type(parts[0])(sum(parts))
+
+    @property
+    def total_distance(self):
+        """Distance summed over the segments, or as written if they don't give one."""
+        return self._summed('total_distance', self.distance)
+
+    @property
+    def total_duration(self):
+        """Duration summed over the segments, or as written if they don't give one."""
+        return self._summed('total_duration', self.duration)
+
+
+@dataclass(slots=True)
+class Day:
+    name: str
+    workouts: List[Workout] = field(default_factory=list)
+
+    @property
+    def is_rest(self):
+        return not self.workouts or all(workout.sport == 'rest' for workout in self.workouts)
+
+
+@dataclass(slots=True)
+class Week:
+    number: int
+    notes: List[str] = field(default_factory=list)
+    days: Dict[str, Day] = field(default_factory=dict)
+
+
+@dataclass(slots=True)
+class Phase:
+    name: str                       # e.g. 'base', as the source names it; '' before the first
+    description: str = ''
+    tagline: str = ''               # from a "Phase: name - tagline" line
+    weeks: List[Week] = field(default_factory=list)
+
+    @property
+    def first_week(self):
+        return self.weeks[0].number if self.weeks else None
+
+    @property
+    def last_week(self):
+        return self.weeks[-1].number if self.weeks else None
+
+
+@dataclass(slots=True)
+class Plan:
+    title: str = ''
+    glossary: Dict[str, str] = field(default_factory=dict)
+    phases: List[Phase] = field(default_factory=list)
+
+    @property
+    def weeks(self):
+        return [week for phase in self.phases for week in phase.weeks]
+
+    def week(self, number):
+        return next((week for week in self.weeks if week.number == number), None)
+
+
+# --- Quantities ------------------------------------------------------------
+
+def parse_duration(text):
+    """Seconds in '30 Minutes', '1 Hour', '1 hour and 10 minutes', '30 seconds', '1-minute'; None if none."""
+    for match in _DURATION.finditer(text):
+        if match.group(0).strip():
+            hours, minutes, seconds = (int(match.group(name) or 0) for name in ('hours', 'minutes', 'seconds'))
+            return Duration(hours * 3600 + minutes * 60 + seconds)
+    return None
+
+
+def parse_total(text):
+    """(distance, duration) of a workout total: '800 Yards', '45 Minutes', '2 Hours' or h:mm."""
+    clock = _CLOCK.match(text)
+    if clock:
+        return None, Duration(int(clock.group(1)) * 3600 + int(clock.group(2)) * 60)
+    duration = parse_duration(text)
+    if duration:
+        return None, duration
+    distance = _DISTANCE.match(text)
+    if distance:
+        return Distance(distance.group(1)), None
+    return None, None
+
+
+def classify_sport(title):
+    """Sport of a workout from its title (the first match wins: 'Brick' over 'Bike')."""
+    lowered = title.lower()
+    if 'rest day' in lowered:
+        return 'rest'
+    if 'brick' in lowered:
+        return 'brick'
+    if 'race day' in lowered or 'triathlon' in lowered:
+        return 'race'
+    if 'swim' in lowered:
+        return 'swim'
+    if 'bike' in lowered or 'cycle' in lowered:
+        return 'bike'
+    if 'run' in lowered:
+        return 'run'
+    return 'other'
+
+
+def parse_segment(text, sport):
+    """A Segment with its numbers parsed, from one (possibly 'WU:'-labelled) piece of text."""
+    labelled = _LABEL.match(text)
+    label, body = (labelled.group('label'), labelled.group('text').strip()) if labelled else ('', text.strip())
+    segment = Segment(label, body, kind=label or 'set')
+    if sport == 'race':
+        segment.kind = 'note'
+        return segment
+
+    rest = body
+    reps = _REPS.match(rest)
+    if reps:
+        segment.reps = int(reps.group(1))
+        rest = rest[reps.end():]
+    # 'Run 10 minutes ...', 'Bike 1 hour ...'
+    rest = re.sub(r'^(?:Run|Bike|Swim)\s+', '', rest)
+    amount = rest.split('@', 1)[0]
+    segment.duration = parse_duration(amount)
+    if segment.duration is None and sport == 'swim':
+        distance = _DISTANCE.match(amount)
+        if distance:
+            segment.distance = Distance(distance.group(1))
+
+    intensity = _INTENSITY.search(body)
+    if intensity:
+        segment.intensity = intensity.group(1)
+    ri = _REST.search(body)
+    if ri:
+        segment.rest = Duration(int(ri.group(1)) * 60 + int(ri.group(2)))
+    recovery = _RECOVERY.search(body)
+    if recovery and recovery.group('enough'):
+        segment.open_ended = True
+    elif recovery and segment.duration is not None:
+        segment.rest = parse_duration(recovery.group('amount'))
+        if segment.rest is not None:
+            reps = segment.reps or 1
+            segment.recoveries = reps if recovery.group('each') else reps - 1
+    drill = _DRILL.search(body)
+    if drill and not label:
+        segment.kind = drill.group(1)
+    elif not label and segment.reps is None and segment.distance is None and segment.duration is None:
+        segment.kind = 'note'
+    return segment
+
+
+def parse_workout(line):
+    """A Workout from a day line such as 'Swim Base: 800 Yards' (segments may follow inline)."""
+    pieces = _INLINE_LABEL.split(line)
+    head = pieces[0]
+    title, colon, total = head.partition(':')
+    title, total = title.strip(), total.strip() if colon else ''
+    sport = classify_sport(title)
+    workout = Workout(title, sport, total)
+    workout.distance, workout.duration = parse_total(total) if total else (None, None)
+    workout.segments = [parse_segment(piece, sport) for piece in pieces[1:]]
+    return workout
+
+
+# --- Parser ----------------------------------------------------------------
+
+def parse_plan(text):
+    """Parse the plan source text into a Plan, in one pass over its lines."""
+    plan = Plan()
+    phase = None
+    week = None
+    day = None
+    preamble = True
+
+    def current_phase():
+        nonlocal phase
+        if phase is None:
+            phase = Phase('')
+            plan.phases.append(phase)
+        return phase
+
+    for line in text.split('\n'):
+        match = _LINE.match(line)
+        if match.group('blank') is not None:
+            continue
+
+        number = match.group('week')
+        if number is not None:
+            number = int(number)
+            # "Week 1" is repeated as the day table's caption: same section
+            if week is None or week.number != number:
+                week = Week(number)
+                current_phase().weeks.append(week)
+            day = None
+            preamble = False
+            continue
+
+        if match.group('day') and week is not None:
+            day = week.days.setdefault(match.group('day'), Day(match.group('day')))
+            day.workouts.append(parse_workout(match.group('workout')))
+            continue
+
+        text_line = line.strip()
+        if preamble:
+            # Glossary entries, and the plan's title just before the first week
+            if match.group('term'):
+                plan.glossary[match.group('term')] = match.group('definition')
+            else:
+                plan.title = text_line
+            continue
+
+        if day is None:
+            # Paragraph between a week heading and its days
+            declared = _PHASE_LINE.match(text_line)
+            named = declared or _PHASE.search(text_line)
+            opened = phase.name and phase.weeks[0] is week
+            if named and not week.days and (declared or not opened):
+                # The week opens a phase: move it out of the previous one
+                phase.weeks.remove(week)
+                if not phase.weeks:
+                    plan.phases.remove(phase)
+                if declared:
+                    phase = Phase(declared.group('name').lower(), tagline=declared.group('tagline') or '')
+                else:
+                    phase = Phase(named.group(1).lower(), text_line)
+                phase.weeks.append(week)
+                plan.phases.append(phase)
+            elif opened and not phase.description and not week.days:
+                phase.description = text_line
+            else:
+                week.notes.append(text_line)
+            continue
+
+        workout = day.workouts[-1]
+        transition = _WORKOUT_LINE.match(text_line)
+        if transition and transition.group('title') not in LABELS:
+            extra = parse_workout(text_line)
+            extra.transition = 'transition' in extra.title.lower()
+            day.workouts.append(extra)
+        elif text_line[0].islower() and workout.segments:
+            # A line wrapped in the middle of a sentence
+            previous = workout.segments[-1]
+            joined = f"{previous.label}: {previous.text} {text_line}" if previous.label else f"{previous.text} {text_line}"
+            workout.segments[-1] = parse_segment(joined, workout.sport)
+        else:
+            workout.segments.extend(parse_segment(piece, workout.sport)
+                                    for piece in _INLINE_LABEL.split(text_line))
+    return plan
+
+
+def load_plan(path=SOURCE_FILE):
+    with open(path, 'r', encoding='utf-8') as f:
+        return parse_plan(f.read())
+
+
+def format_duration(seconds):
+    """'45 min' below an hour, h:mm from an hour on."""
+    minutes = seconds // 60
+    if minutes < 60:
+        return f"{minutes} min"
+    return f"{minutes // 60}:{minutes % 60:02d}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parse a training plan source and summarize it.")
+    parser.add_argument('source', nargs='?', default=SOURCE_FILE, help="plan text (default: %(default)s)")
+    parser.add_argument('--unit', choices=sorted(DISTANCE_UNITS), default='yd',
+                        help="unit distances are shown in (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    plan = load_plan(args.source)
+    print(plan.title or args.source)
+    for phase in plan.phases:
+        print(f"  {phase.name.upper() or 'UNNAMED'} PHASE: weeks {phase.first_week}-{phase.last_week}")
+        for week in phase.weeks:
+            workouts = [workout for day in week.days.values() for workout in day.workouts if workout.sport != 'rest']
+            seconds = Duration(sum(workout.total_duration or 0 for workout in workouts if not workout.transition))
+            yards = Distance(sum(workout.total_distance or 0 for workout in workouts))
+            segments = sum(len(workout.segments) for workout in workouts)
+            print(f"    Week {week.number:2d}: {len(workouts)} workouts, {segments} segments, "
+                  f"{seconds.format()} timed, {yards.format(args.unit)} swum")
+            for workout in workouts:
+                if (workout.total_distance, workout.total_duration) != (workout.distance, workout.duration):
+                    print(f"      {workout.title}: segments add up to "
+                          f"{(workout.total_distance or workout.total_duration).format()}, not {workout.total}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,54 +1,35 @@
 #!/usr/bin/env python3
 """
 Update all HTML pages to use the new dark theme structure.
-Applies changes to research.html, teaching.html, computation.html, learning.html, blog.html, and contact.html
+Applies changes to the pages in the site root and blog/.  The course pages
+(courses/) use an older layout the rules only partly match, so they are
+not migrated by default.
+
+The migration is a list of rules applied in one pass over each page's HTML
+tokens (see html_transform.py); whitespace between tags does not matter.
+A manifest records each page's hash after migration, so pages that are
+already migrated are skipped without being parsed, and a page is only
+rewritten (atomically) when the migration actually changed it.
 """
 
-import re
+import argparse
+import os
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
-# List of HTML files to update
-files_to_update = [
-    'research.html',
-    'teaching.html',
-    'computation.html',
-    'learning.html',
-    'blog.html',
-    'contact.html'
-]
-
-def update_html_file(filename):
-    """Update a single HTML file with the new structure."""
-    print(f"Updating {filename}...")
-
-    with open(filename, 'r', encoding='utf-8') as f:
-        content = f.read()
-
-    # Update DOCTYPE and html tag
-    content = re.sub(
-        r'<!DOCTYPE html PUBLIC.*?>\s*<html xmlns.*?>',
-        '<!DOCTYPE html>\n<html lang="en">',
-        content,
-        flags=re.DOTALL
-    )
+import site_index
+from build_utils import atomic_write_bytes, load_manifest, save_manifest, sha256_bytes
+from html_transform import ANY, DataRule, Rule, Transform, comment, decl, end, start, text
 
-    # Update head section - meta charset and viewport
-    content = re.sub(
-        r'<head>\s*<meta http-equiv="Content-Type".*?>',
-        '<head>\n\t<meta charset="UTF-8">\n\t<meta name="viewport" content="width=device-width, initial-scale=1.0">',
-        content
-    )
-
-    # Update title
-    content = re.sub(
-        r'<title>\s*Keivan Monfared\'s Home Page\s*</title>',
-        f'<title>Keivan Monfared - {filename.replace(".html", "").title()}</title>',
-        content
-    )
+# Directories (relative to the site root) whose pages are migrated
+PAGE_DIRECTORIES = ('', 'blog')
 
-    # Update body structure - add bg-gradient, header section, and move nav outside container
-    body_pattern = r'<body>\s*<div class="container">\s*<div id="stick-here"></div>\s*<div class="myTitle">\s*KEIVAN MONFARED\s*</div>\s*<div class="myTitleFooter">\s*Mathematics and Data Science\s*</div>\s*<!-- Navigation loaded from nav\.html -->\s*<div id="nav-container"></div>'
+MANIFEST_NAME = '.page-migration-manifest.json'
+# Bump when RULES change: the manifest is discarded and every page is checked again
+MIGRATION_VERSION = 1
 
-    body_replacement = '''<body>
+BODY_HEADER = '''<body>
 \t<div class="bg-gradient"></div>
 
 \t<header class="site-header">
@@ -65,33 +46,7 @@ def update_html_file(filename):
 
 \t<div class="container">'''
 
-    content = re.sub(body_pattern, body_replacement, content, flags=re.DOTALL)
-
-    # Update small_menu innerHTML to remove span tags
-    content = re.sub(
-        r"'<span class=\"menuItem\"><a href=\"(#[^\"]+)\">([^<]+)</a></span>'",
-        r"'<a href=\"\1\">\2</a>'",
-        content
-    )
-
-    # Update pageContent and mainContent to main-content
-    content = re.sub(
-        r'<div id="pageContent">\s*<div id="mainContent">',
-        '\t\t<main class="main-content">',
-        content
-    )
-
-    # Update closing divs for pageContent and mainContent
-    content = re.sub(
-        r'</div>\s*</div>\s*<!-- Footer and social media loaded from footer\.html -->',
-        '\t\t</main>\n\n\t\t<!-- Footer and social media loaded from footer.html -->',
-        content
-    )
-
-    # Update footer structure
-    content = re.sub(
-        r'<!-- Footer and social media loaded from footer\.html -->\s*<div id="footer-container"></div>\s*</div>\s*</body>',
-        '''<!-- Footer and social media loaded from footer.html -->
+FOOTER = '''<!-- Footer and social media loaded from footer.html -->
 \t\t<footer class="site-footer">
 \t\t\t<div id="footer-container"></div>
 \t\t</footer>
@@ -128,25 +83,163 @@ def update_html_file(filename):
 \t\t\tscrollToTopBtn.style.pointerEvents = 'none';
 \t\t}
 \t</script>
-</body>''',
-        content
-    )
+</body>'''
 
-    # Write updated content
-    with open(filename, 'w', encoding='utf-8') as f:
-        f.write(content)
+FOOTER_COMMENT = ' Footer and social media loaded from footer.html '
 
-    print(f"✓ Updated {filename}")
 
-def main():
-    """Update all HTML files."""
-    for filename in files_to_update:
-        try:
-            update_html_file(filename)
-        except Exception as e:
-            print(f"✗ Error updating {filename}: {e}")
+def page_title(tokens, context):
+    """New <title> built from the page's file name."""
+    name = os.path.basename(context['filename'])
+    return f'<title>Keivan Monfared - {name.replace(".html", "").title()}</title>'
+
 
-    print("\nAll files updated successfully!")
+RULES = [
+    # Update DOCTYPE and html tag
+    Rule('doctype', [decl('DOCTYPE html PUBLIC'), start('html', xmlns=ANY)],
+         '<!DOCTYPE html>\n<html lang="en">'),
+
+    # Update head section - meta charset and viewport
+    Rule('meta-charset', [start('head'), start('meta', http_equiv='Content-Type')],
+         '<head>\n\t<meta charset="UTF-8">\n\t<meta name="viewport" content="width=device-width, initial-scale=1.0">'),
+
+    # Update title
+    Rule('title', [start('title'), text("Keivan Monfared's Home Page"), end('title')], page_title),
+
+    # Update body structure - add bg-gradient, header section, and move nav outside container
+    Rule('body-header', [
+        start('body'),
+        start('div', class_='container'),
+        start('div', id='stick-here'), end('div'),
+        start('div', class_='myTitle'), text('KEIVAN MONFARED'), end('div'),
+        start('div', class_='myTitleFooter'), text('Mathematics and Data Science'), end('div'),
+        comment(' Navigation loaded from nav.html '),
+        start('div', id='nav-container'), end('div'),
+    ], BODY_HEADER),
+
+    # Update small_menu innerHTML to remove span tags
+    DataRule('small-menu',
+             r"'<span class=\"menuItem\"><a href=\"(#[^\"]+)\">([^<]+)</a></span>'",
+             r"'<a href=\"\1\">\2</a>'",
+             within=('script',)),
+
+    # Update pageContent and mainContent to main-content
+    Rule('main-content', [start('div', id='pageContent'), start('div', id='mainContent')],
+         '\t\t<main class="main-content">'),
+
+    # Update closing divs for pageContent and mainContent
+    Rule('main-content-close', [end('div'), end('div')], '\t\t</main>\n\n\t\t',
+         lookahead=[comment(FOOTER_COMMENT)]),
+
+    # Update footer structure
+    Rule('footer', [
+        comment(FOOTER_COMMENT),
+        start('div', id='footer-container'), end('div'),
+        end('div'),
+        end('body'),
+    ], FOOTER),
+]
+
+# Rules that must fire equally often on a page or not be applied at all:
+# opening <main> without closing it breaks the page
+PAIRED_RULES = [('main-content', 'main-content-close')]
+
+page_migration = Transform(RULES)
+
+
+def find_pages(root_dir, index=None):
+    """HTML pages directly inside the PAGE_DIRECTORIES."""
+    if index is None:
+        index = site_index.scan(root_dir)
+    root = Path(root_dir)
+    return [path for path in site_index.files_of_kind(root, index, 'html')
+            if path.suffix == '.html' and posixpath.dirname(path.relative_to(root).as_posix()) in PAGE_DIRECTORIES]
+
+
+def migrate_page(path, rel_path, entry=None):
+    """
+    Migrate one page.
+
+    entry is the page's manifest record from the last run; if the file still
+    has the hash recorded there it is already migrated and is not parsed.
+    Returns (fired, new_entry): fired is None for a skipped page, else
+    {rule: times fired} (empty if no rule matched and nothing was written).
+    """
+    data = path.read_bytes()
+    digest = sha256_bytes(data)
+    if entry is not None and entry.get('sha256') == digest:
+        return None, entry
+
+    content = data.decode('utf-8')
+    new_content, fired = page_migration.apply(content, {'filename': rel_path})
+    for first, second in PAIRED_RULES:
+        if fired.get(first, 0) != fired.get(second, 0):
+            raise ValueError(f"{first} fired {fired.get(first, 0)}x but {second} {fired.get(second, 0)}x; "
+                             f"page left unchanged")
+    if new_content != content:
+        data = new_content.encode('utf-8')
+        atomic_write_bytes(path, data)
+        digest = sha256_bytes(data)
+    return fired, {'sha256': digest}
+
+
+def _migrate_task(path, rel_path, entry):
+    """Thread-pool entry point: never raises, returns the error text instead."""
+    try:
+        return (*migrate_page(path, rel_path, entry), None)
+    except Exception as e:
+        return None, entry, str(e)
+
+
+def update_html_file(filename):
+    """Update a single HTML file with the new structure; returns {rule: times fired}."""
+    fired, _ = migrate_page(Path(filename), Path(filename).as_posix())
+    return fired
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Migrate HTML pages to the new site structure.")
+    parser.add_argument('pages', nargs='*',
+                        help="pages to migrate (default: *.html in the root and blog/)")
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1,
+                        help="number of threads (default: CPU count)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Update all HTML files."""
+    args = parse_args(argv)
+    root_dir = Path.cwd()
+    pages = [root_dir / page for page in args.pages] if args.pages else find_pages(root_dir)
+
+    manifest_path = root_dir / MANIFEST_NAME
+    manifest = load_manifest(manifest_path, MIGRATION_VERSION)
+    rels = [path.resolve().relative_to(root_dir).as_posix() for path in pages]
+
+    updated = skipped = unchanged = failed = 0
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        futures = [executor.submit(_migrate_task, path, rel, manifest['entries'].get(rel))
+                   for path, rel in zip(pages, rels)]
+        for rel, future in zip(rels, futures):
+            fired, entry, error = future.result()
+            if error:
+                print(f"✗ Error updating {rel}: {error}")
+                failed += 1
+                continue
+            manifest['entries'][rel] = entry
+            if fired is None:
+                skipped += 1
+            elif fired:
+                applied = ", ".join(f"{name} x{count}" if count > 1 else name for name, count in fired.items())
+                print(f"✓ Updated {rel} ({applied})")
+                updated += 1
+            else:
+                unchanged += 1
+
+    save_manifest(manifest_path, manifest)
+
+    print(f"\n{updated} updated, {unchanged} already up to date, "
+          f"{skipped} skipped (unchanged since last run), {failed} failed")
 
 if __name__ == '__main__':
     main()